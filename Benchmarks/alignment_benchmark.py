@@ -0,0 +1,58 @@
+import random
+import sys
+import time
+
+sys.path.insert(0, ".")  # Run from the project root: python Benchmarks/alignment_benchmark.py
+
+from fluent_edge_core.word_alignment import align_words, ALIGNMENT_BAND
+
+def read_aloud(passage, error_rate, rng):
+    """
+    Simulates a learner reading a passage: some words are misread, skipped or repeated.
+
+    :param passage: The words of the passage.
+    :param error_rate: The share of words read wrongly.
+    :param rng: The random number generator.
+    :return: The words that were spoken.
+    """
+    spoken = []
+    for word in passage:
+        chance = rng.random()
+        if chance < error_rate / 2:
+            spoken.append("um")  # Misread
+        elif chance < error_rate * 0.8:
+            continue  # Skipped
+        else:
+            spoken.append(word)
+            if chance > 1 - error_rate * 0.2:
+                spoken.append(word)  # Repeated
+    return spoken
+
+def best_time(reference, hypothesis, band=ALIGNMENT_BAND, repeats=3):
+    """
+    :return: A tuple of (number of errors, fastest run in seconds).
+    """
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        operations = align_words(reference, hypothesis, band)
+        times.append(time.perf_counter() - started)
+    return sum(operation != "match" for operation, _, _ in operations), min(times)
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    for word_count in (500, 2000, 5000):
+        passage = [rng.choice(vocabulary) for _ in range(word_count)]
+        for error_rate in (0.05, 0.2):
+            spoken = read_aloud(passage, error_rate, rng)
+            errors, banded_time = best_time(passage, spoken)
+            full_errors, full_time = best_time(passage, spoken, band=max(len(passage), len(spoken)), repeats=1)
+            if errors != full_errors:
+                print(f"❌ The banded alignment is not optimal for {word_count} words.", flush=True)
+                sys.exit(1)
+            print(
+                f"📊 {word_count:>5} words, {error_rate:.0%} errors | banded: {banded_time * 1000:7.1f}ms | "
+                f"full table: {full_time * 1000:7.1f}ms | {errors} word errors",
+                flush=True
+            )
@@ -0,0 +1,74 @@
+import logging
+import sys
+import time
+
+sys.path.insert(0, ".")  # Run from the project root: python Benchmarks/grammar_batch_benchmark.py
+
+from fluent_edge_core.grammar_checker import get_grammar_checker
+
+grammar_checker = get_grammar_checker()  # Starts LanguageTool
+
+# Practice sentences, some with deliberate mistakes, repeated to build a long transcript
+SAMPLE_SENTENCES = [
+    "she go to school every day.",
+    "we are learning to speak english fluently.",
+    "he have a apple in his bag.",
+    "they was playing football in the evening.",
+    "my friend and me went to the market yesterday.",
+    "this is a correct sentence.",
+]
+
+def build_transcript(sentence_count):
+    """
+    Builds a transcript by repeating the sample sentences.
+
+    :param sentence_count: The number of sentences in the transcript.
+    :return: The transcript text.
+    """
+    return " ".join(SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)] for i in range(sentence_count))
+
+def run(text, batch):
+    """
+    Checks the text once and counts the requests sent to LanguageTool.
+
+    :param text: The transcript to check.
+    :param batch: Whether to use the batched mode.
+    :return: A tuple of (number of errors, number of LanguageTool requests, elapsed seconds).
+    """
+    tool = grammar_checker.tool
+    original_check = tool.check
+    calls = []
+
+    def counting_check(sentence):
+        calls.append(len(sentence))
+        return original_check(sentence)
+
+    tool.check = counting_check  # Count round-trips to the LanguageTool server
+    grammar_checker.batch = batch
+    try:
+        started = time.perf_counter()
+        errors = grammar_checker.check_grammar(text)
+        elapsed = time.perf_counter() - started
+    finally:
+        tool.check = original_check
+    return len(errors), len(calls), elapsed
+
+if __name__ == "__main__":
+    if not grammar_checker.tool:
+        print("❌ LanguageTool is not available, cannot run the benchmark.", flush=True)
+        sys.exit(1)
+
+    logging.getLogger("fluent_edge_core.grammar_checker").setLevel(logging.WARNING)  # Keep per-error logs out of the timings
+
+    for sentence_count in (10, 50, 100, 200):
+        text = build_transcript(sentence_count)
+        run(text, batch=True)  # Warm up the LanguageTool server
+
+        single_errors, single_calls, single_time = run(text, batch=False)
+        batch_errors, batch_calls, batch_time = run(text, batch=True)
+        print(
+            f"📊 {sentence_count:>3} sentences | per-sentence: {single_calls:>3} requests, {single_time:6.2f}s, "
+            f"{single_errors} errors | batched: {batch_calls} requests, {batch_time:6.2f}s, {batch_errors} errors | "
+            f"speed-up x{single_time / batch_time:.1f}",
+            flush=True
+        )
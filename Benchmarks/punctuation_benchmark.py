@@ -0,0 +1,109 @@
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, ".")  # Run from the project root: python Benchmarks/punctuation_benchmark.py
+
+from fluent_edge_core.punctuation_restorer import DEFAULT_PUNCTUATION_RULES, PunctuationRestorer
+
+punctuation_restorer = PunctuationRestorer()
+
+# Words of recognized speech (no punctuation, lowercase), mixing the words the rules react to with content words
+VOCABULARY = [
+    "i", "we", "you", "they", "she", "the", "a", "my", "what", "where", "how", "because", "and", "but", "so",
+    "went", "school", "yesterday", "teacher", "explained", "lesson", "very", "clearly", "football", "evening",
+    "market", "bought", "vegetables", "mother", "cooking", "dinner", "is", "to", "in", "of", "with", "today",
+]
+
+def build_transcript(word_count, seed=0):
+    """
+    Builds a random transcript of recognized words.
+
+    :param word_count: The number of words in the transcript.
+    :param seed: The random seed, so every run checks the same text.
+    :return: The transcript text.
+    """
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(word_count))
+
+def list_based_restore_punctuation(text):
+    """
+    The previous implementation of PunctuationRestorer.restore_punctuation, which tests membership
+    in lists and joins the words of every sentence, kept here as the baseline.
+
+    :param text: The input text that requires punctuation restoration.
+    :return: The text with restored punctuation.
+    """
+    sentence_starters = list(DEFAULT_PUNCTUATION_RULES["sentence_starters"])
+    question_words = list(DEFAULT_PUNCTUATION_RULES["question_words"])
+    non_ending_words = list(DEFAULT_PUNCTUATION_RULES["non_ending_words"])
+    if not text:
+        return ""
+    text = re.sub(r'\s+', ' ', text).strip()
+    words = text.split()
+    sentences = []
+    current_sentence = []
+    for i, word in enumerate(words):
+        current_sentence.append(word)
+        if i == len(words) - 1 or len(words[i+1]) <= 2:
+            continue
+        next_word = words[i+1].lower()
+        end_sentence = False
+        if word.endswith("?"):
+            end_sentence = True
+        elif i >= 2 and words[i-2].lower() in question_words and len(current_sentence) > 3:
+            end_sentence = True
+            current_sentence[-1] = current_sentence[-1] + "?"
+        elif (next_word in sentence_starters and
+              word.lower() not in non_ending_words and
+              len(current_sentence) >= 4):
+            end_sentence = True
+            if not word[-1] in ".!?":
+                current_sentence[-1] = current_sentence[-1] + "."
+        elif (i < len(words) - 2 and
+              next_word in ["and", "but", "or", "nor", "yet", "so"] and
+              len(current_sentence) > 3):
+            if not word[-1] in ",.!?":
+                current_sentence[-1] = current_sentence[-1] + ","
+        if end_sentence:
+            sentences.append(" ".join(current_sentence))
+            current_sentence = []
+    if current_sentence:
+        last_text = " ".join(current_sentence)
+        if not last_text[-1] in ".!?":
+            last_text += "."
+        sentences.append(last_text)
+    sentences = [s[0].upper() + s[1:] if s else "" for s in sentences]
+    return " ".join(sentences)
+
+def best_time(function, text, repeats):
+    """
+    :param function: The punctuation function to time.
+    :param text: The transcript to punctuate.
+    :param repeats: The number of runs.
+    :return: A tuple of (result, fastest run in seconds).
+    """
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = function(text)
+        times.append(time.perf_counter() - started)
+    return result, min(times)
+
+if __name__ == "__main__":
+    for word_count in (1_000, 10_000, 100_000):
+        text = build_transcript(word_count)
+        repeats = 20 if word_count < 100_000 else 5
+
+        baseline, baseline_time = best_time(list_based_restore_punctuation, text, repeats)
+        result, engine_time = best_time(punctuation_restorer.restore_punctuation, text, repeats)
+        if result != baseline:
+            print(f"❌ The outputs differ for {word_count} words.", flush=True)
+            sys.exit(1)
+        print(
+            f"📊 {word_count:>7} words | lists: {word_count / baseline_time / 1e6:5.2f}M words/s "
+            f"({baseline_time * 1000:7.1f}ms) | frozensets: {word_count / engine_time / 1e6:5.2f}M words/s "
+            f"({engine_time * 1000:7.1f}ms) | speed-up x{baseline_time / engine_time:.1f}",
+            flush=True
+        )
@@ -0,0 +1,70 @@
+import gc
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")  # Run from the project root: python Benchmarks/segment_store_benchmark.py [minutes]
+
+from fluent_edge_core.segment_store import SegmentStore
+
+# Events a live session publishes per second: partial hypotheses at the partial interval and a caption every few seconds
+PARTIALS_PER_SECOND = 5
+SECONDS_PER_CAPTION = 3
+CAPTION = "so yesterday we went to the market and my mother bought vegetables for dinner"
+
+# Memory the spilling store may keep before moving old chunks to disk. Smaller than the default
+# (SEGMENT_SPILL_BYTES), which an hour of events does not reach, so the benchmark measures spilling
+SPILL_BYTES = 64 * 1024
+
+def session_events(minutes):
+    """
+    :param minutes: The length of the simulated session.
+    :return: A generator of the (event_type, payload) pairs a session publishes.
+    """
+    for second in range(minutes * 60):
+        for partial in range(PARTIALS_PER_SECOND):
+            yield "PARTIAL", CAPTION[:10 + partial * 12]
+        if second % SECONDS_PER_CAPTION == 0:
+            yield "LIVE", f"{CAPTION} {second}"
+
+def run(minutes, store_factory, to_item):
+    """
+    Publishes a session's events into a store while one subscriber follows it with a cursor.
+
+    :return: A tuple of (bytes of memory held by the store, bytes spilled to disk, microseconds per publish
+             and read, number of events).
+    """
+    def follow():
+        store = store_factory()
+        cursor = 0
+        for event in session_events(minutes):
+            store.append(to_item(event))
+            cursor += len(store[cursor:] if isinstance(store, list) else store.read(cursor))
+        return store, cursor
+
+    gc.collect()
+    started = time.perf_counter()
+    _, events = follow()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()  # Second run, since tracing allocations slows it down
+    store, _ = follow()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    spilled = 0 if isinstance(store, list) else store.stats()["spilled_bytes"]
+    return held, spilled, elapsed / events * 1e6, events
+
+if __name__ == "__main__":
+    minutes = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    candidates = [
+        ("list of tuples", list, lambda event: event),
+        ("in-memory store", lambda: SegmentStore(spill_bytes=0), lambda event: f"{event[0]}::{event[1]}"),
+        ("spilling store", lambda: SegmentStore(spill_bytes=SPILL_BYTES), lambda event: f"{event[0]}::{event[1]}"),
+    ]
+    for name, store_factory, to_item in candidates:
+        held, spilled, microseconds, events = run(minutes, store_factory, to_item)
+        print(
+            f"📊 {name:>15}, {minutes} minute session ({events} events) | memory held: {held / 1024 / 1024:6.2f} MB"
+            f" | spilled: {spilled / 1024 / 1024:6.2f} MB"
+            f" | publish and read: {microseconds:5.2f}µs per event",
+            flush=True
+        )
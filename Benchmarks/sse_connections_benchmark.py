@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+sys.path.insert(0, ".")  # Run from the project root: python Benchmarks/sse_connections_benchmark.py [connections]
+
+from flask import Flask, Response, jsonify, request
+from fluent_edge_core.transcript_channel import TranscriptChannel, sse_message
+
+ROUNDS = 5  # Events published to every open stream
+
+def raise_file_limit():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def serve(transport, port):
+    """
+    Server process: one session whose channel every client subscribes to, served by the threaded
+    Werkzeug server (one thread per stream, as app.py) or by the asyncio transport.
+    """
+    raise_file_limit()
+    channel = TranscriptChannel()
+    session = type("Session", (), {"channel": channel})()
+    app = Flask(__name__)
+
+    @app.route("/transcription")
+    def transcription():
+        return Response((sse_message(event) for event in channel.subscribe(timeout=15)), mimetype="text/event-stream")
+
+    @app.route("/publish", methods=["POST"])
+    def publish():
+        channel.publish("LIVE", request.get_data(as_text=True))
+        return jsonify({"subscribers": channel.subscriber_count})
+
+    @app.route("/subscribers")
+    def subscribers():
+        return jsonify({"subscribers": channel.subscriber_count})
+
+    if transport == "asyncio":
+        from fluent_edge_core.async_transport import AsyncTransport
+        sessions = type("Sessions", (), {"get_session": lambda self, session_id: session})()
+        server = AsyncTransport(app, sessions)
+        server.start()
+        server.listen("127.0.0.1", port)
+        threading.Event().wait()  # The transport serves from its own thread until the process is killed
+    else:
+        from werkzeug.serving import make_server
+        server = make_server("127.0.0.1", port, app, threaded=True)
+        server.socket.listen(4096)
+        server.serve_forever()
+
+def process_status(pid):
+    """
+    :return: A tuple of (resident memory in KB, number of threads, CPU seconds used) of a process.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/status") as status_file:
+        for line in status_file:
+            name, _, value = line.partition(":")
+            fields[name] = value.split()
+    with open(f"/proc/{pid}/stat") as stat_file:
+        stat = stat_file.read().rsplit(")", 1)[1].split()
+    cpu_seconds = (int(stat[11]) + int(stat[12])) / os.sysconf("SC_CLK_TCK")  # User and system time
+    return int(fields["VmRSS"][0]), int(fields["Threads"][0]), cpu_seconds
+
+def get_json(port, path, data=None):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", data=data, timeout=30) as response:
+        return json.loads(response.read())
+
+async def measure(pid, port, connections):
+    streams = []
+    limit = asyncio.Semaphore(200)  # Connect in batches, not all at once
+
+    async def connect():
+        async with limit:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2 ** 16)
+            writer.write(b"GET /transcription?session_id=s HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            await reader.readuntil(b"\r\n\r\n")
+            streams.append((reader, writer))
+
+    rss_before, threads_before, _ = process_status(pid)
+    await asyncio.gather(*(connect() for _ in range(connections)))
+    while get_json(port, "/subscribers")["subscribers"] < connections:
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.5)
+    rss_after, threads_after, cpu_before = process_status(pid)
+
+    async def receive(reader, published):
+        line = b""
+        while b"data:" not in line:
+            line = await reader.readline()  # Chunked framing lines of the threaded server are skipped
+        return time.perf_counter() - published[0]
+
+    latencies = []
+    for round_number in range(ROUNDS):
+        published = [0.0]
+        receivers = [asyncio.ensure_future(receive(reader, published)) for reader, _ in streams]
+        await asyncio.sleep(0.1)
+        published[0] = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(None, get_json, port, "/publish", b"x" * 40)
+        times = await asyncio.gather(*receivers)
+        latencies.append((statistics.median(times), max(times)))
+    _, _, cpu_after = process_status(pid)
+    for _, writer in streams:
+        writer.close()
+    return {
+        "rss_per_connection_kb": (rss_after - rss_before) / connections,
+        "threads": threads_after - threads_before,
+        "median_ms": statistics.median(latency[0] for latency in latencies) * 1000,
+        "last_ms": statistics.median(latency[1] for latency in latencies) * 1000,
+        "cpu_ms_per_event": (cpu_after - cpu_before) / ROUNDS * 1000
+    }
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        serve(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+
+    raise_file_limit()
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    for port, transport in enumerate(("threads", "asyncio"), start=5890):
+        server = subprocess.Popen([sys.executable, __file__, "--serve", transport, str(port)], stderr=subprocess.DEVNULL)
+        try:
+            for _ in range(100):  # Wait until the server listens
+                try:
+                    get_json(port, "/subscribers")
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            result = asyncio.run(measure(server.pid, port, connections))
+        finally:
+            server.kill()
+            server.wait()
+        print(
+            f"📊 {transport:>7}, {connections} open streams | {result['rss_per_connection_kb']:6.1f} KB and "
+            f"{result['threads'] / connections:.2f} threads per stream | event delivered to half: {result['median_ms']:6.1f}ms, "
+            f"to all: {result['last_ms']:6.1f}ms | server CPU per event: {result['cpu_ms_per_event']:6.1f}ms",
+            flush=True
+        )
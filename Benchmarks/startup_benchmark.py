@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+# URL the Flask app listens on when started with `python app.py`
+BASE_URL = "http://127.0.0.1:5000"
+
+def wait_for(path, accept, timeout, process):
+    """
+    Polls a URL until accept(status, body) returns True.
+
+    :param path: The path to request, relative to BASE_URL.
+    :param accept: A function receiving the HTTP status code and the body.
+    :param timeout: Seconds to wait before giving up.
+    :param process: The server process; polling stops as soon as it exits.
+    :return: Tuple of (seconds waited, body of the accepted response), or (None, None) on timeout or exit.
+    """
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            return None, None  # The server exited (e.g., a start-up check failed)
+        try:
+            with urllib.request.urlopen(BASE_URL + path, timeout=1) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except OSError:
+            time.sleep(0.01)  # Not listening yet
+            continue
+        if accept(status, body):
+            return time.perf_counter() - started, body
+        time.sleep(0.01)
+    return None, None
+
+def measure(project_dir, timeout):
+    """
+    Starts the app from project_dir and measures how long it takes to listen and to be ready.
+    Works with versions without a /ready endpoint, which were ready as soon as they listened.
+
+    :param project_dir: The directory containing app.py.
+    :param timeout: Seconds to wait for each milestone.
+    :return: A dictionary with the measured times and the components report, if any.
+    """
+    env = dict(os.environ, BROWSER="true")  # Do not open a browser window
+    output = tempfile.TemporaryFile()  # The server's output, shown if it exits (a pipe could fill up and block it)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "app.py"], cwd=project_dir, env=env, stdout=output, stderr=subprocess.STDOUT
+    )
+
+    def exited():
+        output.seek(0)
+        last_lines = output.read().decode("utf-8", "replace").strip().splitlines()[-5:]
+        return {"error": f"app.py exited with code {process.returncode}:\n   " + "\n   ".join(last_lines)}
+
+    try:
+        listen_time, _ = wait_for("/", lambda status, body: True, timeout, process)
+        if listen_time is None:
+            return exited() if process.poll() is not None else {"error": "server did not start listening"}
+        listen_time = time.perf_counter() - started
+
+        ready_time, body = wait_for("/ready", lambda status, body: status in (200, 404), timeout, process)
+        if ready_time is None and process.poll() is not None:
+            return exited()
+        report = {}
+        if body:
+            try:
+                report = json.loads(body)
+            except ValueError:
+                report = {}  # An older version without the /ready endpoint
+        ready_time = time.perf_counter() - started if ready_time is not None else None
+        return {"listen": listen_time, "ready": ready_time, "report": report}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        output.close()
+
+if __name__ == "__main__":
+    # Usage: python Benchmarks/startup_benchmark.py [project_dir ...]
+    # Pass the directory of an older checkout as well to compare cold starts before and after.
+    project_dirs = sys.argv[1:] or ["."]
+    for project_dir in project_dirs:
+        result = measure(project_dir, timeout=300)
+        if "error" in result:
+            print(f"❌ {project_dir}: {result['error']}", flush=True)
+            continue
+        print(f"📊 {project_dir}: listening after {result['listen']:.2f}s, "
+              f"ready after {result['ready']:.2f}s" if result["ready"] is not None else
+              f"📊 {project_dir}: listening after {result['listen']:.2f}s, not ready within the timeout", flush=True)
+
+        components = result["report"].get("components", {})
+        durations = [c["duration"] for c in components.values() if c.get("duration") is not None]
+        for name, component in components.items():
+            print(f"   {name}: {component['status']} in {component['duration']}s", flush=True)
+        if durations:
+            print(f"   serial load time {sum(durations):.2f}s vs. parallel {max(durations):.2f}s", flush=True)
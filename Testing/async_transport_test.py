@@ -0,0 +1,129 @@
+import http.client
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+from flask import Flask, jsonify, request
+from fluent_edge_core import async_transport
+from fluent_edge_core.async_transport import AsyncTransport
+from fluent_edge_core.transcript_channel import TranscriptChannel
+
+class FakeSessions:
+    # Stands in for the SessionManager: session id -> object with a channel
+    def __init__(self):
+        self.sessions = {}
+
+    def get_session(self, session_id):
+        return self.sessions.get(session_id)
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return jsonify({"bytes": len(request.get_data()), "session_id": request.args.get("session_id")})
+
+    @app.route("/transcription")
+    def transcription():
+        return jsonify({"status": "Unknown session"}), 404
+
+    return app
+
+class AsyncTransportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sessions = FakeSessions()
+        self.transport = AsyncTransport(make_app(), self.sessions, keepalive=0.2)
+        self.transport.start()
+        self.port = self.transport.listen("127.0.0.1", 0).port
+
+    def tearDown(self):
+        self.transport.stop()
+
+    def add_session(self, session_id):
+        channel = TranscriptChannel()
+        self.sessions.sessions[session_id] = mock.Mock(channel=channel)
+        return channel
+
+    def open_stream(self, session_id):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        connection.request("GET", f"/transcription?session_id={session_id}")
+        return connection.getresponse()
+
+    def test_requests_are_passed_to_the_app_on_one_connection(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        for size in (0, 3200):
+            connection.request("POST", "/echo?session_id=abc", body=b"\0" * size)
+            response = connection.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(response.read(), b'{"bytes":%d,"session_id":"abc"}\n' % size)
+        connection.close()
+
+    def test_chunked_request_body(self):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        connection.request("POST", "/echo", body=iter([b"\0" * 100, b"\0" * 28]), encode_chunked=True)
+        self.assertIn(b'"bytes":128', connection.getresponse().read())
+
+    def test_stream_delivers_events_until_the_channel_closes(self):
+        channel = self.add_session("s1")
+        response = self.open_stream("s1")
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream; charset=utf-8")
+        channel.publish("LIVE", "hello")
+        self.assertEqual(response.readline(), b"data: LIVE::hello\n")
+        response.readline()  # Blank line ending the event
+        self.assertEqual(response.readline(), b": keep-alive\n")  # Idle stream
+        response.readline()
+        channel.publish("ACCURACY", "100%")
+        channel.close()
+        self.assertEqual(response.read(), b"data: ACCURACY::100%\n\n")  # The stream ends after the last event
+        time.sleep(0.05)
+        self.assertEqual(channel.subscriber_count, 0)
+
+    def test_open_streams_take_no_threads(self):
+        channel = self.add_session("s1")
+        threads = threading.active_count()
+        responses = [self.open_stream("s1") for _ in range(50)]
+        deadline = time.monotonic() + 5
+        while channel.subscriber_count < 50 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(channel.subscriber_count, 50)
+        self.assertEqual(threading.active_count(), threads)  # Every stream waits on the one event loop
+        channel.publish("ACCURACY", "90%")
+        channel.close()
+        for response in responses:
+            self.assertEqual(response.read(), b"data: ACCURACY::90%\n\n")
+
+    def test_streams_of_another_process_are_relayed(self):
+        channel = self.add_session("1-ab")
+        relay = AsyncTransport(make_app(), FakeSessions(), stream_owner=lambda session_id: ("127.0.0.1", self.port))
+        relay.start()
+        self.addCleanup(relay.stop)
+        connection = http.client.HTTPConnection("127.0.0.1", relay.listen("127.0.0.1", 0).port, timeout=5)
+        connection.request("GET", "/transcription?session_id=1-ab")
+        response = connection.getresponse()
+        self.assertEqual(response.getheader("Content-Type"), "text/event-stream; charset=utf-8")
+        channel.publish("LIVE", "hello")
+        self.assertEqual(response.readline(), b"data: LIVE::hello\n")  # Relayed as it is published
+        channel.close()
+        self.assertEqual(response.read(), b"\n")
+
+    def test_unknown_session_stream_is_answered_by_the_app(self):
+        response = self.open_stream("missing")
+        self.assertEqual(response.status, 404)
+
+    def test_bad_and_oversized_requests(self):
+        with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+            sock.sendall(b"garbage\r\n\r\n")
+            self.assertTrue(sock.recv(100).startswith(b"HTTP/1.1 400"))
+        for length in (b"abc", b"-5"):
+            with socket.create_connection(("127.0.0.1", self.port), timeout=5) as sock:
+                sock.sendall(b"POST /echo HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+                self.assertTrue(sock.recv(100).startswith(b"HTTP/1.1 400"))
+        with mock.patch.object(async_transport, "MAX_REQUEST_BYTES", 10):
+            connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+            connection.request("POST", "/echo", body=b"\0" * 11)
+            self.assertEqual(connection.getresponse().status, 413)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+import numpy as np
+from fluent_edge_core.audio_buffer import AudioRingBuffer
+from fluent_edge_core.audio_handler import make_audio_callback
+
+def samples(start, count):
+    return np.arange(start, start + count, dtype=np.int16).tobytes()
+
+class AudioRingBufferTest(unittest.TestCase):
+
+    def test_reads_are_views_of_the_ring(self):
+        buffer = AudioRingBuffer(capacity=10)
+        buffer.write(samples(0, 6))
+        view = buffer.read_view(4)
+        self.assertEqual(view.tolist(), [0, 1, 2, 3])
+        self.assertTrue(np.shares_memory(view, buffer.samples))  # No copy was made
+        self.assertFalse(view.flags.writeable)
+        buffer.advance(len(view))
+        self.assertEqual(buffer.available, 2)
+
+    def test_reads_wrap_around_in_contiguous_pieces(self):
+        buffer = AudioRingBuffer(capacity=10)
+        buffer.write(samples(0, 8))
+        buffer.advance(len(buffer.read_view(8)))
+        buffer.write(samples(8, 6))  # Written across the end of the ring
+        first = buffer.read_view(100)
+        self.assertEqual(first.tolist(), [8, 9])  # Stops at the end of the ring
+        buffer.advance(len(first))
+        self.assertEqual(buffer.read_view(100).tolist(), [10, 11, 12, 13])
+
+    def test_drop_oldest_keeps_newest_audio(self):
+        buffer = AudioRingBuffer(capacity=10, overflow="drop_oldest")
+        buffer.write(samples(0, 8))
+        buffer.write(samples(8, 5))
+        first = buffer.read_view(100)  # The three oldest frames were dropped
+        self.assertEqual(first.tolist(), list(range(3, 10)))
+        buffer.advance(len(first))
+        self.assertEqual(buffer.read_view(100).tolist(), [10, 11, 12])
+        stats = buffer.stats()
+        self.assertEqual((stats["overruns"], stats["dropped_frames"]), (1, 3))
+        self.assertEqual(stats["high_water"], 10)
+
+    def test_drop_oldest_never_overwrites_a_held_view(self):
+        buffer = AudioRingBuffer(capacity=10, overflow="drop_oldest")
+        buffer.write(samples(0, 10))
+        view = buffer.read_view(4)
+        buffer.write(samples(10, 2))  # No room, and the oldest audio is being read
+        self.assertEqual(view.tolist(), [0, 1, 2, 3])
+        self.assertEqual(buffer.stats()["dropped_frames"], 2)
+
+    def test_block_waits_for_the_reader(self):
+        buffer = AudioRingBuffer(capacity=10, overflow="block", block_timeout=1)
+        buffer.write(samples(0, 10))
+        writer = threading.Thread(target=buffer.write, args=(samples(10, 4),))
+        writer.start()
+        time.sleep(0.05)
+        self.assertTrue(writer.is_alive())  # Waiting for free space
+        buffer.advance(len(buffer.read_view(5)))
+        writer.join(timeout=1)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(buffer.available, 9)
+        self.assertEqual(buffer.stats()["dropped_frames"], 0)
+
+    def test_block_drops_after_timeout(self):
+        buffer = AudioRingBuffer(capacity=10, overflow="block", block_timeout=0.05)
+        buffer.write(samples(0, 10))
+        self.assertEqual(buffer.write(samples(10, 4)), 0)
+        self.assertEqual(buffer.stats()["dropped_frames"], 4)
+
+    def test_non_blocking_writes_drop_instead_of_waiting(self):
+        buffer = AudioRingBuffer(capacity=10, overflow="block", block_timeout=1)
+        buffer.write(samples(0, 8))
+        started = time.perf_counter()
+        self.assertEqual(buffer.write(samples(8, 4), block=False), 2)  # What fits is stored
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(buffer.stats()["dropped_frames"], 2)
+
+    def test_audio_callback_never_blocks(self):
+        buffer = AudioRingBuffer(capacity=10, overflow="block", block_timeout=1)
+        buffer.write(samples(0, 10))
+        callback = make_audio_callback(buffer)
+        started = time.perf_counter()
+        callback(samples(10, 4), 4, None, None)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual(buffer.stats()["dropped_frames"], 4)
+
+    def test_underruns_and_close(self):
+        buffer = AudioRingBuffer(capacity=10)
+        self.assertIsNone(buffer.read_view(4, timeout=0.01))
+        self.assertEqual(buffer.stats()["underruns"], 1)
+        buffer.write(samples(0, 3))
+        buffer.close()
+        self.assertEqual(buffer.write(samples(3, 3)), 0)  # Closed buffers take no more audio
+        self.assertEqual(buffer.read_view(10).tolist(), [0, 1, 2])  # Remaining audio can still be read
+        buffer.advance(3)
+        self.assertIsNone(buffer.read_view(10))
+
+    def test_memory_stays_constant(self):
+        buffer = AudioRingBuffer(capacity=16000)
+        for i in range(200):  # 50 seconds of audio written without reading
+            buffer.write(samples(0, 4000))
+        self.assertEqual(buffer.samples.nbytes, 32000)
+        self.assertEqual(buffer.available, 16000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+import wave
+import numpy as np
+from fluent_edge_core.audio_buffer import AudioRingBuffer
+from fluent_edge_core.audio_handler import make_audio_callback
+from fluent_edge_core.audio_ingest import AudioIngest, StreamingResampler, decode_pcm, read_wav_file
+
+def sine(rate, seconds, frequency=440, amplitude=10000):
+    t = np.arange(int(rate * seconds)) / rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+def resample_in_chunks(resampler, samples, chunk):
+    pieces = [resampler.process(samples[i:i + chunk]) for i in range(0, len(samples), chunk)]
+    return np.concatenate(pieces + [resampler.flush()])
+
+class StreamingResamplerTest(unittest.TestCase):
+
+    def test_common_rates_are_converted_accurately(self):
+        for rate in (8000, 22050, 44100, 48000):
+            output = resample_in_chunks(StreamingResampler(rate), sine(rate, 1).astype(np.float32), 1000)
+            self.assertEqual(len(output), 16000, rate)  # One second in, one second out
+            expected = sine(16000, 1)
+            self.assertLess(np.abs(output[100:-100] - expected[100:-100]).max(), 5, rate)  # No delay, no gain change
+
+    def test_frequencies_above_nyquist_are_removed(self):
+        output = resample_in_chunks(StreamingResampler(48000), sine(48000, 1, frequency=12000).astype(np.float32), 4800)
+        self.assertLess(np.abs(output[100:-100]).max(), 10)  # 12 kHz cannot be represented at 16 kHz
+
+    def test_chunk_size_does_not_change_the_output(self):
+        samples = np.random.default_rng(0).normal(0, 3000, 44100).astype(np.float32)
+        whole = resample_in_chunks(StreamingResampler(44100), samples, len(samples))
+        chunked = resample_in_chunks(StreamingResampler(44100), samples, 333)
+        self.assertTrue(np.allclose(whole, chunked, atol=0.05))
+
+class AudioIngestTest(unittest.TestCase):
+
+    def test_16khz_mono_passes_through_unchanged(self):
+        data = np.arange(100, dtype=np.int16).tobytes()
+        self.assertTrue(np.array_equal(AudioIngest(16000).process(data), np.arange(100)))
+
+    def test_stereo_is_mixed_down(self):
+        stereo = np.array([[1000, 3000], [-2000, 0]], dtype=np.int16).tobytes()
+        self.assertEqual(AudioIngest(16000, channels=2).process(stereo).tolist(), [2000, -1000])
+
+    def test_partial_frames_are_carried_over(self):
+        ingest = AudioIngest(16000, channels=2)
+        data = np.array([[100, 300], [500, 700]], dtype=np.int16).tobytes()
+        first = ingest.process(data[:5])  # Ends in the middle of the first frame
+        second = ingest.process(data[5:])
+        self.assertEqual(first.tolist() + second.tolist(), [200, 600])
+
+    def test_sample_widths(self):
+        self.assertEqual(decode_pcm(bytes([0, 128, 255]), 1).tolist(), [-32768, 0, 32512])
+        self.assertEqual(decode_pcm(b"\x00\x00\x80\x00\x00\x7f", 3).tolist(), [-32768, 32512])
+        self.assertEqual(decode_pcm(np.array([-2 ** 31], dtype=np.int32).tobytes(), 4).tolist(), [-32768])
+
+    def test_capture_at_48khz_reaches_the_buffer_at_16khz(self):
+        audio_buffer = AudioRingBuffer(capacity=32000)
+        callback = make_audio_callback(audio_buffer, AudioIngest(48000, channels=2))
+        samples = sine(48000, 1).astype(np.int16)
+        stereo = np.stack([samples, samples], axis=1)
+        for start in range(0, 48000, 12000):  # Blocks of a quarter second, as the device delivers them
+            callback(stereo[start:start + 12000].tobytes(), 12000, None, None)
+        self.assertGreater(audio_buffer.available, 15900)  # Minus the few samples still in the filter
+
+    def test_wav_file_is_streamed_as_16khz_mono(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stereo.wav")
+            samples = sine(44100, 2).astype(np.int16)
+            with wave.open(path, "wb") as wav_file:
+                wav_file.setnchannels(2)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(44100)
+                wav_file.writeframes(np.stack([samples, samples], axis=1).tobytes())
+            blocks = list(read_wav_file(path, block_frames=4410))
+        self.assertGreater(len(blocks), 10)  # Read a block at a time
+        self.assertEqual(sum(len(block) for block in blocks), 32000)
+        self.assertTrue(all(block.dtype == np.int16 for block in blocks))
+
+if __name__ == "__main__":
+    unittest.main()
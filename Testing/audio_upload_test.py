@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from unittest import mock
+from fluent_edge_core import session_manager as sm
+from fluent_edge_core.audio_buffer import AudioRingBuffer
+from fluent_edge_core.audio_ingest import AudioIngest
+
+class AudioUploadTest(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.object(sm.vosk, "KaldiRecognizer").start()
+        self.recording = mock.patch.object(sm, "start_recording").start()
+        self.addCleanup(mock.patch.stopall)
+        self.manager = sm.SessionManager(model=object())
+
+    def test_browser_session_does_not_open_the_microphone(self):
+        session = self.manager.create_session(source="browser")
+        with mock.patch.object(session.worker, "run", return_value=""):
+            self.assertTrue(session.start())
+        self.recording.assert_not_called()
+        self.assertEqual(session.stats()["source"], "browser")
+
+    def test_chunks_are_accepted_in_order(self):
+        session = self.manager.create_session(source="browser")
+        chunk = np.arange(1600, dtype=np.int16).tobytes()
+        self.assertEqual(session.push_audio(0, chunk), ("accepted", 1))
+        self.assertEqual(session.push_audio(0, chunk), ("duplicate", 1))  # A retried upload is not added twice
+        self.assertEqual(session.push_audio(2, chunk), ("out_of_order", 1))  # Chunk 1 is missing
+        self.assertEqual(session.push_audio(1, chunk), ("accepted", 2))
+        self.assertEqual(session.audio_buffer.available, 3200)
+        np.testing.assert_array_equal(session.audio_buffer.read_view(1600), np.arange(1600))
+
+    def test_full_buffer_refuses_chunks_instead_of_dropping_audio(self):
+        session = self.manager.create_session(source="browser")
+        session.audio_buffer = AudioRingBuffer(capacity=4000)
+        chunk = bytes(3200)  # 1600 frames
+        self.assertEqual(session.push_audio(0, chunk)[0], "accepted")
+        self.assertEqual(session.push_audio(1, chunk)[0], "accepted")
+        self.assertEqual(session.push_audio(2, chunk), ("busy", 2))  # Only 800 frames free
+        session.audio_buffer.read_view(1600)
+        session.audio_buffer.advance(1600)  # The recognizer caught up
+        self.assertEqual(session.push_audio(2, chunk), ("accepted", 3))
+        self.assertEqual(session.audio_buffer.stats()["dropped_frames"], 0)
+
+    def test_uploads_end_with_the_session(self):
+        server = self.manager.create_session()
+        self.assertEqual(server.push_audio(0, bytes(320))[0], "closed")  # Records the server's microphone
+        session = self.manager.create_session(source="browser")
+        session.stop()
+        self.assertEqual(session.push_audio(0, bytes(320))[0], "closed")
+
+    def test_uploaded_audio_is_resampled(self):
+        session = self.manager.create_session(source="browser", input_rate=48000)
+        session.push_audio(0, bytes(9600))  # 4800 frames at 48 kHz
+        self.assertAlmostEqual(session.audio_buffer.available, 1600, delta=32)
+
+    def test_ingest_predicts_its_output(self):
+        ingest = AudioIngest(44100)
+        for size in (882, 4410, 3, 17640, 1):
+            expected = ingest.output_frames(size)
+            self.assertEqual(len(ingest.process(bytes(size))), expected)
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            self.manager.create_session(source="telephone")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import unittest
+import wave
+from unittest import mock
+from fluent_edge_core import batch_transcriber
+
+class FakeRecognizer:
+    # Finishes an utterance on every block, like a recognizer fed with continuous speech
+    def __init__(self, model, sample_rate):
+        self.sample_rate = sample_rate
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        return True
+
+    def Result(self):
+        words = [{"word": word, "start": i * 0.1, "end": i * 0.1 + 0.08, "conf": 1.0} for i, word in enumerate("she go to school".split())]
+        return json.dumps({"text": "she go to school", "result": words})
+
+    def FinalResult(self):
+        return json.dumps({"text": ""})
+
+class FakeChecker:
+    def check_grammar(self, text):
+        return [{"message": "Use goes", "text_offset": 4, "length": 2}] if "go to" in text else []
+
+    def submit(self, text):
+        from concurrent.futures import Future
+        future = Future()
+        future.set_result(self.check_grammar(text))
+        return future
+
+def write_wav(path, frames, channels=1, sample_rate=16000):
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\0\1" * frames * channels)
+
+class BatchTranscriberTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = self.directory.name
+        os.makedirs(os.path.join(self.root, "week1"))
+        write_wav(os.path.join(self.root, "b.wav"), 8000)
+        write_wav(os.path.join(self.root, "week1", "a.wav"), 12000, sample_rate=8000)
+        write_wav(os.path.join(self.root, "stereo.wav"), 4000, channels=2, sample_rate=48000)
+        with open(os.path.join(self.root, "broken.wav"), "wb") as broken_file:
+            broken_file.write(b"not a wav file")
+        open(os.path.join(self.root, "notes.txt"), "w").close()
+
+        patches = [
+            mock.patch.object(batch_transcriber.vosk, "KaldiRecognizer", FakeRecognizer),
+            mock.patch.object(batch_transcriber, "get_model", return_value=object()),
+            mock.patch.object(batch_transcriber, "get_grammar_checker", return_value=FakeChecker())
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def test_directories_are_searched_for_wav_files(self):
+        files = [os.path.relpath(path, self.root) for path in batch_transcriber.find_wav_files([self.root])]
+        self.assertEqual(files, ["b.wav", "broken.wav", "stereo.wav", os.path.join("week1", "a.wav")])
+
+    def test_file_is_transcribed_and_graded(self):
+        result = batch_transcriber.transcribe_file(os.path.join(self.root, "week1", "a.wav"), vad=False)
+        self.assertEqual(result["duration"], 1.5)  # 12000 frames at 8 kHz
+        self.assertTrue(result["transcription"].startswith("She go to school"))
+        self.assertEqual(len(result["grammar_errors"]), 1)
+        self.assertLess(result["accuracy"], 100)
+        self.assertGreaterEqual(result["fluency"]["words"], 4)
+
+    def test_file_is_scored_against_a_reference(self):
+        result = batch_transcriber.transcribe_file(
+            os.path.join(self.root, "b.wav"), vad=False, reference="She goes to school."
+        )
+        self.assertEqual(result["reading"]["substitutions"], 1)  # "go" instead of "goes"
+        self.assertEqual(result["accuracy"], max(0, round(100 - result["reading"]["wer"] * 100, 2)))
+
+    def test_stereo_48khz_file_is_resampled(self):
+        result = batch_transcriber.transcribe_file(os.path.join(self.root, "stereo.wav"), vad=False)
+        self.assertAlmostEqual(result["duration"], 4000 / 48000, places=3)
+        self.assertIn("grammar_errors", result)
+
+    def test_unreadable_file_reports_an_error(self):
+        result = batch_transcriber.transcribe_file(os.path.join(self.root, "broken.wav"), vad=False)
+        self.assertIn("error", result)
+
+    def test_files_are_transcribed_on_a_given_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        paths = [os.path.join(self.root, "b.wav"), os.path.join(self.root, "broken.wav")]
+        with ThreadPoolExecutor(max_workers=2) as executor:  # Threads share the patched recognizer
+            results = list(batch_transcriber.transcribe_files(paths, vad=False, reference="she goes to school", executor=executor))
+        self.assertEqual([result["file"] for result in results], paths)
+        self.assertEqual(results[0]["reading"]["reference_words"], 4)  # Scored against the reference
+        self.assertIn("error", results[1])
+
+    def test_cli_writes_json_lines_in_order(self):
+        output = os.path.join(self.root, "results.jsonl")
+        status = batch_transcriber.main([self.root, "-o", output, "-w", "2", "--no-vad"])
+        with open(output) as results_file:
+            results = [json.loads(line) for line in results_file]
+        self.assertEqual(status, 1)  # The broken file failed
+        self.assertEqual(
+            [os.path.basename(result["file"]) for result in results], ["b.wav", "broken.wav", "stereo.wav", "a.wav"]
+        )
+        self.assertIn("error", results[1])
+        self.assertEqual(results[0]["grammar_errors"][0]["message"], "Use goes")
+
+if __name__ == "__main__":
+    unittest.main()
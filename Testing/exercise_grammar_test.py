@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from fluent_edge_core import exercise_grammar
+from fluent_edge_core.exercise_grammar import ExerciseGrammarCache, build_grammar, supports_grammar
+
+class ExerciseGrammarTest(unittest.TestCase):
+
+    def setUp(self):
+        patch = mock.patch.object(exercise_grammar.vosk, "KaldiRecognizer")
+        self.recognizer_class = patch.start()
+        self.recognizer_class.side_effect = lambda *args: mock.Mock(args=args)
+        self.addCleanup(patch.stop)
+        self.model = object()
+
+    def test_grammar_holds_sentences_words_and_unknown(self):
+        grammar = json.loads(build_grammar("The cat sat. The dog ran!"))
+        self.assertEqual(grammar[:2], ["the cat sat", "the dog ran"])
+        self.assertEqual(sorted(grammar[2:-1]), ["cat", "dog", "ran", "sat", "the"])
+        self.assertEqual(grammar[-1], "[unk]")
+
+    def test_recognizers_are_reused_per_exercise(self):
+        cache = ExerciseGrammarCache()
+        first, offset = cache.acquire(self.model, "The cat sat.")
+        self.assertEqual(first.args[1:], (16000, build_grammar("The cat sat.")))
+        self.assertEqual(offset, 0.0)  # A new recognizer
+        cache.release(self.model, "The cat sat.", first, decoded_seconds=12.5)
+        first.Reset.assert_called_once()
+
+        again, offset = cache.acquire(self.model, "the cat  sat")  # Same words, so the same exercise
+        other = cache.acquire(self.model, "The dog ran.")[0]
+        self.assertIs(again, first)
+        self.assertEqual(offset, 12.5)  # Vosk keeps counting word times from where the last session ended
+        self.assertIsNot(other, first)
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_old_exercises_are_evicted(self):
+        cache = ExerciseGrammarCache(max_exercises=1)
+        recognizer = cache.acquire(self.model, "first passage")[0]
+        cache.acquire(self.model, "second passage")
+        cache.release(self.model, "first passage", recognizer)  # Its exercise is gone, nothing is kept
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["idle_recognizers"], 0)
+
+    def test_grammar_support_depends_on_the_graph(self):
+        with tempfile.TemporaryDirectory() as model_path:
+            os.makedirs(os.path.join(model_path, "graph"))
+            open(os.path.join(model_path, "graph", "HCLG.fst"), "w").close()
+            self.assertFalse(supports_grammar(model_path))  # Large model with a static graph
+            for name in ("HCLr.fst", "Gr.fst"):
+                open(os.path.join(model_path, "graph", name), "w").close()
+            self.assertTrue(supports_grammar(model_path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import threading
+import unittest
+import numpy as np
+from unittest import mock
+from fluent_edge_core.fluency import WordTimings, fluency_metrics
+from fluent_edge_core.speech_recognizer import RecognitionWorker
+from fluent_edge_core.vad import VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+
+def tone(seconds):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+def silence(seconds):
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype=np.int16)
+
+class FakeRecognizer:
+    # Recognizes one word per utterance, spanning all the audio it was fed, with Vosk's clock
+    def __init__(self, time_offset=0.0):
+        self.fed = int(time_offset * SAMPLE_RATE)  # Vosk keeps counting from earlier sessions
+        self.utterance_start = self.fed
+
+    def SetWords(self, enabled):
+        self.words = enabled
+
+    def AcceptWaveform(self, data):
+        self.fed += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        if self.fed == self.utterance_start:
+            return json.dumps({"text": ""})
+        word = {"word": "hello", "start": self.utterance_start / SAMPLE_RATE, "end": self.fed / SAMPLE_RATE, "conf": 0.9}
+        self.utterance_start = self.fed
+        return json.dumps({"text": "hello", "result": [word]})
+
+class WordTimingsTest(unittest.TestCase):
+
+    def test_words_are_stored_in_compact_columns(self):
+        timings = WordTimings()
+        for i in range(1000):
+            timings.add(["the", "cat", "sat"][i % 3], i * 0.5, i * 0.5 + 0.3, 0.8)
+        self.assertEqual(len(timings), 1000)
+        self.assertEqual(timings.vocabulary, ["the", "cat", "sat"])  # Every distinct word is stored once
+        self.assertEqual(timings.nbytes(), 16 * 1000)
+        starts, ends, confidences, word_ids = timings.columns()
+        self.assertAlmostEqual(float(ends[10] - starts[10]), 0.3, places=5)
+        self.assertEqual(word_ids[:4].tolist(), [0, 1, 2, 0])
+
+class FluencyMetricsTest(unittest.TestCase):
+
+    def test_metrics(self):
+        timings = WordTimings()
+        words = [
+            ("i", 0.0, 0.2, 0.95), ("um", 0.3, 0.6, 0.9), ("like", 0.6, 0.9, 0.9),
+            ("reading", 1.5, 2.0, 0.3), ("books", 2.1, 2.5, 0.9), ("uh", 5.0, 5.3, 0.8), ("daily", 5.3, 6.0, 0.9)
+        ]
+        for word in words:
+            timings.add(*word)
+        metrics = fluency_metrics(timings, duration=12.0)
+
+        self.assertEqual(metrics["words"], 7)
+        self.assertEqual(metrics["speech_rate"], 25.0)  # 5 words without the fillers in 12 seconds
+        self.assertEqual(metrics["pauses"]["count"], 2)  # 0.6 s and 2.5 s; 0.1 s gaps are not pauses
+        self.assertAlmostEqual(metrics["pauses"]["longest"], 2.5, places=3)
+        self.assertEqual(metrics["pauses"]["histogram"], {"0.25-0.5s": 0, "0.5-1.0s": 1, "1.0-2.0s": 0, "2.0s+": 1})
+        self.assertAlmostEqual(metrics["articulation_rate"], round(5 / (6.0 - 3.1) * 60, 1), places=1)
+        self.assertEqual(metrics["fillers"]["count"], 2)
+        self.assertEqual(metrics["fillers"]["per_minute"], 10.0)
+        self.assertEqual(metrics["low_confidence"]["count"], 1)
+        self.assertEqual(metrics["low_confidence"]["words"][0]["word"], "reading")
+
+    def test_no_words(self):
+        metrics = fluency_metrics(WordTimings(), duration=3.0)
+        self.assertEqual(metrics["words"], 0)
+        self.assertEqual(metrics["speech_rate"], 0.0)
+        self.assertEqual(metrics["pauses"]["count"], 0)
+
+class WorkerWordTimesTest(unittest.TestCase):
+
+    def run_worker(self, audio, time_offset=0.0, vad=None):
+        rec = FakeRecognizer(time_offset)
+        worker = RecognitionWorker([], threading.Event(), mock.Mock(), rec, vad=vad, time_offset=time_offset)
+        for start in range(0, len(audio), 4000):
+            worker.feed(audio[start:start + 4000])
+        worker.flush()
+        self.assertTrue(rec.words)
+        return worker
+
+    def test_word_times_include_skipped_silence(self):
+        audio = np.concatenate([silence(1), tone(0.5), silence(3), tone(0.5), silence(1)])
+        worker = self.run_worker(audio, vad=VoiceActivityDetector(padding_ms=200, hangover_ms=300))
+        starts, ends = worker.timings.columns()[:2]
+        # Each word starts where its padded speech starts in the recording, not in the audio Kaldi heard
+        np.testing.assert_allclose(starts, [0.8, 4.3], atol=0.011)
+        np.testing.assert_allclose(ends, [1.8, 5.3], atol=0.011)
+        self.assertEqual(worker.duration, 6.0)
+        self.assertLess(worker.decoded_seconds, 3)  # The silence was never decoded
+
+    def test_reused_recognizer_times_are_shifted(self):
+        worker = self.run_worker(tone(1.0), time_offset=42.0)
+        starts, ends = worker.timings.columns()[:2]
+        np.testing.assert_allclose([starts[0], ends[0]], [0.0, 1.0], atol=1e-4)
+        self.assertAlmostEqual(worker.decoded_seconds, 43.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import time
+import unittest
+from fluent_edge_core.grammar_cache import GrammarCache
+
+ERRORS = [{"message": "Wrong verb form", "suggestions": ["goes"], "offset": 4, "length": 2, "rule_id": "AGREEMENT"}]
+
+class GrammarCacheTest(unittest.TestCase):
+
+    def test_hit_and_miss_counters(self):
+        cache = GrammarCache(path=None)
+        key = GrammarCache.make_key("She go to school.", "en-US")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, ERRORS)
+        self.assertEqual(cache.get(key), ERRORS)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_key_ignores_whitespace_but_not_language(self):
+        self.assertEqual(GrammarCache.make_key("She  go to school.", "en-US"), GrammarCache.make_key("She go to school.", "en-US"))
+        self.assertNotEqual(GrammarCache.make_key("She go to school.", "en-US"), GrammarCache.make_key("She go to school.", "en-GB"))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = GrammarCache(max_entries=2, path=None)
+        cache.put("a", [])
+        cache.put("b", [])
+        cache.get("a")  # "b" is now the least recently used entry
+        cache.put("c", [])
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), [])
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_dropped(self):
+        cache = GrammarCache(ttl=0.01, path=None)
+        cache.put("a", ERRORS)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_results_survive_a_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "grammar_cache.sqlite")
+            first_run = GrammarCache(path=path)
+            first_run.put("a", ERRORS)
+            first_run.db.close()
+            restarted = GrammarCache(path=path)  # A new process starts with an empty memory tier
+            self.assertEqual(restarted.get("a"), ERRORS)
+            self.assertEqual(restarted.stats()["persistent_hits"], 1)
+            restarted.db.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,8 @@
 import unittest
+from types import SimpleNamespace
+from unittest import mock
+from fluent_edge_core import grammar_checker as gc
+from fluent_edge_core import language_tool_pool
 from fluent_edge_core.grammar_checker import check_grammar  # Import your grammar checking function
 
 class GrammarTest(unittest.TestCase):
@@ -12,5 +16,61 @@ class GrammarTest(unittest.TestCase):
         errors = check_grammar(text)
         self.assertGreater(len(errors), 0)  # Errors should be found
 
+class FakeTool:
+    # Stands in for LanguageTool: flags every "go" and counts the requests it receives
+    def __init__(self):
+        self.calls = 0
+
+    def check(self, text):
+        self.calls += 1
+        matches = []
+        start = text.find(" go ")
+        while start != -1:
+            matches.append(SimpleNamespace(message="Wrong verb form", replacements=["goes"],
+                                           offset=start + 1, errorLength=2, ruleId="AGREEMENT"))
+            start = text.find(" go ", start + 1)
+        return matches
+
+class GrammarBatchTest(unittest.TestCase):
+    def test_cached_sentences_skip_languagetool(self):
+        checker, tool = self.make_checker(cache=gc.GrammarCache(path=None))
+        first = checker.check_grammar("she go to school. all is well.")
+        second = checker.check_grammar("all is well. she go to school.")
+        self.assertEqual(tool.calls, 1)  # Both sentences were answered from the cache the second time
+        self.assertEqual([e["message"] for e in first], [e["message"] for e in second])
+        self.assertEqual(second[0]["text_offset"], 17)  # Offsets follow the new position of the sentence
+
+    def make_checker(self, **kwargs):
+        tool = FakeTool()
+        with mock.patch.object(language_tool_pool.language_tool_python, "LanguageTool", return_value=tool):
+            return gc.GrammarChecker(**kwargs), tool
+
+    def test_batched_matches_per_sentence_results(self):
+        text = "she go to school. all is well. they go home."
+        batched, batched_tool = self.make_checker(batch=True)
+        single, single_tool = self.make_checker(batch=False)
+        self.assertEqual(batched.check_grammar(text), single.check_grammar(text))  # Same error dicts
+        self.assertEqual(batched_tool.calls, 1)  # One round-trip instead of one per sentence
+        self.assertEqual(single_tool.calls, 3)
+
+    def test_offsets_are_mapped_back_to_sentences(self):
+        text = "she go to school. they go home."
+        checker, _ = self.make_checker(batch=True)
+        errors = checker.check_grammar(text)
+        self.assertEqual([e["offset"] for e in errors], [4, 5])  # Relative to each sentence
+        self.assertEqual([text[e["text_offset"]:e["text_offset"] + e["length"]] for e in errors], ["go", "go"])
+
+    def test_large_texts_are_split_into_chunks(self):
+        text = " ".join(["they go home."] * 50)
+        checker, tool = self.make_checker(batch=True, max_batch_chars=100)
+        errors = checker.check_grammar(text)
+        self.assertEqual(len(errors), 50)
+        self.assertEqual(tool.calls, 8)  # Seven sentences fit in each 100 character request
+
+    def test_check_many_keeps_text_order(self):
+        checker, _ = self.make_checker()
+        results = checker.check_many(["she go to school.", "all is well.", "they go home."])
+        self.assertEqual([len(errors) for errors in results], [1, 0, 1])
+
 if __name__ == '__main__':
     unittest.main()
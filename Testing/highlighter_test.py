@@ -0,0 +1,57 @@
+import time
+import unittest
+from fluent_edge_core.highlighter import highlight_errors, error_spans
+
+def span(text, title=""):
+    return f"<span class='text-red-500 underline' title='{title}'>{text}</span>"
+
+class HighlighterTest(unittest.TestCase):
+
+    def test_highlights_only_the_error_position(self):
+        # The same word appears twice, only the occurrence at the offset is marked
+        text = "She go home and they go out."
+        errors = [{"text_offset": 4, "length": 2, "message": "Use goes"}]
+        self.assertEqual(highlight_errors(text, errors), f"She {span('go', 'Use goes')} home and they go out.")
+
+    def test_escapes_text_and_messages(self):
+        text = "a <b> & c"
+        errors = [{"text_offset": 2, "length": 3, "message": "Don't use \"<b>\""}]
+        self.assertEqual(
+            highlight_errors(text, errors),
+            f"a {span('&lt;b&gt;', 'Don&#x27;t use &quot;&lt;b&gt;&quot;')} &amp; c"
+        )
+
+    def test_overlapping_errors_are_merged(self):
+        text = "This are a sentences."
+        errors = [
+            {"text_offset": 5, "length": 3, "message": "Use is"},
+            {"text_offset": 0, "length": 8, "message": "Agreement"},
+            {"text_offset": 11, "length": 9, "message": "Use sentence"},
+        ]
+        self.assertEqual(error_spans(text, errors), [(0, 8, ["Agreement", "Use is"]), (11, 20, ["Use sentence"])])
+        self.assertEqual(highlight_errors(text, errors).count("<span"), 2)  # No nested spans
+
+    def test_invalid_offsets_are_ignored_or_clamped(self):
+        text = "Short text"
+        errors = [
+            {"message": "No offset", "length": 3},
+            {"text_offset": 2, "length": 0, "message": "Empty"},
+            {"text_offset": 6, "length": 50, "message": "Too long"},
+            {"text_offset": 40, "length": 2, "message": "Past the end"},
+        ]
+        self.assertEqual(highlight_errors(text, errors), f"Short {span('text', 'Too long')}")
+
+    def test_sentence_offset_is_used_without_text_offset(self):
+        self.assertEqual(highlight_errors("I has it", [{"offset": 2, "length": 3}]), f"I {span('has')} it")
+
+    def test_large_transcript(self):
+        # 20,000 words with an error on every other word render in one pass
+        text = " ".join(["word"] * 20000)
+        errors = [{"text_offset": i * 5, "length": 4, "message": "Error"} for i in range(0, 20000, 2)]
+        started = time.perf_counter()
+        highlighted = highlight_errors(text, errors)
+        self.assertLess(time.perf_counter() - started, 1.0)
+        self.assertEqual(highlighted.count("<span"), 10000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from fluent_edge_core.incremental_grammar import IncrementalGrammarChecker, remap_offsets
+from fluent_edge_core.transcript_channel import TranscriptChannel
+
+def fake_check(text):
+    # Reports every occurrence of "go" as an error
+    errors = []
+    start = text.find("go")
+    while start != -1:
+        errors.append({"sentence": text, "message": "Wrong verb form", "offset": start, "text_offset": start, "length": 2})
+        start = text.find("go", start + 1)
+    return errors
+
+class IncrementalGrammarTest(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.channel = TranscriptChannel()
+        self.checker = IncrementalGrammarChecker(self.channel, self.executor, fake_check)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_offsets_point_into_running_transcript(self):
+        self.checker.add_segment("She go to school")
+        self.checker.add_segment("They go home")
+        errors = self.checker.results()
+        transcript = self.checker.transcript()
+        self.assertEqual(transcript, "She go to school They go home")
+        self.assertEqual([transcript[e["text_offset"]:e["text_offset"] + e["length"]] for e in errors], ["go", "go"])
+        self.assertEqual([e["text_offset"] for e in errors], [4, 22])
+
+    def test_errors_are_published_per_utterance(self):
+        self.checker.add_segment("She go to school")
+        self.checker.add_segment("All is well")
+        self.checker.results()
+        self.channel.close()
+        events = list(self.channel.subscribe())
+        self.assertEqual([event_type for event_type, _ in events], ["GRAMMAR_ERRORS"])  # Clean utterances send nothing
+
+    def test_no_increment_follows_the_results(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_check(text):
+            started.set()
+            release.wait(1)
+            return fake_check(text)
+
+        checker = IncrementalGrammarChecker(self.channel, self.executor, slow_check)
+        checker.add_segment("She go to school")
+        started.wait(1)
+        self.assertEqual(checker.results(timeout=0), [])  # Still in flight at the stop
+        release.set()
+        self.executor.shutdown()
+        self.channel.close()
+        self.assertEqual(list(self.channel.subscribe()), [])  # Its errors arrive too late to be published
+
+    def test_remap_offsets_onto_punctuated_text(self):
+        errors = [{"text_offset": 22, "length": 2}]
+        remap_offsets(errors, "She go to school They go home", "She go to school. They go home.")
+        self.assertEqual(errors[0]["text_offset"], 23)
+
+if __name__ == "__main__":
+    unittest.main()
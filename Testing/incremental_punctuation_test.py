@@ -0,0 +1,68 @@
+import json
+import random
+import threading
+import unittest
+from unittest import mock
+from fluent_edge_core.punctuation_restorer import PunctuationRestorer, IncrementalPunctuator
+from fluent_edge_core.speech_recognizer import RecognitionWorker
+
+class IncrementalPunctuatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.restorer = PunctuationRestorer()
+
+    def punctuate(self, utterances):
+        punctuator = IncrementalPunctuator(self.restorer)
+        parts = [punctuator.add(utterance) for utterance in utterances] + [punctuator.finish()]
+        return " ".join(part for part in parts if part), punctuator
+
+    def test_matches_whole_text_restoration(self):
+        # Random transcripts made of the words the rules react to, split into random utterances
+        rules = self.restorer.rules
+        words = sorted(rules.sentence_starters | rules.question_words | rules.non_ending_words) + \
+            ["school", "yesterday", "really", "happy", "is", "done.", "What"]
+        rng = random.Random(7)
+        for _ in range(2000):
+            transcript = [rng.choice(words) for _ in range(rng.randint(0, 25))]
+            utterances = []
+            while transcript[len(" ".join(utterances).split()):]:
+                start = len(" ".join(utterances).split())
+                utterances.append(" ".join(transcript[start:start + rng.randint(1, 6)]))
+            expected = self.restorer.restore_punctuation(" ".join(transcript))
+            result, punctuator = self.punctuate(utterances)
+            self.assertEqual(result, expected)
+            self.assertEqual(" ".join(punctuator.take_sentences()), expected)  # Sentences cover the whole text
+
+    def test_words_are_punctuated_while_speaking(self):
+        punctuator = IncrementalPunctuator(self.restorer)
+        self.assertEqual(punctuator.add("i went to school yesterday"), "I went to school")
+        self.assertEqual(punctuator.add("they played football"), "yesterday. They played")
+        self.assertEqual(punctuator.take_sentences(), ["I went to school yesterday."])
+        self.assertEqual(punctuator.finish(), "football.")
+        self.assertEqual(punctuator.take_sentences(), ["They played football."])
+
+    def test_conjunction_waits_for_the_following_word(self):
+        punctuator = IncrementalPunctuator(self.restorer)
+        self.assertEqual(punctuator.add("we went there with and"), "We went there")  # "with" may need a comma
+        self.assertEqual(punctuator.add("without them"), "with, and without")
+
+    def test_worker_publishes_punctuated_segments(self):
+        rec = mock.Mock()
+        rec.AcceptWaveform.return_value = True
+        rec.Result.side_effect = [json.dumps({"text": "i went to school yesterday"}),
+                                  json.dumps({"text": "they played football"})]
+        channel, sentences, transcription = mock.Mock(), [], []
+        worker = RecognitionWorker(transcription, threading.Event(), mock.Mock(), rec, channel=channel,
+                                   on_segment=sentences.append)
+        worker.feed(b"\0" * 8000)
+        worker.feed(b"\0" * 8000)
+        final_text = worker.finish()
+
+        self.assertEqual(final_text, "I went to school yesterday. They played football.")
+        self.assertEqual(transcription, [final_text])
+        live = [call.args[1] for call in channel.publish.call_args_list if call.args[0] == "LIVE"]
+        self.assertEqual(" ".join(live), final_text)
+        self.assertEqual(sentences, ["I went to school yesterday.", "They played football."])
+
+if __name__ == "__main__":
+    unittest.main()
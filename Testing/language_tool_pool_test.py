@@ -0,0 +1,65 @@
+import threading
+import unittest
+from unittest import mock
+from fluent_edge_core import language_tool_pool
+from fluent_edge_core.language_tool_pool import LanguageToolPool
+
+class FakeTool:
+    # Stands in for one LanguageTool server
+    def __init__(self, fail=False, release=None):
+        self.fail = fail
+        self.release = release  # Event the check waits on, to keep a request in flight
+        self.texts = []
+
+    def check(self, text):
+        if self.fail:
+            raise ConnectionError("server down")
+        if self.release:
+            self.release.wait(1)
+        self.texts.append(text)
+        return []
+
+class LanguageToolPoolTest(unittest.TestCase):
+    def make_pool(self, tools, **kwargs):
+        with mock.patch.object(language_tool_pool.language_tool_python, "LanguageTool", side_effect=tools):
+            return LanguageToolPool(instances=len(tools), health_check_interval=0, **kwargs)
+
+    def test_requests_are_spread_over_backends(self):
+        tools = [FakeTool(), FakeTool()]
+        pool = self.make_pool(tools, dispatch="round_robin")
+        for _ in range(4):
+            pool.check("Hello.")
+        self.assertEqual([len(tool.texts) for tool in tools], [2, 2])
+
+    def test_least_busy_backend_is_chosen(self):
+        release = threading.Event()
+        tools = [FakeTool(release=release), FakeTool()]
+        pool = self.make_pool(tools)
+        busy = threading.Thread(target=pool.check, args=("Slow request.",))
+        busy.start()
+        while not any(backend.in_flight for backend in pool.backends):
+            pass  # Wait until the slow request occupies a backend
+        pool.check("Fast request.")
+        release.set()
+        busy.join(timeout=1)
+        idle = [tool for tool in tools if "Fast request." in tool.texts]
+        self.assertEqual(len(idle), 1)
+        self.assertNotIn("Slow request.", idle[0].texts)  # The free backend served the second request
+
+    def test_failed_backend_is_skipped(self):
+        tools = [FakeTool(fail=True), FakeTool()]
+        pool = self.make_pool(tools, dispatch="round_robin")
+        for _ in range(3):
+            self.assertEqual(pool.check("Hello."), [])  # Retried on the healthy backend
+        self.assertFalse(pool.backends[0].healthy)
+        self.assertEqual(len(tools[1].texts), 3)
+
+    def test_health_check_restores_backend(self):
+        tools = [FakeTool(fail=True)]
+        pool = self.make_pool(tools)
+        self.assertEqual(pool.health_check(), 0)
+        tools[0].fail = False
+        self.assertEqual(pool.health_check(), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+from fluent_edge_core import metrics
+from fluent_edge_core.metrics import MetricsRegistry
+from fluent_edge_core.speech_recognizer import RecognitionWorker
+
+class MetricsRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counters_and_gauges(self):
+        requests = self.registry.counter("requests_total", "Requests served.", labelnames=("route",))
+        requests.labels("/start").inc()
+        requests.labels("/start").inc(2)
+        requests.labels("/stop").inc()
+        depth = self.registry.gauge("queue_depth", "Items waiting.")
+        depth.set_function(lambda: 7)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE requests_total counter", text)
+        self.assertIn('requests_total{route="/start"} 3', text)
+        self.assertIn('requests_total{route="/stop"} 1', text)
+        self.assertIn("queue_depth 7", text)  # Read when the metrics are rendered
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            latency.observe(value)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{le="0.1"} 2', text)  # Upper bounds are inclusive
+        self.assertIn('latency_seconds_bucket{le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4', text)
+        self.assertIn("latency_seconds_count 4", text)
+        self.assertIn("latency_seconds_sum 3.65", text)
+
+    def test_label_values_are_escaped(self):
+        errors = self.registry.counter("errors_total", "Errors.", labelnames=("message",))
+        errors.labels('say "hi"\n').inc()
+        self.assertIn('errors_total{message="say \\"hi\\"\\n"} 1', self.registry.render())
+
+    def test_worker_metrics_are_merged_with_a_worker_label(self):
+        requests = self.registry.counter("requests_total", "Requests served.", labelnames=("route",))
+        requests.labels("/start").inc()
+        self.registry.gauge("queue_depth", "Items waiting.").set(2)
+        text = metrics.merge_metrics({"0": self.registry.render(), "1": self.registry.render(), "2": None})
+        self.assertEqual(text.count("# TYPE requests_total counter"), 1)  # Each metric is described once
+        self.assertIn('requests_total{worker="0",route="/start"} 1', text)
+        self.assertIn('requests_total{worker="1",route="/start"} 1', text)
+        self.assertIn('queue_depth{worker="1"} 2', text)
+        self.assertIn('fluent_edge_worker_up{worker="1"} 1', text)
+        self.assertIn('fluent_edge_worker_up{worker="2"} 0', text)  # Unreachable
+
+    def test_names_and_labels_are_checked(self):
+        self.registry.counter("events_total", "Events.")
+        with self.assertRaises(ValueError):
+            self.registry.gauge("events_total", "Events again.")
+        with self.assertRaises(ValueError):
+            self.registry.histogram("stage_seconds", "Stages.", labelnames=("stage",)).labels()
+
+    def test_recording_is_cheap(self):
+        latency = self.registry.histogram("fast_seconds", "Fast.")
+        started = time.perf_counter()
+        for _ in range(100000):
+            latency.observe(0.003)
+        self.assertLess((time.perf_counter() - started) / 100000, 20e-6)  # Well under the 250 ms of an audio block
+
+class WorkerMetricsTest(unittest.TestCase):
+
+    def test_worker_records_real_time_factor_and_caption_latency(self):
+        rec = mock.Mock()
+        rec.AcceptWaveform.return_value = True
+        rec.Result.return_value = json.dumps({"text": "hello there"})
+        captions = sum(metrics.caption_latency.counts)
+        seconds = metrics.audio_seconds.value
+        before = sum(metrics.real_time_factor.counts)
+
+        worker = RecognitionWorker([], threading.Event(), mock.Mock(), rec)
+        worker.feed(b"\0" * 8000)  # A quarter of a second
+
+        self.assertEqual(sum(metrics.real_time_factor.counts), before + 1)
+        self.assertEqual(sum(metrics.caption_latency.counts), captions + 1)
+        self.assertAlmostEqual(metrics.audio_seconds.value - seconds, 0.25)
+        self.assertIn("fluent_edge_stage_seconds_count{stage=\"punctuation\"}", metrics.registry.render())
+
+if __name__ == "__main__":
+    unittest.main()
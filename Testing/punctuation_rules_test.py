@@ -0,0 +1,47 @@
+import json
+import os
+import tempfile
+import unittest
+from fluent_edge_core.punctuation_restorer import (
+    PunctuationRestorer, PunctuationRules, IncrementalPunctuator, load_punctuation_rules
+)
+
+class PunctuationRulesTest(unittest.TestCase):
+
+    def test_default_rules_are_english(self):
+        rules = load_punctuation_rules("")
+        self.assertIn("because", rules.sentence_starters)
+        self.assertIsInstance(rules.question_words, frozenset)
+        self.assertEqual(PunctuationRestorer(rules).restore_punctuation("so tell me what time now please"),
+                         "So tell me what time now? Please.")  # The question rule looks two words back
+
+    def test_rules_are_loaded_from_a_file(self):
+        # A German rule table; keys that are left out keep their English defaults
+        table = {"sentence_starters": ["Ich", "wir", "und"], "question_words": ["wie", "was"],
+                 "non_ending_words": ["der", "die", "das"], "conjunctions": ["und", "aber"]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "de.json")
+            with open(path, "w", encoding="utf-8") as rules_file:
+                json.dump(table, rules_file)
+            restorer = PunctuationRestorer(load_punctuation_rules(path))
+
+        self.assertIn("ich", restorer.rules.sentence_starters)  # Lowercased when compiled
+        self.assertEqual(restorer.rules.min_sentence_words, 4)
+        text = "heute gehen wir nach hause ich koche das essen"
+        self.assertEqual(restorer.restore_punctuation(text), "Heute gehen wir nach hause. Ich koche das essen.")
+
+    def test_thresholds_change_the_register(self):
+        # Shorter sentences, e.g. for beginners' speech
+        restorer = PunctuationRestorer(PunctuationRules({"min_sentence_words": 2}))
+        self.assertEqual(restorer.restore_punctuation("good morning they are fine"), "Good morning. They are fine.")
+        punctuator = IncrementalPunctuator(restorer)
+        self.assertEqual(punctuator.add("good morning they"), "Good morning.")
+        self.assertEqual(punctuator.add("are fine"), "They are")
+        self.assertEqual(punctuator.finish(), "fine.")
+
+    def test_unknown_keys_are_rejected(self):
+        with self.assertRaises(ValueError):
+            PunctuationRules({"sentence_starter": ["i"]})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,7 @@
 import unittest
-from fluent_edge_core.punctuation_restorer import restore_punctuation
+from fluent_edge_core.punctuation_restorer import PunctuationRestorer
+
+restore_punctuation = PunctuationRestorer().restore_punctuation
 
 class TestPunctuationRestorer(unittest.TestCase):
 
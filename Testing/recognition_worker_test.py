@@ -0,0 +1,122 @@
+import json
+import numpy as np
+import queue
+import threading
+import time
+import unittest
+from unittest import mock
+from fluent_edge_core.audio_buffer import AudioRingBuffer
+from fluent_edge_core.speech_recognizer import RecognitionWorker
+from fluent_edge_core.transcript_channel import TranscriptChannel
+from fluent_edge_core.vad import VoiceActivityDetector
+
+class RecognitionWorkerTest(unittest.TestCase):
+
+    def setUp(self):
+        # Recognizer that finishes an utterance on every block it receives
+        self.rec = mock.Mock()
+        self.rec.AcceptWaveform.return_value = True
+        self.rec.Result.return_value = json.dumps({"text": "hello there"})
+        self.rec.FinalResult.return_value = json.dumps({"text": ""})  # Nothing left at the stop
+        self.audio_queue = queue.Queue()
+        self.transcription = []
+        self.worker = RecognitionWorker(self.transcription, threading.Event(), self.audio_queue, self.rec)
+        self.thread = threading.Thread(target=self.worker.run, daemon=True)
+
+    def test_stop_wakes_idle_worker(self):
+        self.thread.start()
+        time.sleep(0.05)
+        started = time.perf_counter()
+        self.worker.stop()
+        self.thread.join(timeout=1)
+        self.assertFalse(self.thread.is_alive())
+        self.assertLess(time.perf_counter() - started, 0.2)  # Woken by the stop signal, not the timeout
+
+    def test_idle_worker_uses_no_cpu(self):
+        self.thread.start()
+        time.sleep(0.3)  # Nothing arrives on the audio queue
+        self.worker.stop()
+        self.thread.join(timeout=1)
+        self.assertLess(self.worker.cpu_time, 0.05)
+
+    def test_audio_is_transcribed(self):
+        self.thread.start()
+        self.audio_queue.put(b"\0" * 8000)
+        time.sleep(0.1)  # Let the worker pick up the block before stopping
+        self.worker.stop()
+        self.thread.join(timeout=1)
+        self.assertEqual(self.transcription, ["Hello there."])  # Final, punctuated transcription
+
+    def test_ring_buffer_audio_is_passed_without_copies(self):
+        audio_buffer = AudioRingBuffer(capacity=16000)
+        sizes = []
+        self.rec.AcceptWaveform.side_effect = lambda data: sizes.append(len(data)) or True
+        worker = RecognitionWorker(self.transcription, threading.Event(), audio_buffer, self.rec)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        audio_buffer.write(b"\0" * 10000)  # 5000 frames, read as blocks of at most 4000
+        time.sleep(0.1)
+        worker.stop()
+        thread.join(timeout=1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(sizes, [8000, 2000])  # Sizes in bytes, as Vosk reads them
+        self.assertEqual(audio_buffer.available, 0)  # Every view was released
+
+    def test_vad_skips_silence_and_ends_utterances(self):
+        self.rec.AcceptWaveform.return_value = False  # Kaldi would never end the utterance by itself
+        self.rec.FinalResult.side_effect = [json.dumps({"text": "hello there"}), json.dumps({"text": ""})]
+        vad = VoiceActivityDetector(endpoint_silence=0.5)
+        worker = RecognitionWorker(self.transcription, threading.Event(), self.audio_queue, self.rec, vad=vad)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        self.audio_queue.put(np.full(4000, 8000, dtype=np.int16).tobytes())  # Speech
+        for _ in range(4):
+            self.audio_queue.put(bytes(8000))  # One second of silence
+        time.sleep(0.1)
+        worker.stop()
+        thread.join(timeout=1)
+        self.assertEqual(self.rec.FinalResult.call_count, 2)  # At the endpoint, and at the stop
+        self.assertGreater(vad.stats()["skipped_fraction"], 0.5)
+
+    def test_buffered_audio_is_recognized_after_the_stop(self):
+        self.rec.AcceptWaveform.return_value = False  # The utterance is still in progress at the stop
+        self.rec.FinalResult.return_value = json.dumps({"text": "last words"})
+        for _ in range(5):
+            self.audio_queue.put(b"\0" * 8000)
+        self.worker.stop()  # Before the worker has read any of it
+        self.worker.run()
+        self.assertEqual(self.rec.AcceptWaveform.call_count, 5)
+        self.assertEqual(self.transcription, ["Last words."])
+        self.assertEqual(self.worker.drained_samples, 20000)
+        self.assertEqual(self.worker.discarded_samples, 0)
+
+    def test_drain_is_bounded(self):
+        audio_buffer = AudioRingBuffer(capacity=160000)
+        self.rec.AcceptWaveform.side_effect = lambda data: time.sleep(0.05)  # A slow recognizer, far behind
+        worker = RecognitionWorker(self.transcription, threading.Event(), audio_buffer, self.rec)
+        audio_buffer.write(bytes(320000))  # Ten seconds of audio
+        worker.stop()
+        started = time.perf_counter()
+        worker.run(drain_timeout=0.1)
+        self.assertLess(time.perf_counter() - started, 0.3)  # The timeout plus at most one block
+        self.assertGreater(worker.discarded_samples, 0)
+        self.assertEqual(worker.drained_samples + worker.discarded_samples, 160000)
+        self.assertEqual(audio_buffer.available, 0)
+
+    def test_partial_results_are_deduplicated(self):
+        self.rec.AcceptWaveform.return_value = False
+        self.rec.PartialResult.return_value = json.dumps({"partial": "hello"})
+        channel = TranscriptChannel()
+        worker = RecognitionWorker([], threading.Event(), self.audio_queue, self.rec, channel, partial_results=True)
+        thread = threading.Thread(target=worker.run, daemon=True)
+        thread.start()
+        for _ in range(5):
+            self.audio_queue.put(b"\0" * 8000)
+            time.sleep(0.25)  # Longer than the partial result interval
+        worker.stop()
+        thread.join(timeout=1)
+        channel.close()
+        self.assertEqual(list(channel.subscribe()), [("PARTIAL", "Hello")])  # Unchanged partials are sent once
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import wave
+import numpy as np
+from unittest import mock
+from werkzeug.serving import make_server
+import app as fluent_edge_app  # The Flask app, served on a local port for the replayed sessions
+from fluent_edge_core import session_manager as sm
+from fluent_edge_core.replay_client import ReplayClient
+
+class FakeRecognizer:
+    # Hears "hello world" in the audio it is given, which it never ends by itself
+    def __init__(self, model, sample_rate, *grammar):
+        self.frames = 0
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.frames += len(data) // 2
+        return False  # The words are only returned by FinalResult when the session stops
+
+    def Result(self):
+        return self.FinalResult()
+
+    def PartialResult(self):
+        return json.dumps({"partial": "hello"})
+
+    def FinalResult(self):
+        heard, self.frames = self.frames, 0
+        return json.dumps({"text": "hello world" if heard else ""})
+
+class ReplayClientTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = make_server("127.0.0.1", 0, fluent_edge_app.app, threaded=True)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        mock.patch.object(sm.vosk, "KaldiRecognizer", FakeRecognizer).start()
+        mock.patch.object(sm.session_manager, "model", object()).start()
+        mock.patch.object(fluent_edge_app, "model_unavailable", return_value=None).start()
+        self.addCleanup(mock.patch.stopall)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_wav(self, name, seconds, sample_rate=16000):
+        path = os.path.join(self.directory.name, name)
+        t = np.arange(int(sample_rate * seconds)) / sample_rate
+        with wave.open(path, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes((8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes())
+        return path
+
+    def test_recording_is_replayed_like_a_browser(self):
+        result = ReplayClient(self.url).replay(self.write_wav("speech.wav", 1.0, sample_rate=44100))
+        self.assertTrue(result["events"]["FULL_TRANSCRIPTION"].startswith("Hello world"))
+        self.assertEqual(result["duration"], 1.0)
+        session = sm.session_manager.get_session(result["session_id"])
+        self.assertEqual(session.stats()["chunks_received"], 10)  # 100 ms per chunk
+
+    def test_concurrent_clients_get_separate_sessions(self):
+        paths = [self.write_wav(f"learner{i}.wav", 0.5) for i in range(3)]
+        results = [None] * len(paths)
+
+        def replay(index):
+            results[index] = ReplayClient(self.url, realtime=False).replay(paths[index])
+
+        threads = [threading.Thread(target=replay, args=(i,)) for i in range(len(paths))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertEqual(len({result["session_id"] for result in results}), 3)
+
+    def test_upload_errors(self):
+        client = ReplayClient(self.url)
+        client.start()
+        self.assertEqual(client._request(f"/audio?session_id={client.session_id}&seq=0", b"\0\0\0")[0], 400)  # Odd size
+        self.assertEqual(client._request(f"/audio?session_id={client.session_id}&seq=5", b"\0\0")[0], 409)
+        self.assertEqual(client._request("/audio?session_id=unknown&seq=0", b"\0\0")[0], 404)
+        client.stop()
+        self.assertEqual(client._request(f"/audio?session_id={client.session_id}&seq=0", b"\0\0")[0], 410)
+
+    def test_busy_answer_gives_the_delay_in_the_body_and_the_header(self):
+        client = ReplayClient(self.url)
+        client.start()
+        session = sm.session_manager.get_session(client.session_id)
+        with mock.patch.object(session, "push_audio", return_value=("busy", 0)):
+            response = fluent_edge_app.app.test_client().post(f"/audio?session_id={client.session_id}&seq=0", data=b"\0" * 3200)
+        client.stop()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.get_json()["retry_after"], 0.1)  # 100 ms of audio
+        self.assertEqual(response.headers["Retry-After"], "1")  # The same delay, rounded up to whole seconds
+
+if __name__ == "__main__":
+    unittest.main()
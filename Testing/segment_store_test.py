@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from fluent_edge_core.segment_store import SegmentStore
+
+class SegmentStoreTest(unittest.TestCase):
+
+    def test_behaves_like_the_list_it_replaces(self):
+        store = SegmentStore(chunk_size=4)
+        items = [f"segment {i} é" for i in range(10)]  # Two sealed chunks and an open one, non-ASCII included
+        for item in items:
+            store.append(item)
+        self.assertEqual(len(store), 10)
+        self.assertEqual(list(store), items)
+        self.assertEqual(" ".join(store), " ".join(items))
+        self.assertEqual(store.text(", "), ", ".join(items))
+        store.clear()
+        self.assertEqual(list(store), [])
+        self.assertFalse(store)
+
+    def test_read_returns_only_items_after_the_cursor(self):
+        store = SegmentStore(chunk_size=4)
+        items = [str(i) for i in range(11)]
+        for item in items:
+            store.append(item)
+        for cursor in range(12):
+            self.assertEqual(store.read(cursor), items[cursor:])
+        self.assertEqual(store.read(3, limit=2), ["3", "4"])
+        self.assertEqual(store.read(11), [])
+
+    def test_sealed_chunks_are_compacted(self):
+        store = SegmentStore(chunk_size=4, spill_bytes=0)
+        for item in ("a", "bb", "ccc", "", "tail"):
+            store.append(item)
+        stats = store.stats()
+        self.assertEqual(stats["chunks"], 2)
+        self.assertEqual(stats["memory_bytes"], 6 + 5 * 4)  # Six bytes of text and five offsets
+        self.assertEqual(stats["spilled_bytes"], 0)
+        self.assertEqual(store.read(2), ["ccc", "", "tail"])
+
+    def test_old_chunks_spill_to_disk_and_memory_stays_bounded(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            store = SegmentStore(chunk_size=16, spill_bytes=2048, spill_dir=spill_dir)
+            items = [f"caption number {i} of a very long lecture" for i in range(5000)]
+            for item in items:
+                store.append(item)
+                self.assertLessEqual(store.stats()["memory_bytes"], 2048)
+            self.assertGreater(store.stats()["spilled_bytes"], 100000)
+            self.assertEqual(store.read(4990), items[4990:])
+            self.assertEqual(store.read(7, limit=3), items[7:10])  # Read back from the spill file
+            self.assertEqual(list(store), items)
+            self.assertEqual(os.listdir(spill_dir), [])  # The spill file is already unlinked
+            store.clear()
+            self.assertIsNone(store.spill_file)
+            self.assertEqual(store.stats()["spilled_bytes"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
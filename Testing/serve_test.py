@@ -0,0 +1,87 @@
+import socket
+import threading
+import unittest
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+from fluent_edge_core.metrics import MetricsRegistry
+from serve import combine_metrics, owner_of, route_sessions, stream_owner
+
+def make_app(registry=None):
+    # A stand-in for the app of a worker: echoes uploads, streams two events and renders its metrics
+    app = Flask(__name__)
+    registry = registry or MetricsRegistry()
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), mimetype="text/plain")
+
+    @app.route("/audio", methods=["POST"])
+    def audio():
+        return jsonify({"bytes": len(request.get_data()), "seq": request.args.get("seq"), "port": request.host})
+
+    @app.route("/transcription")
+    def transcription():
+        return Response(iter(["data: LIVE::hello\n\n", "data: DONE::{}\n\n"]), mimetype="text/event-stream")
+
+    return app
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class SessionRoutingTest(unittest.TestCase):
+
+    def setUp(self):
+        # Worker 0 of three; worker 1 listens on its private port, worker 2 is down
+        self.owner_registry = MetricsRegistry()
+        self.owner_registry.counter("sessions_total", "Sessions.").inc(3)
+        self.owner = make_server("127.0.0.1", 0, make_app(self.owner_registry), threaded=True)
+        threading.Thread(target=self.owner.serve_forever, daemon=True).start()
+        self.addCleanup(self.owner.shutdown)
+        self.ports = [free_port(), self.owner.server_port, free_port()]
+        self.registry = MetricsRegistry()
+        self.registry.counter("sessions_total", "Sessions.").inc()
+        self.app = make_app(self.registry)
+        route_sessions(self.app, 0, self.ports)
+        combine_metrics(self.app, 0, self.ports, self.registry)
+        self.client = self.app.test_client()
+
+    def test_owner_of(self):
+        self.assertEqual(owner_of("2-9f86d081884c7d65"), 2)
+        self.assertIsNone(owner_of("9f86d081884c7d65"))  # Created by the single-process server
+        self.assertIsNone(owner_of(None))
+
+    def test_own_sessions_are_served(self):
+        response = self.client.post("/audio?session_id=0-ab&seq=0", data=b"\0\0")
+        self.assertEqual(response.get_json()["port"], "localhost")  # Answered by this worker
+
+    def test_other_sessions_are_forwarded_to_their_worker(self):
+        response = self.client.post("/audio?session_id=1-ab&seq=4", data=b"\0" * 3200)
+        self.assertEqual(response.status_code, 200)  # No redirect: the client stays on the shared port
+        self.assertEqual(response.get_json(), {"bytes": 3200, "seq": "4", "port": f"127.0.0.1:{self.ports[1]}"})
+
+    def test_event_streams_are_relayed(self):
+        response = self.client.get("/transcription?session_id=1-ab")
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertEqual(response.get_data(), b"data: LIVE::hello\n\ndata: DONE::{}\n\n")
+
+    def test_unreachable_worker(self):
+        response = self.client.post("/audio?session_id=2-ab&seq=0", data=b"\0\0")
+        self.assertEqual(response.status_code, 502)
+
+    def test_metrics_of_every_worker_are_combined(self):
+        text = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn('sessions_total{worker="0"} 1', text)
+        self.assertIn('sessions_total{worker="1"} 3', text)  # Read from its private port
+        self.assertIn('fluent_edge_worker_up{worker="2"} 0', text)
+        self.assertEqual(self.client.get("/metrics?local=1").get_data(as_text=True), self.registry.render())
+
+    def test_stream_owner(self):
+        owner_address = stream_owner(0, self.ports)
+        self.assertEqual(owner_address("1-ab"), ("127.0.0.1", self.ports[1]))
+        self.assertIsNone(owner_address("0-ab"))
+        self.assertIsNone(owner_address("ab"))
+
+if __name__ == "__main__":
+    unittest.main()
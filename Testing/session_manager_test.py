@@ -0,0 +1,135 @@
+import json
+import time
+import unittest
+import numpy as np
+from unittest import mock
+from fluent_edge_core import session_manager as sm
+
+class UnfinishedUtteranceRecognizer:
+    # Never finds the end of an utterance by itself; only FinalResult returns what was heard
+    def __init__(self, model, sample_rate, *grammar):
+        self.frames = 0
+
+    def SetWords(self, enabled):
+        pass
+
+    def AcceptWaveform(self, data):
+        self.frames += len(data) // 2
+        return False
+
+    def FinalResult(self):
+        heard, self.frames = self.frames, 0
+        return json.dumps({"text": "the last words" if heard else ""})
+
+class SessionManagerTest(unittest.TestCase):
+
+    def setUp(self):
+        # Avoid building real Kaldi recognizers or opening the microphone
+        self.recognizer_patch = mock.patch.object(sm.vosk, "KaldiRecognizer")
+        self.recording_patch = mock.patch.object(sm, "start_recording", return_value=mock.Mock())
+        self.stop_patch = mock.patch.object(sm, "stop_recording")
+        self.recognizer_patch.start()
+        self.recording_patch.start()
+        self.stop_patch.start()
+        self.manager = sm.SessionManager(model=object(), max_sessions=2, retention=0)
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_sessions_have_separate_state(self):
+        first = self.manager.create_session()
+        second = self.manager.create_session()
+        self.assertNotEqual(first.session_id, second.session_id)
+        self.assertIsNot(first.audio_buffer, second.audio_buffer)  # Each session owns its audio buffer
+        self.assertIsNot(first.full_transcription, second.full_transcription)
+        self.assertIsNot(first.stop_event, second.stop_event)
+
+    def test_session_limit(self):
+        self.manager.create_session()
+        self.manager.create_session()
+        with self.assertRaises(sm.SessionLimitError):
+            self.manager.create_session()  # A third concurrent session is refused
+
+    def test_stopped_session_frees_a_slot(self):
+        first = self.manager.create_session()
+        self.manager.create_session()
+        first.stop()
+        session = self.manager.create_session()  # The stopped session no longer counts
+        self.assertIsNotNone(self.manager.get_session(session.session_id))
+        self.assertIsNone(self.manager.get_session(first.session_id))  # Pruned after its retention period
+
+    def test_remove_session(self):
+        session = self.manager.create_session()
+        self.manager.remove_session(session.session_id)
+        self.assertIsNone(self.manager.get_session(session.session_id))
+        self.assertTrue(session.stop_event.is_set())
+
+    def test_session_ids_carry_the_prefix(self):
+        self.manager.id_prefix = "3-"
+        self.assertTrue(self.manager.create_session().session_id.startswith("3-"))
+
+    def test_idle_browser_sessions_are_stopped(self):
+        browser = self.manager.create_session(source="browser")
+        server = self.manager.create_session()
+        browser.push_audio(0, b"\0\0")
+        self.assertEqual(self.manager.stop_idle_sessions(), 0)  # Still uploading
+        browser.last_upload = server.last_upload = time.monotonic() - self.manager.upload_timeout - 1
+        self.assertEqual(self.manager.stop_idle_sessions(), 1)  # The client went away
+        self.assertTrue(browser.stop_event.is_set())
+        self.assertFalse(server.stop_event.is_set())  # Recording the server's microphone needs no uploads
+
+    def test_drain_stops_sessions_and_refuses_new_ones(self):
+        session = self.manager.create_session()
+        self.assertTrue(self.manager.drain(timeout=1))
+        self.assertTrue(session.stop_event.is_set())
+        with self.assertRaises(sm.SessionLimitError):
+            self.manager.create_session()  # The server is shutting down
+
+    def test_stop_keeps_the_last_words_and_ends_with_done(self):
+        with mock.patch.object(sm.vosk, "KaldiRecognizer", UnfinishedUtteranceRecognizer):
+            session = self.manager.create_session(source="browser")
+        session.grammar = mock.Mock()
+        session.grammar.results.return_value = []
+        session.grammar.transcript.return_value = ""
+        session.start()
+        tone = (8000 * np.sin(np.arange(1600) * 0.1)).astype(np.int16).tobytes()  # Speech for the VAD
+        for seq in range(10):
+            session.push_audio(seq, tone)
+        session.stop()  # Audio may still be buffered, and the utterance has no endpoint
+        events = list(session.channel.subscribe(timeout=5))
+
+        self.assertEqual(dict(events)["FULL_TRANSCRIPTION"], "The last words.")
+        self.assertEqual(events[-1][0], "DONE")  # The explicit end of the results
+        done = json.loads(events[-1][1])
+        self.assertLess(done["stop_latency"], sm.RESULT_GRAMMAR_TIMEOUT)
+        self.assertEqual(done["discarded_audio"], 0)
+
+    def test_reading_session_is_scored_against_the_reference(self):
+        session = self.manager.create_session(reference="The cat sat on the mat.")
+        session.grammar = mock.Mock()
+        session.grammar.results.return_value = []
+        session.grammar.transcript.return_value = "The cat sat on a mat."
+        session.channel = mock.Mock()
+        session._publish_results("The cat sat on a mat.")
+
+        events = {call.args[0]: call.args[1] for call in session.channel.publish.call_args_list}
+        score = json.loads(events["READING_SCORE"])
+        self.assertEqual(score["substitutions"], 1)
+        self.assertIn("<span", score["highlighted_reference"])  # "the" before "mat" is marked in the passage
+        self.assertEqual(events["ACCURACY"], f"{round(100 - 100 / 6, 2)}%")
+        self.assertEqual(json.loads(events["FLUENCY"])["words"], 0)  # No word timings were recognized
+
+    def test_constrained_session_uses_the_exercise_grammar(self):
+        with mock.patch.object(sm, "supports_grammar", return_value=True), \
+                mock.patch.object(sm, "exercise_grammars") as grammars:
+            grammars.acquire.return_value = (mock.Mock(), 3.0)
+            session = self.manager.create_session(reference="Read this passage.", constrained=True)
+            free = self.manager.create_session(constrained=True)  # Nothing to restrict the vocabulary to
+        grammars.acquire.assert_called_once_with(self.manager.model, "Read this passage.", 16000)
+        self.assertIs(session.recognizer, grammars.acquire.return_value[0])
+        self.assertEqual(session.worker.time_offset, 3.0)
+        self.assertTrue(session.stats()["constrained"])
+        self.assertFalse(free.constrained)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import threading
+import time
+import unittest
+from fluent_edge_core.transcript_channel import TranscriptChannel, sse_message
+
+class TranscriptChannelTest(unittest.TestCase):
+
+    def test_subscriber_receives_events_in_order(self):
+        channel = TranscriptChannel()
+        channel.publish("LIVE", "hello")
+        channel.publish("LIVE", "world")
+        channel.close()
+        self.assertEqual(list(channel.subscribe()), [("LIVE", "hello"), ("LIVE", "world")])
+
+    def test_several_viewers_see_the_same_session(self):
+        channel = TranscriptChannel()
+        received = [[], []]
+
+        def watch(index):
+            for event in channel.subscribe():
+                received[index].append(event)
+
+        viewers = [threading.Thread(target=watch, args=(i,)) for i in range(2)]
+        for viewer in viewers:
+            viewer.start()
+        channel.publish("LIVE", "one")
+        channel.publish("ACCURACY", "100%")
+        channel.close()
+        for viewer in viewers:
+            viewer.join(timeout=1)
+        self.assertEqual(received[0], [("LIVE", "one"), ("ACCURACY", "100%")])
+        self.assertEqual(received[0], received[1])
+
+    def test_events_are_delivered_without_polling_delay(self):
+        channel = TranscriptChannel()
+        subscription = channel.subscribe()
+        delivered = []
+
+        def watch():
+            event = next(subscription)
+            delivered.append((event, time.perf_counter()))
+
+        viewer = threading.Thread(target=watch)
+        viewer.start()
+        time.sleep(0.05)
+        published_at = time.perf_counter()
+        channel.publish("LIVE", "fast")
+        viewer.join(timeout=1)
+        self.assertEqual(delivered[0][0], ("LIVE", "fast"))
+        self.assertLess(delivered[0][1] - published_at, 0.05)
+
+    def test_idle_timeout_yields_keepalive(self):
+        channel = TranscriptChannel()
+        subscription = channel.subscribe(timeout=0.01)
+        self.assertIsNone(next(subscription))  # Nothing published yet
+        channel.close()
+        self.assertEqual(list(subscription), [])
+
+    def test_watchers_are_notified_and_read_from_a_cursor(self):
+        channel = TranscriptChannel()
+        calls = []
+        channel.watch(lambda: calls.append(1))
+        self.assertEqual(channel.subscriber_count, 1)
+        channel.publish("LIVE", "one")
+        channel.publish("LIVE", "two")
+        channel.close()
+        self.assertEqual(len(calls), 3)  # Two events and the close
+        self.assertEqual(channel.read(1), ([("LIVE", "two")], True))
+
+    def test_long_session_history_for_late_subscribers(self):
+        channel = TranscriptChannel()
+        for i in range(2000):  # Many sealed chunks of the event store
+            channel.publish("LIVE", f"caption {i}")
+        channel.publish("GRAMMAR_ERRORS", '[{"message": "a::b"}]')  # Payloads may contain the separator
+        channel.close()
+        events = list(channel.subscribe())
+        self.assertEqual(len(events), 2001)
+        self.assertEqual(events[1999], ("LIVE", "caption 1999"))
+        self.assertEqual(events[-1], ("GRAMMAR_ERRORS", '[{"message": "a::b"}]'))
+
+    def test_sse_message(self):
+        self.assertEqual(sse_message(("ACCURACY", "95%")), "data: ACCURACY::95%\n\n")
+        self.assertEqual(sse_message(None), ": keep-alive\n\n")
+
+if __name__ == "__main__":
+    unittest.main()
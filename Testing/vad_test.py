@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from fluent_edge_core.vad import VoiceActivityDetector, ENDPOINT
+
+SAMPLE_RATE = 16000
+
+def tone(seconds):
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+
+def silence(seconds):
+    return np.random.default_rng(0).normal(0, 30, int(SAMPLE_RATE * seconds)).astype(np.int16)
+
+def run(vad, audio, block=4000):
+    pieces = []
+    for start in range(0, len(audio), block):
+        pieces.extend(vad.process(audio[start:start + block]))
+    return pieces
+
+class VoiceActivityDetectorTest(unittest.TestCase):
+
+    def test_silence_is_skipped(self):
+        vad = VoiceActivityDetector()
+        self.assertEqual(run(vad, silence(3)), [])
+        self.assertEqual(vad.stats()["skipped_fraction"], 1.0)
+
+    def test_speech_is_passed_with_padding_and_hangover(self):
+        vad = VoiceActivityDetector(padding_ms=200, hangover_ms=300)
+        audio = np.concatenate([silence(1), tone(0.5), silence(1.5)])
+        pieces = run(vad, audio)
+        self.assertIs(pieces[-1], ENDPOINT)  # The long pause ends the utterance
+        passed = np.concatenate(pieces[:-1])
+        self.assertEqual(len(passed), 3200 + 8000 + 4800)  # 200 ms before, the speech, 300 ms after
+        self.assertTrue(np.array_equal(passed, audio[16000 - 3200:24000 + 4800]))  # In order, nothing altered
+        self.assertEqual(vad.stats()["endpoints"], 1)
+
+    def test_short_pauses_do_not_end_the_utterance(self):
+        vad = VoiceActivityDetector(endpoint_silence=1.0)
+        audio = np.concatenate([tone(0.5), silence(0.6), tone(0.5), silence(0.2)])
+        self.assertFalse(any(piece is ENDPOINT for piece in run(vad, audio)))
+
+    def test_quiet_fricatives_count_as_speech(self):
+        # White noise well below the energy threshold, but with many zero crossings
+        noise = np.random.default_rng(1).normal(0, 120, SAMPLE_RATE).astype(np.int16)
+        self.assertTrue(run(VoiceActivityDetector(threshold_db=-45), noise))
+
+    def test_blocks_not_aligned_to_frames(self):
+        vad = VoiceActivityDetector()
+        audio = np.concatenate([silence(0.5), tone(0.5), silence(0.5)])
+        pieces = run(vad, audio, block=1234)
+        self.assertEqual(sum(len(piece) for piece in pieces if piece is not ENDPOINT), vad.stats()["speech_samples"])
+        self.assertLess(vad.stats()["skipped_fraction"], 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
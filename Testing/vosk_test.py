@@ -1,8 +1,7 @@
 import unittest
-from fluent_edge_core.audio_handler import transcribe_audio  # Adjust import according to your project structure
+from fluent_edge_core.audio_ingest import read_wav_file  # Streams WAV files as 16 kHz mono audio
 from vosk import Model, KaldiRecognizer
 import os
-import wave
 
 class VoskTest(unittest.TestCase):
     
@@ -31,25 +30,18 @@ class VoskTest(unittest.TestCase):
         if not os.path.exists(audio_path):
             self.fail(f"Test audio file does not exist: {audio_path}")
 
-        # Open the audio file for reading
-        with wave.open(audio_path, "rb") as wf:
-            if wf.getframerate() != 16000:
-                self.fail(f"Audio file must have a 16kHz sample rate, but got {wf.getframerate()}Hz.")
-            
-            recognizer = self.recognizer
-            result = ''
-            while True:
-                data = wf.readframes(4000)
-                if len(data) == 0:
-                    break
-                if recognizer.AcceptWaveform(data):
-                    result += recognizer.Result()
-                else:
-                    result += recognizer.PartialResult()
-
-            # Final result (end of speech)
-            result += recognizer.FinalResult()
-            return result
+        # Read the audio file in blocks, converted to 16kHz mono whatever its sample rate and channels
+        recognizer = self.recognizer
+        result = ''
+        for data in read_wav_file(audio_path):
+            if recognizer.AcceptWaveform(data.tobytes()):
+                result += recognizer.Result()
+            else:
+                result += recognizer.PartialResult()
+
+        # Final result (end of speech)
+        result += recognizer.FinalResult()
+        return result
 
     def test_invalid_audio_file(self):
         # Test handling of an invalid audio file
@@ -0,0 +1,41 @@
+import time
+import unittest
+from fluent_edge_core.warmup import WarmupTracker
+
+def wait_until_loaded(tracker, timeout=2):
+    # Polls the tracker until no component is still loading
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(c["status"] != "loading" for c in tracker.report()["components"].values()):
+            return
+        time.sleep(0.01)
+
+class WarmupTest(unittest.TestCase):
+
+    def test_components_load_in_parallel(self):
+        tracker = WarmupTracker()
+        started = time.perf_counter()
+        tracker.start("first", lambda: time.sleep(0.2))
+        tracker.start("second", lambda: time.sleep(0.2))
+        self.assertFalse(tracker.is_ready())  # Loading happens in the background
+        wait_until_loaded(tracker)
+        self.assertTrue(tracker.is_ready())
+        self.assertLess(time.perf_counter() - started, 0.35)  # Not the 0.4 seconds of a serial start-up
+
+    def test_failures_are_reported(self):
+        tracker = WarmupTracker()
+
+        def broken():
+            raise RuntimeError("model missing")
+
+        tracker.start("vosk_model", broken)
+        wait_until_loaded(tracker)
+        report = tracker.report()
+        self.assertFalse(report["ready"])
+        self.assertEqual(report["components"]["vosk_model"]["status"], "failed")
+        self.assertEqual(report["components"]["vosk_model"]["error"], "model missing")
+        self.assertEqual(tracker.status_of("vosk_model"), "failed")
+        self.assertIsNone(tracker.status_of("language_tool"))  # Not being warmed up
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import random
+import time
+import unittest
+from unittest import mock
+from fluent_edge_core import word_alignment
+from fluent_edge_core.accuracy_checker import calculate_reference_accuracy
+from fluent_edge_core.word_alignment import align_words, compare_to_reference, reference_error_spans, tokenize_words
+
+def edit_distance(reference, hypothesis):
+    # Textbook dynamic programming, used to check the banded NumPy version
+    previous = list(range(len(hypothesis) + 1))
+    for i in range(1, len(reference) + 1):
+        current = [i] + [0] * len(hypothesis)
+        for j in range(1, len(hypothesis) + 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (reference[i - 1] != hypothesis[j - 1]))
+        previous = current
+    return previous[-1]
+
+class WordAlignmentTest(unittest.TestCase):
+
+    def test_words_are_normalized(self):
+        words, spans = tokenize_words("The cat's hat, 'really'!")
+        self.assertEqual(words, ["the", "cat's", "hat", "really"])
+        self.assertEqual(spans[2], (10, 13))
+
+    def test_alignment_is_optimal_with_a_narrow_band(self):
+        rng = random.Random(5)
+        for _ in range(500):
+            vocabulary = "abcd"[:rng.randint(1, 4)]
+            reference = [rng.choice(vocabulary) for _ in range(rng.randint(0, 30))]
+            hypothesis = [rng.choice(vocabulary) for _ in range(rng.randint(0, 30))]
+            operations = align_words(reference, hypothesis, band=1)  # Widened whenever it matters
+            self.assertEqual(sum(op != "match" for op, _, _ in operations), edit_distance(reference, hypothesis))
+            self.assertEqual([r for _, r, _ in operations if r is not None], list(range(len(reference))))
+            self.assertEqual([h for _, _, h in operations if h is not None], list(range(len(hypothesis))))
+
+    def test_comparison_reports_spans_in_both_texts(self):
+        reference = "The quick brown fox jumps over the lazy dog."
+        text = "The quick fox jumped over the very lazy dog."
+        comparison = compare_to_reference(reference, text)
+        self.assertEqual(
+            (comparison["substitutions"], comparison["deletions"], comparison["insertions"]), (1, 1, 1)
+        )
+        self.assertEqual(comparison["wer"], round(3 / 9, 4))
+        errors = {error["type"]: error for error in comparison["errors"]}
+        self.assertEqual(reference[errors["deletion"]["reference_offset"]:][:5], "brown")
+        self.assertIsNone(errors["deletion"]["text_offset"])
+        substitution = errors["substitution"]
+        self.assertEqual(text[substitution["text_offset"]:substitution["text_offset"] + substitution["length"]], "jumped")
+        self.assertEqual(text[errors["insertion"]["text_offset"]:][:4], "very")
+        self.assertEqual(len(reference_error_spans(comparison)), 2)  # The extra word is not in the reference
+        self.assertEqual(calculate_reference_accuracy(comparison), 66.67)
+
+    def test_long_passage_is_fast(self):
+        rng = random.Random(1)
+        reference = [f"word{rng.randint(0, 500)}" for _ in range(5000)]
+        hypothesis = []
+        for word in reference:  # About 10% misread or missed words
+            chance = rng.random()
+            if chance < 0.05:
+                hypothesis.append("um")  # Misread
+            elif chance >= 0.1:
+                hypothesis.append(word)  # Read correctly, otherwise missed
+        started = time.perf_counter()
+        comparison = compare_to_reference(" ".join(reference), " ".join(hypothesis))
+        self.assertLess(time.perf_counter() - started, 2.0)
+        self.assertEqual(comparison["reference_words"], 5000)
+        self.assertLess(comparison["wer"], 0.2)
+
+    def test_reading_with_many_errors_is_aligned_in_one_pass(self):
+        rng = random.Random(2)
+        reference = [f"word{rng.randint(0, 500)}" for _ in range(2000)]
+        hypothesis = ["um" if rng.random() < 0.15 else word for word in reference]  # 15% misread
+        with mock.patch.object(word_alignment, "_banded_alignment", wraps=word_alignment._banded_alignment) as passes:
+            operations = align_words(reference, hypothesis)
+        self.assertEqual(passes.call_count, 1)  # The band grows with the passage, so it holds without widening
+        self.assertEqual(sum(op != "match" for op, _, _ in operations), hypothesis.count("um"))
+
+    def test_empty_texts(self):
+        self.assertEqual(compare_to_reference("", "")["wer"], 0.0)
+        self.assertEqual(compare_to_reference("Read this.", "")["deletions"], 2)
+        self.assertEqual(calculate_reference_accuracy(compare_to_reference("", "hello")), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,40 +3,43 @@
 # Import necessary functions for checking libraries and model paths
 from fluent_edge_core.startup_checker import check_library, check_model_path
 
-# Check libraries required for the project
+# Check libraries required for the project (they are located, not imported, to keep start-up fast)
 check_library("flask")  # Verifies if Flask is installed
 check_library("flask_cors")  # Verifies if Flask CORS is installed
-check_library("sounddevice")  # Verifies if SoundDevice library is installed
+check_library("sounddevice", required=False)  # Only needed to record the server's own microphone
 check_library("language_tool_python")  # Verifies if LanguageTool for grammar checking is installed
 
 # Check the path for the Vosk model, used for speech recognition
 check_model_path("model/Indian English/vosk-model-en-in-0.5", "Vosk Model")
 
 # Import other necessary modules
+import math
 import os
+import signal
 import sys
-import json
+import tempfile
 import threading
-import time
 import webbrowser
 from flask import Flask, Response, render_template, jsonify, request  # Flask-related imports for the web app
 from flask_cors import CORS  # Flask-CORS for enabling Cross-Origin Resource Sharing (CORS)
-from fluent_edge_core.audio_handler import start_recording, stop_recording  # Audio handling functions
-from fluent_edge_core.speech_recognizer import transcribe_audio  # Function for transcribing audio
-from fluent_edge_core.grammar_checker import check_grammar  # Function for checking grammar
-from fluent_edge_core.accuracy_checker import calculate_accuracy  # Function for calculating accuracy
+from fluent_edge_core.session_manager import session_manager, SessionLimitError, AUDIO_SOURCE  # Per-session recording and transcription
+from fluent_edge_core.grammar_checker import grammar_cache, get_grammar_checker  # Grammar result cache and LanguageTool pool
+from fluent_edge_core.warmup import warmup, start_warmup  # Background loading of the Vosk model and LanguageTool
+from fluent_edge_core.batch_transcriber import transcribe_files, transcribe_executor  # Pooled transcription of recorded files
+from fluent_edge_core.exercise_grammar import exercise_grammars  # Grammar-constrained recognizers of reading exercises
+from fluent_edge_core.metrics import registry, CONTENT_TYPE  # Counters, gauges and latency histograms
+from fluent_edge_core.transcript_channel import sse_message, SSE_KEEPALIVE_INTERVAL  # Server-Sent Events formatting
+
+# Largest audio chunk a client may upload in one request (10 seconds of 48 kHz int16 audio)
+MAX_AUDIO_CHUNK_BYTES = 960000
+
+# Sample rates accepted for uploaded audio
+UPLOAD_SAMPLE_RATES = range(8000, 192001)
 
 # Initialize Flask app
 app = Flask(__name__)  # Create a Flask app instance
 CORS(app)  # Enable CORS for the app to allow cross-origin requests
 
-# Global variables
-full_transcription = []  # Stores the entire transcription
-stop_recording_flag = threading.Event()  # Event to signal stopping the recording
-transcription_thread = None  # Thread for transcribing audio in the background
-stream = None  # Audio stream for recording
-transcription_lock = threading.Lock()  # Lock to manage access to transcription data
-
 # Serve the main HTML page
 @app.route('/')
 def index():
@@ -45,92 +48,164 @@ def index():
         return "ERROR: 'index.html' not found.", 404  # Return error response
     return render_template("index.html")  # Render the HTML page
 
-# Start Listening API (initiates audio recording)
-@app.route('/start', methods=['GET'])
+# Returns an error response while the Vosk model is not usable, otherwise None
+def model_unavailable():
+    model_status = warmup.status_of("vosk_model")
+    if model_status == "loading":  # The model is still being loaded in the background
+        return jsonify({"status": "Starting up, please try again shortly"}), 503
+    if model_status == "failed":
+        return jsonify({"status": "Speech model unavailable"}), 500
+    return None
+
+# Start Listening API (initiates audio recording for a new session)
+# A POST with a JSON body ({"partials": true, "reference": "...", "constrained": true}) takes the same options as the query string.
+# With "source": "browser" the client uploads the audio itself to /audio (mono int16 at "sample_rate", 16000 by default).
+@app.route('/start', methods=['GET', 'POST'])
 def start_listening():
-    global transcription_thread, stream
-    if transcription_thread and transcription_thread.is_alive():  # Check if recording is already in progress
-        print("⚠️ Already recording!", flush=True)  # Inform user that recording is already happening
-        return jsonify({"status": "Already running"}), 400  # Return error response
-    
-    with transcription_lock:  # Acquire lock to safely access transcription data
-        full_transcription.clear()  # Clear the existing transcription
-
-    stop_recording_flag.clear()  # Reset the stop recording flag
-    stream = start_recording()  # Start recording audio
-    if not stream:  # Check if the recording failed
+    unavailable = model_unavailable()
+    if unavailable:
+        return unavailable
+
+    try:
+        options = request.get_json(silent=True) or request.values
+        partial_results = str(options.get("partials", "")).lower() in ("1", "true", "yes")  # Opt-in partial captions
+        reference = options.get("reference")  # Passage to read aloud, for reading practice
+        constrained = str(options.get("constrained", "")).lower() in ("1", "true", "yes")  # Recognize only its words
+        source = options.get("source") or AUDIO_SOURCE  # Server microphone or audio uploaded by the client
+        input_rate = int(options.get("sample_rate") or 16000)
+        if input_rate not in UPLOAD_SAMPLE_RATES:
+            raise ValueError(f"Unsupported sample rate: {input_rate}.")
+        session = session_manager.create_session(
+            partial_results, reference, constrained, source, input_rate
+        )  # Each caller gets its own session
+    except SessionLimitError as e:
+        print(f"⚠️ {e}", flush=True)  # Inform that the server is at capacity
+        return jsonify({"status": "Too many active sessions"}), 503  # Return error response
+    except ValueError as e:
+        return jsonify({"status": str(e)}), 400  # Unknown audio source or sample rate
+
+    if not session.start():  # Start recording and transcribing for the session
+        session_manager.remove_session(session.session_id)
         print("❌ Failed to start recording!", flush=True)
         return jsonify({"status": "Recording failed"}), 500  # Return error response if recording failed
 
-    # Start a new thread for transcribing audio
-    transcription_thread = threading.Thread(
-        target=lambda: transcribe_audio(full_transcription, stop_recording_flag),
-        daemon=True  # Set thread as a daemon to terminate when the main program ends
-    )
-    transcription_thread.start()  # Start the transcription thread
-    print("✅ Recording started.", flush=True)
-    return jsonify({"status": "Recording started"}), 200  # Return success response
-
-# Stop Listening API (stops audio recording)
-@app.route('/stop', methods=['GET'])
+    print(f"✅ Recording started for session {session.session_id}.", flush=True)
+    return jsonify({"status": "Recording started", "session_id": session.session_id}), 200  # Return success response
+
+# Audio Upload API (receives a chunk of a browser session's audio as raw int16 PCM in the request body)
+# Chunks carry a sequence number (?seq=0, 1, 2, ...); a full buffer answers 429 with Retry-After
+@app.route('/audio', methods=['POST'])
+def receive_audio():
+    session = session_manager.get_session(request.args.get("session_id"))
+    if not session:
+        return jsonify({"status": "Unknown session"}), 404
+    try:
+        seq = int(request.args.get("seq", ""))
+    except ValueError:
+        return jsonify({"status": "Missing sequence number"}), 400
+    if (request.content_length or 0) > MAX_AUDIO_CHUNK_BYTES:
+        return jsonify({"status": "Audio chunk too large"}), 413
+    data = request.get_data(cache=False)
+    if len(data) % 2:
+        return jsonify({"status": "Audio must be 16-bit samples"}), 400
+
+    status, next_seq = session.push_audio(seq, data)
+    body = {"status": status, "next_seq": next_seq}
+    if status == "busy":
+        # Recognition is behind; by the time the client retries, it has caught up by about this much audio.
+        # Retry-After only takes whole seconds, so the body carries the exact delay as a finer hint.
+        retry_after = max(0.1, min(1.0, len(data) / 2 / session.ingest.input_rate))
+        body["retry_after"] = retry_after
+        return jsonify(body), 429, {"Retry-After": str(math.ceil(retry_after))}
+    if status == "out_of_order":
+        return jsonify(body), 409  # The client resends from next_seq
+    if status == "closed":
+        return jsonify(body), 410  # The session stopped or records the server's microphone
+    return jsonify(body), 200  # Accepted, or a duplicate of a chunk already received
+
+# Stop Listening API (stops audio recording for a session)
+@app.route('/stop', methods=['GET', 'POST'])  # POST for navigator.sendBeacon when the page is closed
 def stop_listening():
-    global stream
-    stop_recording_flag.set()  # Set the flag to stop recording
-    if stream:  # If recording is ongoing, stop it
-        stop_recording(stream)  # Call the function to stop recording
-        print("🛑 Recording stopped.", flush=True)
-    return jsonify({"status": "Stopping recording"}), 200  # Return response indicating stopping recording
+    session = session_manager.get_session(request.args.get("session_id"))
+    if not session:  # Stopping is idempotent, an unknown session is simply not recording
+        return jsonify({"status": "Not recording"}), 200
+    session.stop()  # Stop the session's recording
+    print(f"🛑 Recording stopped for session {session.session_id}.", flush=True)
+    return jsonify({"status": "Stopping recording", **session.stats()}), 200  # Return response indicating stopping recording
+
+# Transcribe API (transcribes and grades uploaded WAV recordings)
+@app.route('/transcribe', methods=['POST'])
+def transcribe_upload():
+    unavailable = model_unavailable()
+    if unavailable:
+        return unavailable
+
+    uploads = request.files.getlist("file")  # One or more files in the "file" field of a multipart form
+    if not uploads:
+        return jsonify({"status": "No file uploaded"}), 400
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for index, upload in enumerate(uploads):
+            paths.append(os.path.join(directory, f"{index}.wav"))
+            upload.save(paths[-1])  # The recognizers stream the audio from disk
+        # The files are recognized in parallel by the shared worker processes, off this request thread
+        results = list(transcribe_files(paths, reference=request.form.get("reference"), executor=transcribe_executor()))
+    for upload, result in zip(uploads, results):
+        result["file"] = upload.filename  # Report the uploaded name, not the temporary one
+    return jsonify({"results": results}), 200
+
+# Health API (reports the warm-up status and load time of each component)
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify(warmup.report()), 200
+
+# Readiness API (succeeds once the Vosk model and LanguageTool are loaded)
+@app.route('/ready', methods=['GET'])
+def ready():
+    report = warmup.report()
+    return jsonify(report), 200 if report["ready"] else 503
+
+# Sessions API (reports per-session resource usage)
+@app.route('/sessions', methods=['GET'])
+def list_sessions():
+    return jsonify({
+        "active": session_manager.active_count(),
+        "max_sessions": session_manager.max_sessions,
+        "sessions": session_manager.list_sessions(),  # Includes the CPU time spent on each session
+        "exercise_grammars": exercise_grammars.stats()  # Reuse of the recognizers of reading exercises
+    }), 200
+
+# Metrics API (Prometheus text format: sessions, audio backlog, latencies and stage times)
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+# Grammar Cache API (reports how many sentences were served without LanguageTool)
+@app.route('/grammar-cache', methods=['GET'])
+def grammar_cache_stats():
+    return jsonify(grammar_cache.stats()), 200
+
+# Grammar Backends API (reports the health and load of each LanguageTool backend)
+@app.route('/grammar-backends', methods=['GET'])
+def grammar_backends():
+    checker = get_grammar_checker(wait=False)  # Does not start LanguageTool just to report on it
+    backends = checker.tool.stats() if checker and checker.tool else []
+    return jsonify({"backends": backends}), 200
 
 # Streaming Transcription to Frontend
 @app.route('/transcription')
 def transcription_generator():
+    session = session_manager.get_session(request.args.get("session_id"))
+    if not session:  # The transcription stream needs a known session
+        return jsonify({"status": "Unknown session"}), 404
+
     def generate():
-        previous_length = 0  # Track the length of transcription to send new data
-        while not stop_recording_flag.is_set():  # While the stop flag is not set, keep sending transcription data
-            with transcription_lock:  # Acquire lock to safely access transcription data
-                if len(full_transcription) > previous_length:  # Check if new data is available
-                    new_text = full_transcription[previous_length:]  # Get new transcription data
-                    previous_length = len(full_transcription)  # Update previous length
-                    yield f"data: LIVE::{' '.join(new_text)}\n\n"  # Stream live transcription data
-            time.sleep(0.5)  # Wait before checking for new transcription data again
-
-        # Send the final transcription when the recording stops
-        with transcription_lock:
-            final_text = " ".join(full_transcription).strip()  # Final transcription as a single string
-        yield f"data: FULL_TRANSCRIPTION::{final_text}\n\n"
-        print(f"\n📜 Final Transcription: {final_text}", flush=True)
-
-        # Perform grammar check on the final transcription
-        try:
-            corrections = check_grammar(final_text) or []  # Get grammar errors or an empty list
-            print(f"📝 Grammar Errors: {json.dumps(corrections, indent=2)}", flush=True)
-            yield f"data: GRAMMAR_ERRORS::{json.dumps(corrections)}\n\n"  # Stream grammar errors to frontend
-
-            # Highlight grammar errors in the transcription
-            highlighted_text = final_text
-            for item in corrections:
-                error = item.get("error")  # Get the error string
-                if error and error in highlighted_text:  # If the error exists in the transcription
-                    highlighted_text = highlighted_text.replace(
-                        error, f"<span class='text-red-500 underline'>{error}</span>"  # Highlight the error in red
-                    )
-            yield f"data: HIGHLIGHTED_TRANSCRIPTION::{highlighted_text}\n\n"  # Stream the highlighted transcription
-
-        except Exception as e:
-            print(f"❌ Error during grammar check: {e}", flush=True)
-            yield f"data: GRAMMAR_ERRORS::[]\n\n"  # Send empty grammar errors if there's an exception
-            yield f"data: HIGHLIGHTED_TRANSCRIPTION::{final_text}\n\n"  # Send final text without highlighting
-
-        # Calculate accuracy of the transcription based on grammar corrections
-        try:
-            accuracy = calculate_accuracy(final_text, corrections) or 100  # Default to 100% if no errors
-            print(f"🎯 Accuracy: {accuracy}%", flush=True)
-            yield f"data: ACCURACY::{accuracy}%\n\n"  # Stream accuracy data to frontend
-        except Exception as e:
-            print(f"❌ Error calculating accuracy: {e}", flush=True)
-            yield f"data: ACCURACY::100%\n\n"  # Send 100% accuracy if there's an exception
-
-    return Response(generate(), mimetype="text/event-stream")  # Return the generator as an EventSource stream
+        # Wait on the session's channel and forward each event as soon as it is published
+        for event in session.channel.subscribe(timeout=SSE_KEEPALIVE_INTERVAL):
+            yield sse_message(event)  # Stream the event (or a keep-alive while idle) to the frontend
+
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})  # Return the generator as an EventSource stream
 
 # Exit API (graceful shutdown of the server)
 @app.route('/exit', methods=['GET'])
@@ -142,15 +217,22 @@ def exit_program():
 # Graceful shutdown of the server
 def shutdown_server():
     func = request.environ.get('werkzeug.server.shutdown')  # Get shutdown function
-    if func is None:  # If not running with Werkzeug server
-        print("⚠️ Not running with Werkzeug server.", flush=True)
-        os._exit(0)  # Forcefully exit the program
+    if func is None:  # If not running with Werkzeug's old shutdown hook
+        threading.Thread(target=stop_server, daemon=True).start()  # Drain in the background so /exit can answer first
     else:
         func()  # Call the shutdown function to stop the server
 
-# Main entry point
+# Lets running sessions publish their results, then stops the server like Ctrl+C would
+# (serve.py replaces this to drain every worker of the multi-process server)
+def stop_server():
+    if not session_manager.drain():
+        print("⚠️ Some sessions did not finish before the drain timeout.", flush=True)
+    os.kill(os.getpid(), signal.SIGINT)
+
+# Main entry point (development server; serve.py runs several worker processes for production)
 if __name__ == "__main__":
     print("🚀 Starting Fluent Edge at http://127.0.0.1:5000/", flush=True)
+    start_warmup()  # Load the Vosk model and LanguageTool in parallel while the server starts listening
     try:
         webbrowser.open("http://127.0.0.1:5000/")  # Automatically open the web app in the browser
         app.run(debug=True, use_reloader=False, port=5000)  # Start the Flask app
@@ -4,6 +4,7 @@ from .speech_recognizer import transcribe_audio  # Handles audio transcription t
 from .grammar_checker import check_grammar  # Checks the grammar of the transcribed text
 from .accuracy_checker import calculate_accuracy  # Calculates the accuracy of the transcription
 from .punctuation_restorer import PunctuationRestorer  # Restores punctuation to the transcribed text
+from .session_manager import SessionManager  # Keeps one recognizer, queue and transcript per session
 
 # Define the public interface of this module
 __all__ = [
@@ -12,5 +13,6 @@ __all__ = [
     'transcribe_audio',       # Allows external modules to access the transcribe_audio function
     'check_grammar',          # Allows external modules to access the check_grammar function
     'calculate_accuracy',     # Allows external modules to access the calculate_accuracy function
-    'PunctuationRestorer'     # Allows external modules to access the PunctuationRestorer class
+    'PunctuationRestorer',    # Allows external modules to access the PunctuationRestorer class
+    'SessionManager'          # Allows external modules to access the SessionManager class
 ]
@@ -19,3 +19,17 @@ def calculate_accuracy(text, corrections):
     # Calculate accuracy by subtracting the percentage of errors from 100% and ensure it's not negative
     accuracy = max(0, 100 - (error_count / total_words * 100))
     return round(accuracy, 2)  # Return the accuracy as a rounded percentage
+
+
+def calculate_reference_accuracy(comparison):
+    """
+    Calculates the reading accuracy of a learner who read a given passage aloud.
+
+    :param comparison: A dictionary returned by word_alignment.compare_to_reference.
+    :return: Accuracy percentage (float): 100 minus the word error rate in percent, at least 0.
+    """
+    if not comparison.get("reference_words"):
+        return 0  # No passage to compare with means 0% accuracy
+
+    accuracy = max(0, 100 - comparison["wer"] * 100)
+    return round(accuracy, 2)  # Return the accuracy as a rounded percentage
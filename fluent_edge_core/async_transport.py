@@ -0,0 +1,325 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote
+from .metrics import open_connections
+from .transcript_channel import sse_message, SSE_KEEPALIVE_INTERVAL
+
+# Threads that run the WSGI app, i.e. every request except event streams (uploads, /start, /transcribe, ...)
+REQUEST_THREADS = int(os.environ.get("FLUENT_EDGE_REQUEST_THREADS", "16"))
+
+# Largest request body accepted (WAV files posted to /transcribe are the largest)
+MAX_REQUEST_BYTES = int(os.environ.get("FLUENT_EDGE_MAX_REQUEST_BYTES", str(64 * 1024 * 1024)))
+
+# Longest request or header line, and most header lines, accepted
+MAX_LINE_BYTES = 65536
+MAX_HEADERS = 100
+
+# Seconds a connection may stay idle between two requests
+IDLE_TIMEOUT = 60
+
+# Path of the event streams, which are served on the event loop instead of a request thread
+STREAM_PATH = "/transcription"
+
+# Reason phrases of the responses written by the transport itself
+REASONS = {400: "Bad Request", 413: "Payload Too Large", 502: "Bad Gateway"}
+
+# Request threads shared by every transport of the process; created lazily, so it exists before a fork
+request_executor = ThreadPoolExecutor(max_workers=REQUEST_THREADS, thread_name_prefix="request")
+
+
+class BadRequest(Exception):
+    """
+    Raised for requests the transport cannot parse; the connection is answered with 400 and closed.
+    """
+
+
+class AsyncTransport:
+    def __init__(self, wsgi_app, sessions, executor=request_executor, keepalive=SSE_KEEPALIVE_INTERVAL,
+                 stream_owner=None):
+        """
+        HTTP/1.1 server running on one asyncio event loop in a background thread. Event streams
+        (GET /transcription) are served on the loop itself: an open stream is a coroutine waiting for
+        its session's channel, a few kilobytes instead of a thread, so thousands of viewers cost
+        thousands of sockets and no threads. Every other request is passed to the WSGI app on a
+        bounded thread pool, so short requests are served as before and CPU-heavy ones (batch
+        transcription) can only take REQUEST_THREADS threads at once. Live decoding stays in each
+        session's recognition thread and LanguageTool calls in the grammar executor.
+
+        :param wsgi_app: The WSGI application serving the other requests (the Flask app).
+        :param sessions: The SessionManager whose sessions' event streams are served on the loop.
+        :param executor: The thread pool that runs the WSGI app.
+        :param keepalive: Seconds an idle event stream waits before sending a keep-alive comment.
+        :param stream_owner: An optional function mapping the session id of a stream that is not local
+                             to the (host, port) of the process serving it (e.g., another worker of
+                             serve.py); such streams are relayed on the loop as well.
+        """
+        self.wsgi_app = wsgi_app
+        self.sessions = sessions
+        self.executor = executor
+        self.keepalive = keepalive
+        self.stream_owner = stream_owner
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+
+    def start(self):
+        """
+        Starts the event loop in a background thread.
+        """
+        self.thread = threading.Thread(target=self.loop.run_forever, name="async-transport", daemon=True)
+        self.thread.start()
+
+    def listen(self, host=None, port=None, sock=None):
+        """
+        Starts accepting connections. May be called from any thread once the transport is started.
+
+        :param host: The address to bind (ignored with sock).
+        :param port: The port to bind (0 picks a free port).
+        :param sock: An already listening socket to accept on (e.g., one shared by forked workers).
+        :return: A Listener, whose shutdown() stops accepting connections.
+        """
+        server = asyncio.run_coroutine_threadsafe(
+            asyncio.start_server(self._serve_connection, host, port, sock=sock, limit=MAX_LINE_BYTES), self.loop
+        ).result()
+        return Listener(self.loop, server)
+
+    def stop(self):
+        """
+        Closes every connection and stops the event loop.
+        """
+        if self.thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._cancel_connections(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.thread = None
+        self.loop.close()
+
+    async def _cancel_connections(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _serve_connection(self, reader, writer):
+        # Serves the requests of one connection, one after the other (HTTP/1.1 keep-alive)
+        open_connections.inc()
+        try:
+            while await self._serve_request(reader, writer):
+                pass
+        except BadRequest:
+            await self._write_response(writer, "400 Bad Request", [("Content-Type", "text/plain")], b"Bad request", False)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            pass  # The client went away, stayed idle too long or sent an oversized line
+        finally:
+            open_connections.dec()
+            writer.close()
+
+    async def _serve_request(self, reader, writer):
+        # Reads and answers one request; returns True if the connection stays open for another one
+        request_line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+        if not request_line:
+            return False  # Closed by the client between requests
+        try:
+            method, target, version = request_line.decode("latin-1").rstrip("\r\n").split(" ")
+        except ValueError:
+            raise BadRequest()
+        headers = await self._read_headers(reader)
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+        path, _, query = target.partition("?")
+        if method == "GET" and path == STREAM_PATH:
+            session_id = parse_qs(query).get("session_id", [None])[0]
+            session = self.sessions.get_session(session_id)
+            if session:
+                await self._stream_events(session.channel, writer)
+                return False
+            owner = self.stream_owner(session_id) if self.stream_owner else None
+            if owner:
+                await self._relay_stream(owner, target, writer)
+                return False
+            # Unknown sessions are answered by the app
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await self._read_chunked_body(reader)
+        else:
+            length = headers.get("content-length") or "0"
+            if not length.isdigit():
+                raise BadRequest()  # Negative, not a number, or several different values
+            length = int(length)
+            if length > MAX_REQUEST_BYTES:
+                await self._write_response(writer, "413 Payload Too Large", [("Content-Type", "text/plain")],
+                                           b"Request too large", False)
+                return False
+            if length and headers.get("expect", "").lower() == "100-continue":
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            body = await reader.readexactly(length)
+
+        environ = self._environ(method, path, query, version, headers, body, writer)
+        status, response_headers, response_body = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._call_app, environ
+        )
+        await self._write_response(writer, status, response_headers, b"" if method == "HEAD" else response_body, keep_alive)
+        return keep_alive
+
+    async def _read_headers(self, reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if not line:
+                raise asyncio.IncompleteReadError(b"", None)
+            if line in (b"\r\n", b"\n"):
+                return headers
+            name, separator, value = line.decode("latin-1").partition(":")
+            if not separator or len(headers) >= MAX_HEADERS:
+                raise BadRequest()
+            name = name.strip().lower()
+            headers[name] = f"{headers[name]},{value.strip()}" if name in headers else value.strip()
+
+    async def _read_chunked_body(self, reader):
+        body = bytearray()
+        while True:
+            try:
+                size = int((await reader.readline()).split(b";")[0], 16)
+            except ValueError:
+                raise BadRequest()
+            if size == 0:
+                await self._read_headers(reader)  # Trailers, ignored
+                return bytes(body)
+            if len(body) + size > MAX_REQUEST_BYTES:
+                raise BadRequest()
+            body += await reader.readexactly(size)
+            await reader.readexactly(2)  # CRLF after the chunk
+
+    def _environ(self, method, path, query, version, headers, body, writer):
+        server_host, server_port = writer.get_extra_info("sockname")[:2]
+        peer = writer.get_extra_info("peername") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote(path, encoding="latin-1"),  # WSGI passes paths as latin-1 strings
+            "QUERY_STRING": query,
+            "SERVER_NAME": server_host,
+            "SERVER_PORT": str(server_port),
+            "SERVER_PROTOCOL": version,
+            "REMOTE_ADDR": peer[0],
+            "REMOTE_PORT": str(peer[1]),
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": io.BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False
+        }
+        for name, value in headers.items():
+            if name == "content-type":
+                environ["CONTENT_TYPE"] = value
+            elif name not in ("content-length", "transfer-encoding"):
+                environ["HTTP_" + name.upper().replace("-", "_")] = value
+        return environ
+
+    def _call_app(self, environ):
+        # Runs on a request thread: calls the WSGI app and collects the whole response
+        response = {}
+        chunks = []
+
+        def start_response(status, headers, exc_info=None):
+            response["status"], response["headers"] = status, headers
+            return chunks.append  # The legacy write() callable
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            chunks.extend(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], b"".join(chunks)
+
+    async def _write_response(self, writer, status, headers, body, keep_alive):
+        lines = [f"HTTP/1.1 {status}"]
+        lines.extend(f"{name}: {value}" for name, value in headers
+                     if name.lower() not in ("content-length", "connection", "transfer-encoding"))
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append("Connection: " + ("keep-alive" if keep_alive else "close"))
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _stream_events(self, channel, writer):
+        # Forwards the channel's events as Server-Sent Events until the channel is closed
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\nCache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n"
+        )
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+
+        def notify():  # Called on the publishing thread
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # The event loop has already been closed
+
+        channel.watch(notify)
+        cursor = 0  # Index of the next event to send
+        try:
+            while True:
+                wake.clear()  # Cleared before reading, so an event published meanwhile wakes the next wait
+                events, closed = channel.read(cursor)
+                cursor += len(events)
+                for event in events:
+                    writer.write(sse_message(event).encode("utf-8"))
+                await writer.drain()  # A slow client only holds up its own stream
+                if closed:
+                    return
+                if not events:
+                    try:
+                        await asyncio.wait_for(wake.wait(), self.keepalive)
+                    except asyncio.TimeoutError:
+                        writer.write(sse_message(None).encode("utf-8"))
+        finally:
+            channel.unwatch(notify)
+
+    async def _relay_stream(self, owner, target, writer):
+        # Passes on the event stream of a session served by another process, byte for byte
+        host, port = owner
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await self._write_response(writer, "502 Bad Gateway", [("Content-Type", "text/plain")],
+                                       b"The worker of this session is unavailable", False)
+            return
+        try:
+            upstream_writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}:{port}\r\nConnection: close\r\n\r\n".encode("latin-1"))
+            while True:
+                chunk = await upstream_reader.read(65536)
+                if not chunk:
+                    return
+                writer.write(chunk)
+                await writer.drain()  # A slow client only holds up its own stream
+        finally:
+            upstream_writer.close()
+
+
+class Listener:
+    def __init__(self, loop, server):
+        """
+        A listening socket of an AsyncTransport; stopping it leaves open connections running.
+        """
+        self.loop = loop
+        self.server = server
+
+    @property
+    def port(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    def shutdown(self):
+        """
+        Stops accepting connections. May be called from any thread.
+        """
+        self.loop.call_soon_threadsafe(self.server.close)
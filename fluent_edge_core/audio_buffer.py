@@ -0,0 +1,210 @@
+import os
+import threading
+import numpy as np
+
+# Sample rate of the captured audio (frames per second)
+SAMPLE_RATE = 16000
+
+# Seconds of audio a ring buffer holds before the overflow policy applies
+AUDIO_BUFFER_SECONDS = float(os.environ.get("FLUENT_EDGE_AUDIO_BUFFER_SECONDS", "30"))
+
+# What a full buffer does with new audio: "drop_oldest" overwrites the oldest unread audio,
+# "block" makes the writer wait for the reader (up to AUDIO_BUFFER_BLOCK_TIMEOUT seconds). Only
+# writers that may wait (e.g., uploads) block; the audio callback drops the new audio instead
+AUDIO_BUFFER_OVERFLOW = os.environ.get("FLUENT_EDGE_AUDIO_BUFFER_OVERFLOW", "drop_oldest")
+
+# Seconds a blocked writer waits for free space before the rest of its audio is dropped
+AUDIO_BUFFER_BLOCK_TIMEOUT = 1.0
+
+# Maximum number of frames handed to the recognizer per read (the size of a capture block)
+AUDIO_READ_FRAMES = 4000
+
+OVERFLOW_POLICIES = ("drop_oldest", "block")
+
+
+class AudioRingBuffer:
+    def __init__(self, capacity=int(SAMPLE_RATE * AUDIO_BUFFER_SECONDS), overflow=AUDIO_BUFFER_OVERFLOW,
+                 block_timeout=AUDIO_BUFFER_BLOCK_TIMEOUT):
+        """
+        Fixed-size ring of int16 samples shared by one writer (the audio callback) and one reader
+        (the recognition worker). The memory is allocated once, so a session uses the same amount
+        of memory however long it runs and however far recognition falls behind.
+
+        The reader gets NumPy views of the buffer itself instead of copies. A view stays valid
+        until it is released with advance(); the writer never overwrites audio handed out in a view.
+
+        :param capacity: The number of frames (samples) the buffer holds.
+        :param overflow: "drop_oldest" or "block" (see AUDIO_BUFFER_OVERFLOW). "block" only applies to
+                         writes that allow it (see write()).
+        :param block_timeout: Seconds a writer waits for space with the "block" policy.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}.")
+        self.samples = np.zeros(capacity, dtype=np.int16)
+        self.capacity = capacity
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.read_pos = 0  # Total frames consumed so far (the ring index is read_pos % capacity)
+        self.write_pos = 0  # Total frames written so far
+        self.reserved = 0  # Frames at read_pos handed to the reader and not released yet
+        self.closed = False
+        self.condition = threading.Condition()
+
+        # Counters showing whether the reader keeps up
+        self.overruns = 0  # Writes that found the buffer full
+        self.dropped_frames = 0  # Frames lost because of those overruns
+        self.underruns = 0  # Reads that found no audio within their timeout
+        self.high_water = 0  # Largest number of unread frames seen
+
+    @property
+    def available(self):
+        """
+        :return: The number of frames written and not consumed yet.
+        """
+        with self.condition:
+            return self.write_pos - self.read_pos
+
+    @property
+    def free(self):
+        """
+        :return: The number of frames that can be written without waiting or dropping audio.
+        """
+        with self.condition:
+            return self.capacity - (self.write_pos - self.read_pos)
+
+    def write(self, data, block=True):
+        """
+        Copies audio into the buffer. This is the only copy the audio goes through.
+
+        :param data: Raw int16 audio (bytes, a NumPy array or any object supporting the buffer protocol).
+        :param block: Whether the "block" policy may make the caller wait for space. Real-time writers
+                      such as the PortAudio callback pass False: a callback that waits makes the device
+                      drop audio itself, so the frames that do not fit are dropped (and counted) instead.
+        :return: The number of frames stored.
+        """
+        frames = np.frombuffer(data, dtype=np.int16)  # A view of the caller's memory
+        stored = 0
+        overrun = False
+        with self.condition:
+            if self.overflow == "drop_oldest" and len(frames) > self.capacity:
+                overrun = True
+                self.dropped_frames += len(frames) - self.capacity
+                frames = frames[-self.capacity:]  # Only the newest audio can fit
+
+            while len(frames) and not self.closed:
+                free = self.capacity - (self.write_pos - self.read_pos)
+                if free < len(frames) and self.overflow == "drop_oldest":
+                    overrun = True
+                    # Unread audio can only be dropped while none of it is held by the reader
+                    dropped = 0 if self.reserved else min(len(frames) - free, self.write_pos - self.read_pos)
+                    self.read_pos += dropped
+                    self.dropped_frames += dropped
+                    free += dropped
+                    if free < len(frames):  # Drop the oldest of the new frames instead
+                        self.dropped_frames += len(frames) - free
+                        frames = frames[len(frames) - free:]
+                elif free == 0:
+                    overrun = True
+                    if not block:
+                        self.dropped_frames += len(frames)  # The newest audio, as after a timeout
+                        break
+                    if not self.condition.wait_for(self._has_space, self.block_timeout):
+                        self.dropped_frames += len(frames)  # The reader did not catch up in time
+                        break
+                    continue
+
+                count = min(free, len(frames))
+                self._copy_in(frames[:count])
+                frames = frames[count:]
+                stored += count
+                self.condition.notify_all()  # Wake the reader
+
+            if overrun:
+                self.overruns += 1
+        return stored
+
+    def read_view(self, max_frames=AUDIO_READ_FRAMES, timeout=None):
+        """
+        Waits for audio and returns a view of the oldest unread frames, without copying them.
+        The view is contiguous, so it ends early at the end of the ring; the next read continues
+        at its start. Call advance() once the view has been processed.
+
+        :param max_frames: The maximum number of frames to return.
+        :param timeout: Seconds to wait for audio (None waits until audio arrives or the buffer is closed).
+        :return: A read-only int16 NumPy view, or None if no audio arrived in time or the buffer is
+                 closed and empty.
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.write_pos > self.read_pos or self.closed, timeout):
+                self.underruns += 1
+                return None
+            if self.write_pos == self.read_pos:
+                return None  # Closed and fully consumed
+
+            start = self.read_pos % self.capacity
+            count = min(max_frames, self.write_pos - self.read_pos, self.capacity - start)
+            self.reserved = count
+            view = self.samples[start:start + count]
+            view.flags.writeable = False
+            return view
+
+    def advance(self, frames):
+        """
+        Releases frames returned by read_view, making their space available to the writer.
+
+        :param frames: The number of frames consumed (at most the length of the last view).
+        """
+        with self.condition:
+            frames = min(frames, self.reserved)
+            self.read_pos += frames
+            self.reserved = 0
+            self.condition.notify_all()  # Wake a writer waiting for space
+
+    def discard(self):
+        """
+        Drops every unread frame (e.g., audio there is no time left to recognize).
+
+        :return: The number of frames dropped.
+        """
+        with self.condition:
+            frames = self.write_pos - self.read_pos
+            self.read_pos = self.write_pos
+            self.reserved = 0
+            self.condition.notify_all()  # Wake a writer waiting for space
+            return frames
+
+    def close(self):
+        """
+        Stops accepting audio and wakes the reader and any waiting writer. Audio already in the
+        buffer can still be read.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def stats(self):
+        """
+        :return: A dictionary with the buffer size, fill level and overrun/underrun counters.
+        """
+        with self.condition:
+            return {
+                "capacity": self.capacity,
+                "available": self.write_pos - self.read_pos,
+                "high_water": self.high_water,
+                "overflow": self.overflow,
+                "overruns": self.overruns,
+                "dropped_frames": self.dropped_frames,
+                "underruns": self.underruns
+            }
+
+    def _has_space(self):
+        return self.closed or self.write_pos - self.read_pos < self.capacity
+
+    def _copy_in(self, frames):
+        # Copy frames at the write position, wrapping around the end of the ring
+        start = self.write_pos % self.capacity
+        first = min(len(frames), self.capacity - start)
+        self.samples[start:start + first] = frames[:first]
+        self.samples[:len(frames) - first] = frames[first:]
+        self.write_pos += len(frames)
+        self.high_water = max(self.high_water, self.write_pos - self.read_pos)
@@ -1,40 +1,72 @@
-import sounddevice as sd
-import queue
+import os
 import sys
+from .audio_buffer import AudioRingBuffer
+from .audio_ingest import AudioIngest, TARGET_SAMPLE_RATE
 
-# Queue for storing audio data
-audio_queue = queue.Queue()
+# Sample rate the input device is opened at first; if the device refuses it, its default rate is used
+CAPTURE_SAMPLE_RATE = int(os.environ.get("FLUENT_EDGE_CAPTURE_RATE", str(TARGET_SAMPLE_RATE)))
 
-# Callback function to capture audio data
-def audio_callback(indata, frames, time, status):
+# Number of channels captured from the input device (they are mixed down to mono)
+CAPTURE_CHANNELS = int(os.environ.get("FLUENT_EDGE_CAPTURE_CHANNELS", "1"))
+
+# Ring buffer for storing audio data
+audio_buffer = AudioRingBuffer()
+
+# Factory for callback functions that capture audio data into a given ring buffer
+def make_audio_callback(target_buffer, ingest=None):
     """
-    Callback function that gets called by the audio stream for each block of audio data captured.
+    Builds a callback for the audio stream that copies every captured block into the given ring buffer.
+
+    Each recording session owns its own buffer, so streams opened for different sessions never
+    mix their audio. The callback runs on PortAudio's real-time thread, so it never waits for
+    space: with the "block" overflow policy, audio that does not fit is dropped.
 
-    :param indata: The input audio data in raw format.
-    :param frames: The number of frames in the audio block.
-    :param time: Timestamp information about the current audio block.
-    :param status: Status information related to the audio stream (e.g., overflow or underflow).
+    :param target_buffer: The AudioRingBuffer that receives the captured audio.
+    :param ingest: An optional AudioIngest converting the device's audio to 16 kHz mono first.
+    :return: A callback function suitable for sd.RawInputStream.
     """
-    if status:
-        print(f"⚠️ Audio status: {status}", file=sys.stderr, flush=True)  # Print warnings to stderr if any
-    audio_queue.put(bytes(indata))  # Store the captured audio data in the queue
+    def audio_callback(indata, frames, time, status):
+        """
+        Callback function that gets called by the audio stream for each block of audio data captured.
+
+        :param indata: The input audio data in raw format.
+        :param frames: The number of frames in the audio block.
+        :param time: Timestamp information about the current audio block.
+        :param status: Status information related to the audio stream (e.g., overflow or underflow).
+        """
+        if status:
+            print(f"⚠️ Audio status: {status}", file=sys.stderr, flush=True)  # Print warnings to stderr if any
+        if ingest is not None:
+            indata = ingest.process(indata)  # Downmix and resample to 16 kHz mono
+        target_buffer.write(indata, block=False)  # Copy the block straight into the preallocated ring, never waiting
+
+    return audio_callback
+
+# Default callback that feeds the module-level audio buffer
+audio_callback = make_audio_callback(audio_buffer)
 
 # Function to start audio recording
-def start_recording():
+def start_recording(target_buffer=None):
     """
     Starts an audio recording stream using the sounddevice library.
 
+    :param target_buffer: The AudioRingBuffer that receives the captured audio (defaults to the module-level audio_buffer).
     :return: The stream object if recording starts successfully, otherwise None.
     """
+    if target_buffer is None:
+        target_buffer = audio_buffer  # Fall back to the shared module-level buffer
+
     try:
-        # Initialize the audio input stream with specific parameters
-        stream = sd.RawInputStream(
-            samplerate=16000,  # Set the sample rate to 16kHz
-            blocksize=4000,    # Block size of 4000 frames per callback
-            dtype='int16',     # Audio data type (16-bit signed integers)
-            channels=1,        # Mono audio (single channel)
-            callback=audio_callback  # Set the callback function to capture audio
-        )
+        import sounddevice as sd  # Imported on first use, so PortAudio is only initialized when recording
+
+        try:
+            stream = open_input_stream(sd, CAPTURE_SAMPLE_RATE, target_buffer)
+        except sd.PortAudioError:
+            # The device does not support the requested rate, capture at its own rate and resample
+            default_rate = int(sd.query_devices(kind="input")["default_samplerate"])
+            if default_rate == CAPTURE_SAMPLE_RATE:
+                raise
+            stream = open_input_stream(sd, default_rate, target_buffer)
         stream.start()  # Start the audio stream
         print("🎤 Audio stream started.", flush=True)  # Inform the user that recording has started
         return stream  # Return the stream object
@@ -42,6 +74,25 @@ def start_recording():
         print(f"❌ ERROR: Failed to start audio recording. {e}", flush=True)  # Print error message if stream fails to start
         return None  # Return None to indicate failure
 
+# Function to open an input stream at a given sample rate, converting its audio to 16 kHz mono
+def open_input_stream(sd, samplerate, target_buffer):
+    """
+    Opens (without starting) an audio input stream that feeds the given ring buffer.
+
+    :param sd: The sounddevice module.
+    :param samplerate: The sample rate to open the device at.
+    :param target_buffer: The AudioRingBuffer that receives the 16 kHz mono audio.
+    :return: The sd.RawInputStream.
+    """
+    ingest = AudioIngest(samplerate, CAPTURE_CHANNELS)
+    return sd.RawInputStream(
+        samplerate=samplerate,         # Sample rate of the device (16kHz unless it refuses it)
+        blocksize=samplerate // 4,     # A quarter of a second of audio per callback
+        dtype='int16',                 # Audio data type (16-bit signed integers)
+        channels=CAPTURE_CHANNELS,     # Mono audio unless configured otherwise
+        callback=make_audio_callback(target_buffer, None if ingest.passthrough else ingest)
+    )
+
 # Function to stop audio recording
 def stop_recording(stream):
     """
@@ -0,0 +1,209 @@
+import math
+import wave
+import numpy as np
+
+# Sample rate the recognizer and the voice activity detector work at
+TARGET_SAMPLE_RATE = 16000
+
+# Filter taps per polyphase branch; more taps give a sharper anti-aliasing filter at more CPU cost
+RESAMPLER_TAPS = 32
+
+# Kaiser window shape of the anti-aliasing filter (about 80 dB stopband attenuation)
+RESAMPLER_KAISER_BETA = 8.0
+
+# Frames read from a file at a time
+FILE_BLOCK_FRAMES = 4000
+
+
+class StreamingResampler:
+    def __init__(self, input_rate, output_rate=TARGET_SAMPLE_RATE, taps=RESAMPLER_TAPS):
+        """
+        Converts a stream of mono samples from one sample rate to another, chunk by chunk, with a
+        windowed-sinc polyphase filter. The rate ratio is reduced to up/down factors (e.g., 48 kHz
+        to 16 kHz is 1/3, 44.1 kHz to 16 kHz is 160/441), and only the filter branch needed for
+        each output sample is evaluated. Each chunk is filtered with a single NumPy gather and
+        product instead of a Python loop, and only the last few input samples are kept between chunks.
+
+        :param input_rate: The sample rate of the input.
+        :param output_rate: The sample rate of the output.
+        :param taps: Filter taps per polyphase branch (multiplied by the decimation ratio when downsampling).
+        """
+        divisor = math.gcd(int(input_rate), int(output_rate))
+        self.up = int(output_rate) // divisor
+        self.down = int(input_rate) // divisor
+        self.taps = taps * -(-self.down // self.up)  # Longer branches when decimating keep the cutoff sharp
+
+        # Low-pass prototype at the upsampled rate, cut off below the lower of the two Nyquist frequencies
+        length = self.up * self.taps - (1 - self.up * self.taps % 2)  # Odd, so the delay is a whole sample
+        cutoff = 0.5 / max(self.up, self.down) * 0.95  # Cycles per upsampled sample, with a transition band
+        n = np.arange(length) - (length - 1) / 2
+        prototype = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, RESAMPLER_KAISER_BETA)
+        prototype *= self.up / prototype.sum()  # Unity gain after zero-stuffing
+        prototype = np.append(prototype, np.zeros(self.up * self.taps - length))
+        # Branch p holds the taps h[p], h[p + up], ...; row p is used for output samples of phase p
+        self.branches = prototype.reshape(self.taps, self.up).T.astype(np.float32)
+        self.delay = (length - 1) // 2  # Filter delay in upsampled samples, compensated below
+
+        self.history = np.zeros(self.taps, dtype=np.float32)  # Input samples still needed by upcoming outputs
+        self.history_start = -self.taps  # Absolute index of history[0] (negative indices are leading silence)
+        self.inputs = 0  # Input samples received so far
+        self.outputs = 0  # Output samples produced so far
+
+    def process(self, samples):
+        """
+        Resamples the next chunk of the stream.
+
+        :param samples: Mono input samples as a float32 NumPy array.
+        :return: The output samples that can be computed so far, as a float32 array.
+        """
+        self.history = np.concatenate((self.history, samples.astype(np.float32, copy=False)))
+        self.inputs += len(samples)
+        return self._produce(self._available_outputs(self.inputs))
+
+    def flush(self):
+        """
+        Ends the stream and returns the remaining output samples.
+
+        :return: The last output samples, as a float32 array.
+        """
+        total = -(-self.inputs * self.up // self.down)  # Output length of the whole stream, rounded up
+        self.history = np.concatenate((self.history, np.zeros(self.taps + self.delay // self.up + 1, np.float32)))
+        return self._produce(total)
+
+    def _available_outputs(self, inputs):
+        # Outputs whose newest input sample has arrived: (n * down + delay) // up < inputs
+        return max(self.outputs, (inputs * self.up - 1 - self.delay) // self.down + 1)
+
+    def _produce(self, end):
+        if end <= self.outputs:
+            return np.zeros(0, dtype=np.float32)
+        positions = np.arange(self.outputs, end, dtype=np.int64) * self.down + self.delay
+        phases = positions % self.up
+        newest = positions // self.up - self.history_start  # Index of the newest input sample of each output
+        window = newest[:, None] - np.arange(self.taps)[None, :]  # Inputs x[base], x[base - 1], ...
+        output = np.einsum("ij,ij->i", self.history[window], self.branches[phases])
+        self.outputs = end
+
+        # Drop inputs that no future output needs
+        next_newest = (self.outputs * self.down + self.delay) // self.up
+        keep_from = max(0, next_newest - (self.taps - 1) - self.history_start)
+        self.history = self.history[keep_from:]
+        self.history_start += keep_from
+        return output
+
+
+class AudioIngest:
+    def __init__(self, input_rate, channels=1, sample_width=2, output_rate=TARGET_SAMPLE_RATE):
+        """
+        Turns raw PCM chunks of any sample rate, channel count and sample width into 16 kHz mono
+        int16 audio for the recognizer. Chunks may end in the middle of a frame; the remainder is
+        carried over to the next chunk. Audio that is already 16 kHz mono int16 passes unchanged.
+
+        :param input_rate: The sample rate of the input.
+        :param channels: The number of interleaved input channels (they are averaged to mono).
+        :param sample_width: Bytes per sample: 1 (unsigned), 2, 3 or 4 (signed little-endian).
+        :param output_rate: The sample rate of the output.
+        """
+        if sample_width not in (1, 2, 3, 4):
+            raise ValueError(f"Unsupported sample width: {sample_width} bytes.")
+        self.input_rate = input_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.output_rate = output_rate
+        self.frame_size = channels * sample_width
+        self.remainder = b""  # Bytes of an incomplete frame at the end of the last chunk
+        self.passthrough = input_rate == output_rate and channels == 1 and sample_width == 2
+        self.resampler = None if input_rate == output_rate else StreamingResampler(input_rate, output_rate)
+
+    def process(self, data):
+        """
+        Converts the next chunk of PCM audio.
+
+        :param data: Raw interleaved PCM bytes (or any object supporting the buffer protocol).
+        :return: 16 kHz mono int16 samples as a NumPy array (empty if the chunk completes no output).
+        """
+        if self.passthrough:
+            return np.frombuffer(data, dtype=np.int16)  # A view, no conversion needed
+
+        data = self.remainder + bytes(data)
+        usable = len(data) - len(data) % self.frame_size
+        self.remainder = data[usable:]
+        samples = decode_pcm(data[:usable], self.sample_width)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)  # Downmix to mono
+        if self.resampler:
+            samples = self.resampler.process(samples)
+        return to_int16(samples)
+
+    def output_frames(self, size):
+        """
+        :param size: The size in bytes of the next chunk.
+        :return: The number of samples process() will return for it, e.g. to check that they fit in a buffer first.
+        """
+        frames = (len(self.remainder) + size) // self.frame_size
+        if self.resampler is None:
+            return frames
+        return self.resampler._available_outputs(self.resampler.inputs + frames) - self.resampler.outputs
+
+    def flush(self):
+        """
+        Ends the stream and returns the samples still held by the resampler.
+
+        :return: The last 16 kHz mono int16 samples.
+        """
+        if self.resampler is None:
+            return np.zeros(0, dtype=np.int16)
+        return to_int16(self.resampler.flush())
+
+
+def decode_pcm(data, sample_width):
+    """
+    Decodes little-endian PCM bytes into samples scaled like int16.
+
+    :param data: Raw PCM bytes holding whole samples.
+    :param sample_width: Bytes per sample: 1 (unsigned), 2, 3 or 4 (signed).
+    :return: A float32 NumPy array.
+    """
+    if sample_width == 1:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) * 256
+    if sample_width == 2:
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    if sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = np.where(samples & 0x800000, samples - 0x1000000, samples)  # Sign-extend 24-bit values
+        return (samples / 256).astype(np.float32)
+    return (np.frombuffer(data, dtype=np.int32) / 65536).astype(np.float32)
+
+
+def to_int16(samples):
+    """
+    :param samples: Samples scaled like int16 (float or integer).
+    :return: The samples rounded and clipped to int16.
+    """
+    if samples.dtype == np.int16:
+        return samples
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+def read_wav_file(path, block_frames=FILE_BLOCK_FRAMES, output_rate=TARGET_SAMPLE_RATE):
+    """
+    Streams a WAV file as 16 kHz mono int16 blocks, reading it a block at a time.
+
+    :param path: The path of the WAV file (PCM, any sample rate, channel count and sample width).
+    :param block_frames: The number of input frames read at a time.
+    :param output_rate: The sample rate of the output.
+    :return: A generator of int16 NumPy arrays.
+    """
+    with wave.open(path, "rb") as wav_file:
+        ingest = AudioIngest(wav_file.getframerate(), wav_file.getnchannels(), wav_file.getsampwidth(), output_rate)
+        while True:
+            data = wav_file.readframes(block_frames)
+            if not data:
+                break
+            samples = ingest.process(data)
+            if len(samples):
+                yield samples
+        samples = ingest.flush()
+        if len(samples):
+            yield samples
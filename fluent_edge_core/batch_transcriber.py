@@ -0,0 +1,241 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import vosk
+from .accuracy_checker import calculate_accuracy, calculate_reference_accuracy
+from .audio_ingest import read_wav_file, TARGET_SAMPLE_RATE
+from .fluency import fluency_metrics
+from .grammar_checker import get_grammar_checker
+from .speech_recognizer import get_model, RecognitionWorker
+from .vad import VoiceActivityDetector, VAD_ENABLED
+from .word_alignment import compare_to_reference
+
+# Number of worker processes transcribing files (0 uses one per CPU). Every worker loads its own model.
+BATCH_WORKERS = int(os.environ.get("FLUENT_EDGE_BATCH_WORKERS", "0"))
+
+# Number of worker processes transcribing the files uploaded to the server's /transcribe endpoint
+TRANSCRIBE_WORKERS = int(os.environ.get("FLUENT_EDGE_TRANSCRIBE_WORKERS", "2"))
+
+_transcribe_executor = None
+_transcribe_executor_lock = threading.Lock()
+
+
+def find_wav_files(paths):
+    """
+    Expands files and directories into the WAV files to transcribe.
+
+    :param paths: Paths of WAV files or of directories searched recursively for them.
+    :return: A generator of WAV file paths, in sorted order within each directory.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(".wav"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def recognize_file(path, model=None, vad=VAD_ENABLED):
+    """
+    Transcribes a WAV file and restores its punctuation, using the same recognition steps as a
+    live session. The file is streamed from disk, mixed down to mono and resampled to 16 kHz.
+
+    :param path: The path of the WAV file (PCM, any sample rate, channel count and sample width).
+    :param model: The vosk.Model to use (defaults to the shared model).
+    :param vad: If True, silence is skipped by a VoiceActivityDetector before recognition.
+    :return: A dictionary with the file, its duration, the transcription, its fluency metrics and the
+             recognition time.
+    """
+    started = time.perf_counter()
+    rec = vosk.KaldiRecognizer(model or get_model(), TARGET_SAMPLE_RATE)
+    worker = RecognitionWorker(
+        [], threading.Event(), rec=rec, vad=VoiceActivityDetector(TARGET_SAMPLE_RATE) if vad else None
+    )
+    for block in read_wav_file(path):
+        worker.feed(block)
+    worker.flush()  # The file may end in the middle of an utterance
+    return {
+        "file": path,
+        "duration": round(worker.duration, 3),
+        "transcription": worker.finish(),
+        "fluency": fluency_metrics(worker.timings, worker.duration),
+        "recognition_time": round(time.perf_counter() - started, 3)
+    }
+
+
+def add_analysis(result, errors, reference=None):
+    """
+    Adds the grammar errors and the accuracy to a recognition result. With a reference text, the
+    result also gets the comparison with it ("reading"), and the accuracy is based on its word error rate.
+
+    :param result: A dictionary returned by recognize_file.
+    :param errors: The grammar errors found in its transcription.
+    :param reference: The passage the speaker was asked to read, if any.
+    :return: The updated result.
+    """
+    result["grammar_errors"] = errors
+    if reference and reference.strip():
+        result["reading"] = compare_to_reference(reference, result["transcription"])
+        result["accuracy"] = calculate_reference_accuracy(result["reading"])
+    else:
+        result["accuracy"] = calculate_accuracy(result["transcription"], errors)
+    return result
+
+
+def transcribe_file(path, model=None, vad=VAD_ENABLED, reference=None):
+    """
+    Transcribes a WAV file, then checks its grammar and calculates its accuracy.
+
+    :param path: The path of the WAV file.
+    :param model: The vosk.Model to use (defaults to the shared model).
+    :param vad: If True, silence is skipped before recognition.
+    :param reference: The passage read aloud in the recording, to score it against (optional).
+    :return: A dictionary with the transcription, grammar errors and accuracy, or with an "error"
+             if the file could not be transcribed.
+    """
+    try:
+        result = recognize_file(path, model, vad)
+    except Exception as e:
+        return {"file": path, "error": str(e)}
+    return add_analysis(result, get_grammar_checker().check_grammar(result["transcription"]), reference)
+
+
+def _init_worker():
+    # Runs once in every worker process: load the model there, keep stdout free for the results
+    sys.stdout = sys.stderr
+    get_model()
+
+
+def _recognize_in_worker(path, vad):
+    try:
+        return recognize_file(path, vad=vad)
+    except Exception as e:
+        return {"file": path, "error": str(e)}
+
+
+def transcribe_executor():
+    """
+    Returns the process pool shared by the server's transcription requests, creating it on the first
+    call. Its workers start from a fresh process (forkserver where available) rather than a fork of
+    the multi-threaded server, and each one loads the model once and keeps it for later requests.
+
+    :return: A ProcessPoolExecutor with TRANSCRIBE_WORKERS workers.
+    """
+    global _transcribe_executor
+    with _transcribe_executor_lock:
+        if _transcribe_executor is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _transcribe_executor = ProcessPoolExecutor(
+                max_workers=TRANSCRIBE_WORKERS, mp_context=multiprocessing.get_context(start_method),
+                initializer=_init_worker
+            )
+        return _transcribe_executor
+
+
+def close_transcribe_executor():
+    """
+    Stops the worker processes of the shared transcription pool, if it was ever created.
+    """
+    global _transcribe_executor
+    with _transcribe_executor_lock:
+        if _transcribe_executor is not None:
+            _transcribe_executor.shutdown(cancel_futures=True)
+            _transcribe_executor = None
+
+
+def transcribe_files(paths, workers=BATCH_WORKERS, vad=VAD_ENABLED, reference=None, executor=None):
+    """
+    Transcribes many WAV files in parallel. Recognition runs in a pool of processes that each load
+    the model once; grammar is checked in this process on the shared LanguageTool pool and cache,
+    while the next files are still being recognized.
+
+    :param paths: Paths of WAV files or directories containing them.
+    :param workers: The number of worker processes (0 uses one per CPU), ignored with executor.
+    :param vad: If True, silence is skipped before recognition.
+    :param reference: The passage read aloud in every recording, to score them against (optional).
+    :param executor: An existing pool whose workers were started with the model loaded (e.g., the
+                     transcribe_executor of the server); by default a pool is created for the call.
+    :return: A generator of result dictionaries (see transcribe_file), in the order of the files.
+    """
+    files = list(find_wav_files(paths))
+    if not files:
+        return
+    if executor is not None:
+        yield from _transcribe_on(executor, files, vad, reference)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker) as executor:
+        yield from _transcribe_on(executor, files, vad, reference)
+
+
+def _transcribe_on(executor, files, vad, reference):
+    pending = deque()  # (result, grammar future) pairs waiting to be returned in order
+    results = executor.map(_recognize_in_worker, files, [vad] * len(files))
+    checker = get_grammar_checker()  # Started once the workers exist, so they are not forked with its threads
+    for result in results:
+        future = checker.submit(result["transcription"]) if "error" not in result else None
+        pending.append((result, future))
+        while pending and (pending[0][1] is None or pending[0][1].done()):
+            yield _finish(*pending.popleft(), reference)
+    while pending:
+        yield _finish(*pending.popleft(), reference)
+
+
+def _finish(result, future, reference):
+    if future is None:
+        return result  # The file could not be transcribed
+    try:
+        return add_analysis(result, future.result(), reference)
+    except Exception as e:
+        result["error"] = f"Grammar check failed: {e}"
+        return result
+
+
+def main(argv=None):
+    """
+    Command-line entry point: transcribes WAV files and writes one JSON object per file.
+
+    :param argv: The command-line arguments (defaults to sys.argv[1:]).
+    :return: The exit status (1 if any file failed).
+    """
+    parser = argparse.ArgumentParser(description="Transcribe and grade WAV files.")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories containing them")
+    parser.add_argument("-o", "--output", help="file to write the JSON lines to (default: standard output)")
+    parser.add_argument("-w", "--workers", type=int, default=BATCH_WORKERS,
+                        help="number of worker processes (default: one per CPU)")
+    parser.add_argument("--no-vad", action="store_true", help="pass silence to the recognizer as well")
+    parser.add_argument("-r", "--reference", help="text file with the passage read in every recording")
+    args = parser.parse_args(argv)
+
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as reference_file:
+            reference = reference_file.read()
+
+    total = failed = 0
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):  # Progress messages must not mix with the results
+            for result in transcribe_files(args.paths, args.workers, vad=not args.no_vad, reference=reference):
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+                total += 1
+                failed += "error" in result
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"✅ Transcribed {total - failed} file(s), {failed} failed.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+import vosk
+from .speech_recognizer import MODEL_PATH
+from .word_alignment import tokenize_words
+
+# Maximum number of exercises whose grammars (and idle recognizers) are kept
+EXERCISE_GRAMMAR_CACHE_SIZE = int(os.environ.get("FLUENT_EDGE_EXERCISE_GRAMMAR_CACHE_SIZE", "32"))
+
+# Idle recognizers kept per exercise, ready for the next learner reading the same passage
+IDLE_RECOGNIZERS_PER_EXERCISE = 2
+
+# Grammar entry that lets the decoder output a word outside the passage instead of forcing a passage word
+UNKNOWN_WORD = "[unk]"
+
+SENTENCE_END = re.compile(r"[.!?]+")
+
+
+def build_grammar(reference):
+    """
+    Builds the Vosk grammar of a reading exercise: each sentence of the passage as a phrase, every
+    word of the passage on its own (so skipped or repeated words can still be recognized) and
+    UNKNOWN_WORD for anything else.
+
+    :param reference: The passage the learner reads aloud.
+    :return: The grammar as a JSON list of phrases, as KaldiRecognizer expects it.
+    """
+    phrases = []
+    for sentence in SENTENCE_END.split(reference):
+        words = tokenize_words(sentence)[0]
+        if words:
+            phrases.append(" ".join(words))
+    vocabulary = sorted(set(tokenize_words(reference)[0]))
+    return json.dumps(list(dict.fromkeys(phrases + vocabulary + [UNKNOWN_WORD])))
+
+
+def supports_grammar(model_path=MODEL_PATH):
+    """
+    Checks whether a Vosk model can decode with a runtime grammar. Only models with a dynamic graph
+    (HCLr.fst and Gr.fst, like the small models) can; large models with a precompiled HCLG.fst
+    ignore the grammar and decode with their full vocabulary.
+
+    :param model_path: The directory of the Vosk model.
+    :return: True if a grammar restricts what the model recognizes.
+    """
+    graph = os.path.join(model_path, "graph")
+    return os.path.exists(os.path.join(graph, "HCLr.fst")) and os.path.exists(os.path.join(graph, "Gr.fst"))
+
+
+class ExerciseGrammarCache:
+    def __init__(self, max_exercises=EXERCISE_GRAMMAR_CACHE_SIZE, idle_per_exercise=IDLE_RECOGNIZERS_PER_EXERCISE):
+        """
+        Keeps the grammar-constrained recognizers of recent reading exercises. Building a recognizer
+        with a grammar compiles the grammar into a decoding graph, so recognizers are reset and
+        reused by the next session reading the same passage instead of being compiled again.
+
+        :param max_exercises: The maximum number of exercises kept (least recently used ones are dropped).
+        :param idle_per_exercise: The maximum number of idle recognizers kept per exercise.
+        """
+        self.max_exercises = max_exercises
+        self.idle_per_exercise = idle_per_exercise
+        self.entries = OrderedDict()  # key -> [grammar, idle (recognizer, decoded seconds) pairs], least recently used first
+        self.lock = threading.Lock()
+
+        # Counters showing how often a compiled grammar is reused
+        self.hits = 0  # Idle recognizers handed out again
+        self.misses = 0  # Recognizers that had to be built (and their grammar compiled)
+        self.evictions = 0
+
+    def acquire(self, model, reference, sample_rate=16000):
+        """
+        Returns a recognizer restricted to the words of a passage, reusing an idle one if possible.
+
+        :param model: The vosk.Model to decode with.
+        :param reference: The passage the learner reads aloud.
+        :param sample_rate: The sample rate of the audio.
+        :return: A tuple of (KaldiRecognizer, time offset): the recognizer, to hand back with release()
+                 when the session is over, and the seconds of audio it decoded before, which Vosk
+                 adds to the word times it reports.
+        """
+        key = self._key(model, reference, sample_rate)
+        with self.lock:
+            entry = self._entry(key, reference)
+            if entry[1]:
+                self.hits += 1
+                return entry[1].pop()
+            self.misses += 1
+            grammar = entry[0]
+        return vosk.KaldiRecognizer(model, sample_rate, grammar), 0.0  # Compiled outside the lock
+
+    def release(self, model, reference, recognizer, sample_rate=16000, decoded_seconds=0.0):
+        """
+        Resets a recognizer returned by acquire() and keeps it for the next session of the exercise.
+
+        :param model: The vosk.Model it decodes with.
+        :param reference: The passage it was built for.
+        :param recognizer: The recognizer, no longer used by its session.
+        :param sample_rate: The sample rate it was built for.
+        :param decoded_seconds: The seconds of audio it has decoded since it was built.
+        """
+        recognizer.Reset()  # Forget the finished session's audio
+        key = self._key(model, reference, sample_rate)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and len(entry[1]) < self.idle_per_exercise:
+                entry[1].append((recognizer, decoded_seconds))
+
+    def stats(self):
+        """
+        :return: A dictionary with the number of cached exercises, idle recognizers and reuse counters.
+        """
+        with self.lock:
+            return {
+                "exercises": len(self.entries),
+                "max_exercises": self.max_exercises,
+                "idle_recognizers": sum(len(entry[1]) for entry in self.entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+    def _entry(self, key, reference):
+        # The cache entry of an exercise, created (and the oldest evicted) if needed; called with the lock held
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = [build_grammar(reference), []]
+            while len(self.entries) > self.max_exercises:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def _key(self, model, reference, sample_rate):
+        # Passages that only differ in case, punctuation or spacing share a grammar
+        text = " ".join(tokenize_words(reference)[0])
+        return id(model), sample_rate, hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+# Recognizers of the reading exercises, shared by all sessions
+exercise_grammars = ExerciseGrammarCache()
@@ -0,0 +1,152 @@
+from array import array
+import numpy as np
+
+# Silences between two words at least this long (seconds) count as pauses
+PAUSE_THRESHOLD = 0.25
+
+# Upper bounds (seconds) of the pause length histogram buckets; the last bucket is open-ended
+PAUSE_BUCKETS = (0.5, 1.0, 2.0)
+
+# Words recognized with a confidence below this are reported as unclear
+LOW_CONFIDENCE = 0.5
+
+# Maximum number of unclear words listed individually (all of them are counted)
+LOW_CONFIDENCE_LIST_SIZE = 20
+
+# Hesitation sounds counted as fillers
+FILLER_WORDS = frozenset(["uh", "um", "uhm", "umm", "er", "erm", "ah", "eh", "hmm", "mm", "mhm"])
+
+
+class WordTimings:
+    def __init__(self):
+        """
+        Collects the recognized words with their start and end times and confidences, as columns
+        of typed arrays instead of one dictionary per word. Words are stored as ids into a shared
+        vocabulary, so every word costs 16 bytes (three float32 values and a uint32 id) plus its
+        text once per distinct word.
+        """
+        self.starts = array("f")  # Seconds from the start of the audio
+        self.ends = array("f")
+        self.confidences = array("f")  # 0 to 1, as reported by the recognizer
+        self.word_ids = array("I")  # Index into self.vocabulary
+        self.vocabulary = []  # Distinct words, in order of first appearance
+        self.word_index = {}  # word -> id
+
+    def __len__(self):
+        return len(self.word_ids)
+
+    def add(self, word, start, end, confidence=1.0):
+        """
+        Appends a recognized word.
+
+        :param word: The word (lowercase, as recognized).
+        :param start: The time the word starts, in seconds.
+        :param end: The time the word ends, in seconds.
+        :param confidence: The recognizer's confidence in the word, from 0 to 1.
+        """
+        word_id = self.word_index.get(word)
+        if word_id is None:
+            word_id = self.word_index[word] = len(self.vocabulary)
+            self.vocabulary.append(word)
+        self.word_ids.append(word_id)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.confidences.append(confidence)
+
+    def columns(self):
+        """
+        :return: A tuple of NumPy views (starts, ends, confidences, word ids) over the columns, without copying them.
+                 The views must not be kept while words are still being added.
+        """
+        if not len(self):
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty, np.zeros(0, dtype=np.uint32)
+        return (
+            np.frombuffer(self.starts, dtype=np.float32),
+            np.frombuffer(self.ends, dtype=np.float32),
+            np.frombuffer(self.confidences, dtype=np.float32),
+            np.frombuffer(self.word_ids, dtype=np.uint32)
+        )
+
+    def ids_of(self, words):
+        """
+        :param words: A collection of words.
+        :return: The ids of those words that occur in the vocabulary, as a NumPy array.
+        """
+        return np.array([self.word_index[word] for word in words if word in self.word_index], dtype=np.uint32)
+
+    def nbytes(self):
+        """
+        :return: The number of bytes used by the word columns (excluding the vocabulary).
+        """
+        return sum(column.itemsize * len(column) for column in (self.starts, self.ends, self.confidences, self.word_ids))
+
+
+def fluency_metrics(timings, duration=None):
+    """
+    Calculates fluency measures from word timings with whole-array NumPy operations: speaking rate,
+    the distribution of pauses between words, fillers and words recognized with low confidence.
+
+    :param timings: A WordTimings instance.
+    :param duration: The length of the recording in seconds (defaults to the end of the last word).
+    :return: A dictionary with the word count, words per minute over the recording ("speech_rate")
+             and over the time spent speaking ("articulation_rate"), a "pauses" summary with a
+             length histogram, a "fillers" summary and a "low_confidence" summary listing the
+             unclear words with their times.
+    """
+    starts, ends, confidences, word_ids = timings.columns()
+    count = len(word_ids)
+    if duration is None:
+        duration = float(ends[-1]) if count else 0.0
+    minutes = duration / 60
+
+    fillers = np.isin(word_ids, timings.ids_of(FILLER_WORDS))
+    filler_count = int(np.count_nonzero(fillers))
+    spoken_words = count - filler_count  # Fillers are not words the learner meant to say
+
+    gaps = starts[1:] - ends[:-1]  # Silence between consecutive words
+    pauses = gaps[gaps >= PAUSE_THRESHOLD].astype(np.float64)
+    histogram = np.bincount(np.searchsorted(PAUSE_BUCKETS, pauses, side="right"), minlength=len(PAUSE_BUCKETS) + 1)
+    bucket_names = [f"{low}-{high}s" for low, high in zip((PAUSE_THRESHOLD,) + PAUSE_BUCKETS, PAUSE_BUCKETS)]
+    bucket_names.append(f"{PAUSE_BUCKETS[-1]}s+")
+
+    # Time spent speaking: from the first word to the last, minus the pauses
+    speaking_time = float(ends[-1] - starts[0]) - float(pauses.sum()) if count else 0.0
+
+    unclear = np.flatnonzero(confidences < LOW_CONFIDENCE)
+    listed = unclear[:LOW_CONFIDENCE_LIST_SIZE]
+    return {
+        "words": count,
+        "duration": round(duration, 3),
+        "speech_rate": round(spoken_words / minutes, 1) if minutes > 0 else 0.0,
+        "articulation_rate": round(spoken_words / speaking_time * 60, 1) if speaking_time > 0 else 0.0,
+        "mean_confidence": round(float(confidences.mean()), 3) if count else 0.0,
+        "pauses": {
+            "count": len(pauses),
+            "total": round(float(pauses.sum()), 3),
+            "mean": round(float(pauses.mean()), 3) if len(pauses) else 0.0,
+            "median": round(float(np.median(pauses)), 3) if len(pauses) else 0.0,
+            "p90": round(float(np.percentile(pauses, 90)), 3) if len(pauses) else 0.0,
+            "longest": round(float(pauses.max()), 3) if len(pauses) else 0.0,
+            "per_minute": round(len(pauses) / minutes, 1) if minutes > 0 else 0.0,
+            "histogram": dict(zip(bucket_names, histogram.tolist()))
+        },
+        "fillers": {
+            "count": filler_count,
+            "per_minute": round(filler_count / minutes, 1) if minutes > 0 else 0.0,
+            "ratio": round(filler_count / count, 4) if count else 0.0
+        },
+        "low_confidence": {
+            "count": len(unclear),
+            "ratio": round(len(unclear) / count, 4) if count else 0.0,
+            "words": [
+                {
+                    "word": timings.vocabulary[word_ids[i]],
+                    "start": round(float(starts[i]), 2),
+                    "end": round(float(ends[i]), 2),
+                    "confidence": round(float(confidences[i]), 3)
+                }
+                for i in listed
+            ]
+        }
+    }
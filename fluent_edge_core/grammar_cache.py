@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Maximum number of sentences whose results are kept in memory
+GRAMMAR_CACHE_SIZE = int(os.environ.get("FLUENT_EDGE_GRAMMAR_CACHE_SIZE", "10000"))
+
+# Seconds a cached result stays valid
+GRAMMAR_CACHE_TTL = float(os.environ.get("FLUENT_EDGE_GRAMMAR_CACHE_TTL", "86400"))
+
+# Optional SQLite file that keeps results across restarts (disabled when empty)
+GRAMMAR_CACHE_PATH = os.environ.get("FLUENT_EDGE_GRAMMAR_CACHE_PATH", "")
+
+
+class GrammarCache:
+    def __init__(self, max_entries=GRAMMAR_CACHE_SIZE, ttl=GRAMMAR_CACHE_TTL, path=GRAMMAR_CACHE_PATH):
+        """
+        Sentence-level cache of grammar check results. Recently used results are kept in a
+        bounded in-memory LRU; if a path is given, results are also stored in an SQLite file
+        so they survive restarts.
+
+        :param max_entries: The maximum number of sentences kept in memory.
+        :param ttl: Seconds a result stays valid (0 or less keeps results forever).
+        :param path: Path of the SQLite file for the persistent tier, or None/"" to disable it.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (stored_at, errors), least recently used first
+        self.lock = threading.Lock()
+
+        # Counters showing how much work the cache saves
+        self.hits = 0
+        self.persistent_hits = 0  # Hits served from the SQLite tier (also counted in hits)
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.db = None
+        if path:
+            try:
+                self.db = sqlite3.connect(path, check_same_thread=False)
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS grammar_cache (key TEXT PRIMARY KEY, errors TEXT, stored_at REAL)"
+                )
+                if self.ttl > 0:
+                    self.db.execute("DELETE FROM grammar_cache WHERE stored_at < ?", (time.time() - self.ttl,))
+                self.db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Grammar cache file '{path}' unavailable, using memory only. {e}", flush=True)
+                self.db = None
+
+    @staticmethod
+    def make_key(sentence, language, rule_config=""):
+        """
+        Builds the cache key for a sentence.
+
+        :param sentence: The sentence as it is sent to LanguageTool.
+        :param language: The language code used for checking.
+        :param rule_config: A string describing the enabled/disabled rules.
+        :return: The cache key.
+        """
+        normalized = " ".join(sentence.split())  # Whitespace differences do not change the result
+        return f"{language}\x1f{rule_config}\x1f{normalized}"
+
+    def get(self, key):
+        """
+        Looks up the cached errors for a key.
+
+        :param key: The key built by make_key.
+        :return: The cached list of errors, or None if the key is missing or expired.
+        """
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_at, errors = entry
+                if self._expired(stored_at, now):
+                    del self.entries[key]
+                    self.expirations += 1
+                else:
+                    self.entries.move_to_end(key)  # Mark as most recently used
+                    self.hits += 1
+                    return errors
+
+            if self.db is not None:
+                row = self.db.execute("SELECT errors, stored_at FROM grammar_cache WHERE key = ?", (key,)).fetchone()
+                if row and not self._expired(row[1], now):
+                    errors = json.loads(row[0])
+                    self._remember(key, row[1], errors)  # Promote to the memory tier
+                    self.hits += 1
+                    self.persistent_hits += 1
+                    return errors
+
+            self.misses += 1
+            return None
+
+    def put(self, key, errors):
+        """
+        Stores the errors found for a key.
+
+        :param key: The key built by make_key.
+        :param errors: The list of (JSON-serializable) errors found for the sentence, possibly empty.
+        """
+        now = time.time()
+        with self.lock:
+            self._remember(key, now, errors)
+            if self.db is not None:
+                try:
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO grammar_cache (key, errors, stored_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(errors), now)
+                    )
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Failed to persist grammar cache entry. {e}", flush=True)
+
+    def stats(self):
+        """
+        :return: A dictionary with the cache size and its hit, miss, eviction and expiration counters.
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,  # Share of sentences not sent to LanguageTool
+                "persistent": self.db is not None
+            }
+
+    def _remember(self, key, stored_at, errors):
+        # Insert into the memory tier, evicting the least recently used entries beyond max_entries
+        self.entries[key] = (stored_at, errors)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _expired(self, stored_at, now):
+        return self.ttl > 0 and now - stored_at > self.ttl
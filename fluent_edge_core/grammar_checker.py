@@ -1,32 +1,68 @@
-import language_tool_python
+import bisect
 import logging
+import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .grammar_cache import GrammarCache
+from .language_tool_pool import LanguageToolPool, LANGUAGE_TOOL_INSTANCES, LANGUAGE_TOOL_SERVERS
 
 # Initialize logging for better debugging and tracking
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
+# Maximum number of characters sent to LanguageTool in one batched request
+MAX_BATCH_CHARS = 20000
+
+# Threads running grammar checks in the background (defaults to two per LanguageTool backend)
+GRAMMAR_WORKERS = int(os.environ.get("FLUENT_EDGE_GRAMMAR_WORKERS", "0"))
+
 class GrammarChecker:
-    def __init__(self, language="en-US"):
+    def __init__(self, language="en-US", batch=True, max_batch_chars=MAX_BATCH_CHARS, cache=None,
+                 instances=1, servers=None, workers=0, executor=None):
         """
-        Initializes the GrammarChecker class and loads LanguageTool for a specific language.
+        Initializes the GrammarChecker class and loads a pool of LanguageTool backends for a specific language.
 
         :param language: The language to be used for grammar checking (default is "en-US").
+        :param batch: If True, sentences are sent to LanguageTool together in as few requests as possible
+                      instead of one request per sentence.
+        :param max_batch_chars: The maximum size of one batched request, in characters.
+        :param cache: An optional GrammarCache; sentences found in it are not sent to LanguageTool.
+        :param instances: The number of local LanguageTool servers to start.
+        :param servers: URLs of running LanguageTool servers to use instead of local ones.
+        :param workers: The number of threads serving submit() and check_many() (0 means two per backend).
+        :param executor: An existing executor to use instead of creating one with `workers` threads.
         """
+        self.language = language
+        self.batch = batch
+        self.max_batch_chars = max_batch_chars
+        self.cache = cache
+        self.tool = None
         try:
-            # Load LanguageTool for the specified language
-            self.tool = language_tool_python.LanguageTool(language)
-            logger.info(f"✅ Grammar checker initialized successfully for {language}.")
+            # Load the LanguageTool backends for the specified language
+            pool = LanguageToolPool(language, instances=instances, servers=servers)
+            if pool.size:
+                self.tool = pool
+                logger.info(f"✅ Grammar checker initialized successfully for {language}.")
+            else:
+                logger.error("❌ Failed to initialize grammar checker: no LanguageTool backend started.")
         except Exception as e:
             logger.error(f"❌ Failed to initialize grammar checker: {e}")
             self.tool = None  # Set tool to None if initialization fails
 
+        # Thread-pool front end, so concurrent sessions and bulk jobs use every backend
+        backend_count = self.tool.size if self.tool else 1
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=workers or 2 * backend_count, thread_name_prefix="grammar"
+        )
+
     def check_grammar(self, text):
         """
         Checks grammar and spelling mistakes in the provided text.
 
         :param text: The input text to check for errors.
-        :return: A list of error details, including suggestions and rule ID.
+        :return: A list of error details, including suggestions and rule ID. "offset" is relative to the
+                 sentence, "text_offset" to the whole text.
         """
         if not self.tool:
             logger.error("❌ Grammar checker is not initialized.")  # Error if tool is not initialized
@@ -38,8 +74,9 @@ class GrammarChecker:
             return []
 
         try:
-            # Split text into sentences for better analysis
+            # Split text into sentences for better analysis, remembering where each one starts
             sentences = re.split(r"(?<=[.!?])\s+", text)
+            sentence_starts = [0] + [m.end() for m in re.finditer(r"(?<=[.!?])\s+", text)]
 
             # Capitalize the first letter of each sentence
             sentences = [s.strip().capitalize() if s else "" for s in sentences]
@@ -47,21 +84,37 @@ class GrammarChecker:
             errors = []
             logger.info(f"📝 Checking grammar for text:\n{text}")
 
-            # Check each sentence for grammar/spelling errors
-            for sentence in sentences:
-                matches = self.tool.check(sentence)
-                for match in matches:
-                    # Collect error details for each issue found
-                    error_details = {
-                        "sentence": sentence,
-                        "message": match.message,
-                        "suggestions": match.replacements if match.replacements else ["No suggestion"],
-                        "offset": match.offset,
-                        "length": match.errorLength,
-                        "rule_id": match.ruleId
-                    }
-                    errors.append(error_details)  # Add the error details to the list
-                    logger.info(f"🚨 Issue: {match.message} | Suggestion: {match.replacements} | Rule: {match.ruleId}")
+            # Take the results of known sentences from the cache, the rest still has to be checked
+            pending = []
+            for sentence, sentence_start in zip(sentences, sentence_starts):
+                cached = self.cache.get(self._cache_key(sentence)) if self.cache is not None else None
+                if cached is None:
+                    pending.append((sentence, sentence_start))
+                else:
+                    errors.extend(self._error_details(sentence, sentence_start, issue) for issue in cached)
+
+            # Check the remaining sentences for grammar/spelling errors
+            checked = self._check_batched(pending) if self.batch else self._check_each(pending)
+
+            found = {}  # sentence_start -> issues found in that sentence
+            for sentence, sentence_start, offset, match in checked:
+                # Collect error details for each issue found
+                found.setdefault(sentence_start, []).append({
+                    "message": match.message,
+                    "suggestions": match.replacements if match.replacements else ["No suggestion"],
+                    "offset": offset,
+                    "length": match.errorLength,
+                    "rule_id": match.ruleId
+                })
+                logger.info(f"🚨 Issue: {match.message} | Suggestion: {match.replacements} | Rule: {match.ruleId}")
+
+            for sentence, sentence_start in pending:
+                issues = found.get(sentence_start, [])
+                if self.cache is not None:
+                    self.cache.put(self._cache_key(sentence), issues)  # Clean sentences are cached too
+                errors.extend(self._error_details(sentence, sentence_start, issue) for issue in issues)
+
+            errors.sort(key=lambda error: error["text_offset"])  # Cached and fresh errors in text order
 
             # Log the total number of errors found
             if errors:
@@ -75,8 +128,109 @@ class GrammarChecker:
             logger.error(f"❌ Grammar check failed: {e}")
             return []  # Return an empty list if an error occurs during grammar check
 
-# Initialize the grammar checker instance for English (US)
-grammar_checker = GrammarChecker(language="en-US")
+    def submit(self, text):
+        """
+        Checks the text on the background thread pool.
+
+        :param text: The input text to check for errors.
+        :return: A Future whose result is the list of errors.
+        """
+        return self.executor.submit(self.check_grammar, text)
+
+    def check_many(self, texts):
+        """
+        Checks several texts concurrently, spreading them over the LanguageTool backends.
+
+        :param texts: An iterable of texts to check.
+        :return: A list with the errors of each text, in the same order as the texts.
+        """
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def _error_details(self, sentence, sentence_start, issue):
+        # Builds the error dictionary returned to callers from a sentence-level issue
+        return {
+            "sentence": sentence,
+            "message": issue["message"],
+            "suggestions": issue["suggestions"],
+            "offset": issue["offset"],
+            "text_offset": sentence_start + issue["offset"],  # Offset within the whole checked text
+            "length": issue["length"],
+            "rule_id": issue["rule_id"]
+        }
+
+    def _cache_key(self, sentence):
+        # Results depend on the sentence, the language and the rules LanguageTool applies
+        rule_config = ";".join(
+            f"{name}={','.join(sorted(getattr(self.tool, name, None) or []))}"
+            for name in ("enabled_rules", "disabled_rules", "enabled_categories", "disabled_categories")
+        )
+        return GrammarCache.make_key(sentence, self.language, rule_config)
+
+    def _check_each(self, sentences):
+        # One LanguageTool request per (sentence, sentence_start) pair; yields (sentence, sentence_start, offset_in_sentence, match)
+        for sentence, sentence_start in sentences:
+            for match in self.tool.check(sentence):
+                yield sentence, sentence_start, match.offset, match
+
+    def _check_batched(self, sentences):
+        # One LanguageTool request per batch of (sentence, sentence_start) pairs; match offsets are mapped back to their sentence
+        for batch in self._batches(sentences):
+            batch_offsets = []  # Where each sentence starts in the joined batch text
+            position = 0
+            for sentence, _ in batch:
+                batch_offsets.append(position)
+                position += len(sentence) + 1  # Sentences are joined with a single space
+
+            batch_text = " ".join(sentence for sentence, _ in batch)
+            for match in self.tool.check(batch_text):
+                index = max(0, bisect.bisect_right(batch_offsets, match.offset) - 1)  # Sentence holding the match
+                sentence, sentence_start = batch[index]
+                yield sentence, sentence_start, match.offset - batch_offsets[index], match
+
+    def _batches(self, sentences):
+        # Groups consecutive (sentence, sentence_start) pairs into batches of at most max_batch_chars characters
+        batch, size = [], 0
+        for sentence, sentence_start in sentences:
+            if batch and size + len(sentence) + 1 > self.max_batch_chars:
+                yield batch
+                batch, size = [], 0
+            batch.append((sentence, sentence_start))
+            size += len(sentence) + 1
+        if batch:
+            yield batch
+
+# Result cache shared by every grammar check
+grammar_cache = GrammarCache()
+
+# Thread-pool front end for background checks; it exists before LanguageTool has started,
+# so work submitted during start-up simply waits for the grammar checker
+grammar_executor = ThreadPoolExecutor(
+    max_workers=GRAMMAR_WORKERS or 2 * (len(LANGUAGE_TOOL_SERVERS) or LANGUAGE_TOOL_INSTANCES),
+    thread_name_prefix="grammar"
+)
+
+# The grammar checker instance for English (US) is created on first use (or by the startup warm-up)
+_grammar_checker = None
+_grammar_checker_lock = threading.Lock()
+
+def get_grammar_checker(wait=True):
+    """
+    Returns the shared GrammarChecker, starting the LanguageTool backends on the first call.
+
+    :param wait: If False, return None instead of starting or waiting for the grammar checker.
+    :return: The GrammarChecker instance (or None, see wait).
+    """
+    global _grammar_checker
+    if not wait:
+        return _grammar_checker
+    with _grammar_checker_lock:
+        if _grammar_checker is None:
+            _grammar_checker = GrammarChecker(
+                language="en-US", cache=grammar_cache, instances=LANGUAGE_TOOL_INSTANCES,
+                servers=LANGUAGE_TOOL_SERVERS, executor=grammar_executor
+            )
+        return _grammar_checker
 
 # External function for checking grammar
 def check_grammar(text):
@@ -86,7 +240,17 @@ def check_grammar(text):
     :param text: The input text to check for errors.
     :return: List of errors detected by the grammar checker.
     """
-    return grammar_checker.check_grammar(text)
+    return get_grammar_checker().check_grammar(text)
+
+# External function for checking several texts concurrently
+def check_many(texts):
+    """
+    External function to check the grammar of several texts using the GrammarChecker instance.
+
+    :param texts: An iterable of texts to check.
+    :return: A list with the errors of each text, in the same order as the texts.
+    """
+    return get_grammar_checker().check_many(texts)
 
 def capitalize_sentences(text):
     """
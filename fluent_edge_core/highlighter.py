@@ -0,0 +1,58 @@
+import html
+
+# CSS classes of the span wrapped around each grammar error
+HIGHLIGHT_CLASS = "text-red-500 underline"
+
+
+def error_spans(text, errors):
+    """
+    Turns grammar errors into the character ranges to highlight. Ranges are clamped to the text,
+    and ranges that overlap are merged into one, so no two highlights ever nest.
+
+    :param text: The transcript the errors refer to.
+    :param errors: Error dictionaries with a "text_offset" (or "offset") and a "length" into text.
+    :return: A list of (start, end, messages) tuples, ordered by start and not overlapping.
+    """
+    ranges = []
+    for error in errors or []:
+        start = error.get("text_offset", error.get("offset"))
+        length = error.get("length")
+        if start is None or not length:
+            continue  # The error cannot be placed in the text
+        start = max(0, min(int(start), len(text)))
+        end = max(start, min(start + int(length), len(text)))
+        if end > start:
+            ranges.append((start, end, error.get("message", "")))
+    ranges.sort(key=lambda item: (item[0], -item[1]))
+
+    spans = []
+    for start, end, message in ranges:
+        if spans and start < spans[-1][1]:  # Overlaps the previous highlight, extend it instead of nesting
+            last_start, last_end, messages = spans[-1]
+            if message and message not in messages:
+                messages.append(message)
+            spans[-1] = (last_start, max(last_end, end), messages)
+        else:
+            spans.append((start, end, [message] if message else []))
+    return spans
+
+
+def highlight_errors(text, errors, css_class=HIGHLIGHT_CLASS):
+    """
+    Marks the grammar errors in a transcript with HTML spans in a single pass over the text.
+    The transcript is HTML-escaped, and each error's message is shown as the span's tooltip.
+
+    :param text: The transcript the errors refer to.
+    :param errors: Error dictionaries with a "text_offset" (or "offset") and a "length" into text.
+    :param css_class: The CSS classes of the highlight spans.
+    :return: The transcript as HTML with every error wrapped in a span.
+    """
+    parts = []
+    position = 0  # End of the text already copied to parts
+    for start, end, messages in error_spans(text, errors):
+        parts.append(html.escape(text[position:start]))
+        title = html.escape(" / ".join(messages), quote=True)
+        parts.append(f"<span class='{css_class}' title='{title}'>{html.escape(text[start:end])}</span>")
+        position = end
+    parts.append(html.escape(text[position:]))
+    return "".join(parts)
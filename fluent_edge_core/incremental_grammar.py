@@ -0,0 +1,107 @@
+import bisect
+import json
+import re
+import threading
+from concurrent.futures import wait
+from .grammar_checker import check_grammar, grammar_executor
+from .segment_store import SegmentStore
+
+
+class IncrementalGrammarChecker:
+    def __init__(self, channel=None, executor=None, check=None):
+        """
+        Grammar-checks a session's transcript one finished utterance at a time, while the learner
+        is still speaking. Each utterance is checked in the background as soon as it arrives, so
+        at stop only the utterances still in flight have to be waited for.
+
+        :param channel: An optional TranscriptChannel that receives each utterance's errors as a
+                        "GRAMMAR_ERRORS" event, until results() is called.
+        :param executor: The executor running the checks (defaults to the shared grammar_executor).
+        :param check: The function used to check a piece of text (defaults to check_grammar).
+        """
+        self.channel = channel
+        self.executor = executor or grammar_executor
+        self.check = check or check_grammar
+        self.segments = SegmentStore()  # Utterances of the running transcript, in order
+        self.length = 0  # Length of the running transcript (segments joined by single spaces)
+        self.futures = []  # Pending or finished checks, one per utterance
+        self.finished = False  # Set by results(); later checks are only part of the final list
+        self.lock = threading.Lock()
+
+    def add_segment(self, text):
+        """
+        Appends an utterance to the running transcript and queues it for checking.
+
+        :param text: The finished utterance as it appears in the live transcript.
+        """
+        text = text.strip()
+        if not text:
+            return
+        with self.lock:
+            offset = self.length + 1 if self.segments else 0  # Segments are separated by one space
+            self.segments.append(text)
+            self.length = offset + len(text)
+            future = self.executor.submit(self._check_segment, text, offset)
+            self.futures.append(future)
+
+    def _check_segment(self, text, offset):
+        errors = self.check(text) or []
+        for error in errors:
+            error["text_offset"] = offset + error.get("text_offset", 0)  # Offset into the running transcript
+        with self.lock:  # No increment may follow the final list of the session
+            if errors and self.channel and not self.finished:
+                self.channel.publish("GRAMMAR_ERRORS", json.dumps(errors))
+        return errors
+
+    def transcript(self):
+        """
+        :return: The running transcript that the "text_offset" of every error refers to.
+        """
+        with self.lock:
+            return self.segments.text()
+
+    def results(self, timeout=None):
+        """
+        Waits for the outstanding checks and returns every error found so far. Checks that finish
+        from now on are no longer published, as the caller publishes this list as the final one.
+
+        :param timeout: Maximum seconds to wait for the checks still in flight (None waits for all).
+        :return: The errors of all finished checks, ordered by their position in the running transcript.
+        """
+        with self.lock:
+            self.finished = True
+            futures = list(self.futures)
+        wait(futures, timeout=timeout)
+
+        errors = []
+        for future in futures:
+            if future.done() and not future.exception():
+                errors.extend(future.result())
+        return sorted(errors, key=lambda error: error["text_offset"])
+
+
+def remap_offsets(errors, source_text, target_text):
+    """
+    Moves the "text_offset" of each error from source_text onto target_text. Both texts must
+    contain the same words in the same order and differ only in punctuation and capitalization,
+    as the live transcript and its punctuation-restored version do.
+
+    :param errors: Error dictionaries with "text_offset" values into source_text (updated in place).
+    :param source_text: The text the offsets currently refer to.
+    :param target_text: The text the offsets should refer to.
+    :return: The updated errors. They are returned unchanged if the word sequences differ.
+    """
+    source_words = [(m.start(), m.end()) for m in re.finditer(r"\S+", source_text)]
+    target_words = [(m.start(), m.end()) for m in re.finditer(r"\S+", target_text)]
+    if len(source_words) != len(target_words):
+        return errors  # Not the same word sequence, the offsets cannot be mapped
+
+    source_starts = [start for start, _ in source_words]
+    for error in errors:
+        offset = error["text_offset"]
+        index = max(0, bisect.bisect_right(source_starts, offset) - 1)  # Word containing the offset
+        source_start, _ = source_words[index]
+        target_start, target_end = target_words[index]
+        error["text_offset"] = min(target_start + (offset - source_start), target_end)
+    return errors
+
@@ -0,0 +1,191 @@
+import itertools
+import language_tool_python
+import logging
+import os
+import threading
+import time
+from .metrics import language_tool_latency
+
+logger = logging.getLogger(__name__)
+
+# Number of local LanguageTool servers started by the pool
+LANGUAGE_TOOL_INSTANCES = int(os.environ.get("FLUENT_EDGE_LANGUAGE_TOOL_INSTANCES", "1"))
+
+# Comma-separated URLs of LanguageTool servers that are already running (used instead of local servers)
+LANGUAGE_TOOL_SERVERS = [url.strip() for url in os.environ.get("FLUENT_EDGE_LANGUAGE_TOOL_SERVERS", "").split(",") if url.strip()]
+
+# Seconds between two health checks of the backends
+HEALTH_CHECK_INTERVAL = float(os.environ.get("FLUENT_EDGE_LANGUAGE_TOOL_HEALTH_INTERVAL", "30"))
+
+# Text sent to a backend to find out whether it still answers
+HEALTH_CHECK_TEXT = "This is a health check."
+
+
+class LanguageToolBackend:
+    def __init__(self, name, tool):
+        """
+        One LanguageTool instance (a local server or a connection to a remote one) with its load counters.
+
+        :param name: A readable name for the backend (e.g., "local-0" or the server URL).
+        :param tool: The language_tool_python.LanguageTool instance.
+        """
+        self.name = name
+        self.tool = tool
+        self.in_flight = 0  # Requests currently running on this backend
+        self.requests = 0  # Requests sent so far
+        self.failures = 0  # Requests or health checks that failed
+        self.healthy = True
+
+
+class LanguageToolPool:
+    def __init__(self, language="en-US", instances=LANGUAGE_TOOL_INSTANCES, servers=None,
+                 dispatch="least_busy", health_check_interval=HEALTH_CHECK_INTERVAL):
+        """
+        Spreads grammar checks over several LanguageTool instances. It offers the same check(text)
+        call as a single LanguageTool, so it can be used wherever one is expected.
+
+        :param language: The language to be used for grammar checking.
+        :param instances: The number of local LanguageTool servers to start (ignored if servers are given).
+        :param servers: URLs of running LanguageTool servers to connect to instead of starting local ones.
+        :param dispatch: "least_busy" sends each request to the healthy backend with the fewest requests
+                         in flight, "round_robin" cycles through the healthy backends.
+        :param health_check_interval: Seconds between background health checks (0 disables them).
+        """
+        self.language = language
+        self.dispatch = dispatch
+        self.backends = []
+        self.lock = threading.Lock()
+        self.rotation = itertools.count()  # Breaks ties between equally busy backends
+
+        # Rule settings shared by every backend, so they all answer the same way
+        self.enabled_rules = set()
+        self.disabled_rules = set()
+        self.enabled_categories = set()
+        self.disabled_categories = set()
+
+        targets = [(url, {"remote_server": url}) for url in servers] if servers else \
+                  [(f"local-{i}", {}) for i in range(instances)]
+        for name, options in targets:
+            try:
+                tool = language_tool_python.LanguageTool(language, **options)
+            except Exception as e:
+                logger.error(f"❌ Failed to start LanguageTool backend {name}: {e}")
+                continue
+            self._share_rule_settings(tool)
+            self.backends.append(LanguageToolBackend(name, tool))
+        logger.info(f"✅ LanguageTool pool ready with {len(self.backends)} backend(s).")
+
+        self.stop_event = threading.Event()
+        if health_check_interval > 0 and self.backends:
+            threading.Thread(
+                target=self._health_check_loop, args=(health_check_interval,), daemon=True
+            ).start()
+
+    @property
+    def size(self):
+        """
+        :return: The number of backends in the pool.
+        """
+        return len(self.backends)
+
+    def check(self, text):
+        """
+        Checks the text on one backend. If that backend fails, it is marked unhealthy and the
+        request is retried on the next one.
+
+        :param text: The text to check.
+        :return: The list of LanguageTool matches.
+        :raises Exception: The last backend error if no backend could check the text.
+        """
+        tried = set()
+        last_error = None
+        while len(tried) < len(self.backends):
+            backend = self._acquire(tried)
+            tried.add(backend.name)
+            started = time.perf_counter()
+            try:
+                matches = backend.tool.check(text)
+                language_tool_latency.labels(backend.name, "ok").observe(time.perf_counter() - started)
+                return matches
+            except Exception as e:
+                language_tool_latency.labels(backend.name, "error").observe(time.perf_counter() - started)
+                last_error = e
+                backend.failures += 1
+                backend.healthy = False
+                logger.warning(f"⚠️ LanguageTool backend {backend.name} failed, trying another one: {e}")
+            finally:
+                with self.lock:
+                    backend.in_flight -= 1
+        raise last_error or RuntimeError("No LanguageTool backend available.")
+
+    def health_check(self):
+        """
+        Sends a small request to every backend and records whether it answered.
+
+        :return: The number of healthy backends.
+        """
+        for backend in self.backends:
+            try:
+                backend.tool.check(HEALTH_CHECK_TEXT)
+                if not backend.healthy:
+                    logger.info(f"✅ LanguageTool backend {backend.name} is healthy again.")
+                backend.healthy = True
+            except Exception as e:
+                backend.failures += 1
+                backend.healthy = False
+                logger.warning(f"⚠️ LanguageTool backend {backend.name} failed its health check: {e}")
+        return sum(1 for backend in self.backends if backend.healthy)
+
+    def stats(self):
+        """
+        :return: A list with the name, health and load counters of every backend.
+        """
+        with self.lock:
+            return [
+                {
+                    "name": backend.name,
+                    "healthy": backend.healthy,
+                    "in_flight": backend.in_flight,
+                    "requests": backend.requests,
+                    "failures": backend.failures
+                }
+                for backend in self.backends
+            ]
+
+    def close(self):
+        """
+        Stops the health checks and shuts down the local LanguageTool servers.
+        """
+        self.stop_event.set()
+        for backend in self.backends:
+            try:
+                backend.tool.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to close LanguageTool backend {backend.name}: {e}")
+
+    def _acquire(self, exclude):
+        # Picks a backend not in exclude (healthy ones first) and counts the request against it
+        with self.lock:
+            candidates = [backend for backend in self.backends if backend.name not in exclude]
+            healthy = [backend for backend in candidates if backend.healthy]
+            candidates = healthy or candidates  # With no healthy backend left, try the others anyway
+            start = next(self.rotation) % len(candidates)
+            candidates = candidates[start:] + candidates[:start]
+            if self.dispatch == "least_busy":
+                backend = min(candidates, key=lambda candidate: candidate.in_flight)
+            else:
+                backend = candidates[0]
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def _share_rule_settings(self, tool):
+        # Point the backend's rule settings at the pool's sets
+        tool.enabled_rules = self.enabled_rules
+        tool.disabled_rules = self.disabled_rules
+        tool.enabled_categories = self.enabled_categories
+        tool.disabled_categories = self.disabled_categories
+
+    def _health_check_loop(self, interval):
+        while not self.stop_event.wait(interval):
+            self.health_check()
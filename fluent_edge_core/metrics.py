@@ -0,0 +1,306 @@
+import bisect
+import math
+import threading
+import time
+
+# Content type of the Prometheus text exposition format served by /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Default histogram buckets, in seconds (from 1 ms to 10 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Buckets of the recognizer's real-time factor (processing time divided by audio duration)
+REAL_TIME_FACTOR_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0)
+
+
+class Metric:
+    kind = None  # Metric type written in the exposition format
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Base of the metric types. A metric with label names is a family: its values live in
+        children returned by labels(), which should be looked up once and kept by hot code paths.
+
+        :param name: The metric name (e.g., "fluent_edge_sessions_started_total").
+        :param documentation: The help text.
+        :param labelnames: The names of the labels that tell the children apart.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}  # label values -> child metric
+        self.lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        :param values: One value per label name, in order.
+        :return: The child metric holding the values of these labels (created on first use).
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects the labels {self.labelnames}.")
+        values = tuple(str(value) for value in values)
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self._child())
+        return child
+
+    def samples(self):
+        """
+        :return: A list of (suffix, labels, value) tuples, where labels is a list of (name, value) pairs.
+        """
+        if not self.labelnames:
+            return self._samples([])
+        samples = []
+        for values, child in sorted(self.children.items()):
+            samples.extend(child._samples(list(zip(self.labelnames, values))))
+        return samples
+
+    def _child(self):
+        return type(self)(self.name, self.documentation)
+
+    def _samples(self, labels):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        A value that only goes up, such as a number of events.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        """
+        :param amount: The amount to add (not negative).
+        """
+        with self.lock:
+            self.value += amount
+
+    def _samples(self, labels):
+        return [("", labels, self.value)]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        A value that goes up and down. It can also be read from a function when /metrics is
+        scraped, so values that already exist elsewhere cost nothing to keep up to date.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount=1.0):
+        with self.lock:
+            self.value -= amount
+
+    def set_function(self, function):
+        """
+        :param function: A function without arguments returning the current value, called on every scrape.
+        """
+        self.function = function
+
+    def _samples(self, labels):
+        return [("", labels, self.function() if self.function else self.value)]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Counts observations (e.g., latencies) in buckets with fixed upper bounds. Recording one is a
+        binary search and two additions, so it is cheap enough for the audio loop.
+
+        :param buckets: The upper bounds of the buckets, in increasing order (+Inf is added).
+        """
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(float(bound) for bound in buckets)
+        self.counts = [0] * (len(self.upper_bounds) + 1)  # The last bucket holds what exceeds every bound
+        self.sum = 0.0
+
+    def observe(self, value):
+        """
+        :param value: The observed value.
+        """
+        index = bisect.bisect_left(self.upper_bounds, value)  # First bucket with value <= bound
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        """
+        :return: A context manager that observes the seconds spent in its block.
+        """
+        return _Timer(self)
+
+    def _child(self):
+        return Histogram(self.name, self.documentation, buckets=self.upper_bounds)
+
+    def _samples(self, labels):
+        with self.lock:
+            counts, total = list(self.counts), self.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds + (math.inf,), counts):
+            cumulative += count
+            samples.append(("_bucket", labels + [("le", bound)], cumulative))
+        samples.append(("_sum", labels, total))
+        samples.append(("_count", labels, cumulative))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Holds the application's metrics and writes them in the Prometheus text format.
+        """
+        self.metrics = {}  # name -> metric, in registration order
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        :param metric: A Counter, Gauge or Histogram.
+        :return: The metric.
+        :raises ValueError: If a metric with the same name is already registered.
+        """
+        with self.lock:
+            if metric.name in self.metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """
+        :return: Every metric in the Prometheus text exposition format (version 0.0.4).
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation, help_text=True)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                label_text = ",".join(f'{name}="{_escape(_format(value_))}"' for name, value_ in labels)
+                lines.append(f"{metric.name}{suffix}{{{label_text}}} {_format(value)}" if labels else
+                             f"{metric.name}{suffix} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def merge_metrics(texts, label="worker"):
+    """
+    Combines the metrics of several processes (e.g., the workers of serve.py) into one exposition.
+    Every sample gets a label naming its process, so a scraper sees each worker's series instead of
+    those of whichever worker answered, and a "fluent_edge_worker_up" gauge tells which processes
+    could be read.
+
+    :param texts: A dictionary mapping each process name to the text of its registry's render(), or
+                  to None if the process could not be reached.
+    :param label: The name of the label added to every sample.
+    :return: The combined text, with the HELP and TYPE lines of each metric once.
+    """
+    families = {}  # Metric name -> (HELP and TYPE lines, samples of every process), in first-seen order
+    up = []
+    for process, text in texts.items():
+        process_label = f'{label}="{_escape(str(process))}"'
+        up.append(f"fluent_edge_worker_up{{{process_label}}} {0 if text is None else 1}")
+        family = None
+        for line in (text or "").splitlines():
+            if line.startswith("# "):
+                family = families.setdefault(line.split(" ", 3)[2], ([], []))
+                if line not in family[0]:
+                    family[0].append(line)
+            elif line and family is not None:
+                name_end = min(position for position in (line.find("{"), line.find(" ")) if position != -1)
+                if line[name_end] == "{":
+                    family[1].append(f"{line[:name_end + 1]}{process_label},{line[name_end + 1:]}")
+                else:
+                    family[1].append(f"{line[:name_end]}{{{process_label}}}{line[name_end:]}")
+    lines = ["# HELP fluent_edge_worker_up Whether the metrics of the process could be read.",
+             "# TYPE fluent_edge_worker_up gauge"] + up
+    for header, samples in families.values():
+        lines.extend(header)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def _format(value):
+    # Numbers as Prometheus writes them (+Inf, integers without a fraction); label values unchanged
+    if isinstance(value, str):
+        return value
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(text, help_text=False):
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text if help_text else text.replace('"', '\\"')
+
+
+# Metrics of the application, shared by every module
+registry = MetricsRegistry()
+
+active_sessions = registry.gauge("fluent_edge_active_sessions", "Sessions that are recording or finishing their transcription.")
+sessions_started = registry.counter("fluent_edge_sessions_started_total", "Sessions created.")
+sse_subscribers = registry.gauge("fluent_edge_sse_subscribers", "Clients subscribed to a session's event stream.")
+open_connections = registry.gauge("fluent_edge_open_connections", "Client connections open on the asyncio transport.")
+audio_queue_depth = registry.gauge("fluent_edge_audio_queue_frames", "Audio frames captured but not yet recognized, over all sessions.")
+audio_chunks = registry.counter(
+    "fluent_edge_audio_chunks_total", "Audio chunks uploaded by clients, by the status of the upload.", labelnames=("status",)
+)
+audio_seconds = registry.counter("fluent_edge_audio_seconds_total", "Seconds of audio passed to the recognition workers.")
+real_time_factor = registry.histogram(
+    "fluent_edge_recognizer_real_time_factor", "Recognition time of an audio block divided by its duration.",
+    buckets=REAL_TIME_FACTOR_BUCKETS
+)
+caption_latency = registry.histogram(
+    "fluent_edge_caption_latency_seconds",
+    "Time from the arrival of the audio block that ends an utterance to the publication of its caption."
+)
+language_tool_latency = registry.histogram(
+    "fluent_edge_language_tool_seconds", "Duration of LanguageTool requests.", labelnames=("backend", "outcome")
+)
+stop_latency = registry.histogram(
+    "fluent_edge_stop_latency_seconds", "Time from stopping a session to the publication of its last result."
+)
+stage_seconds = registry.histogram(
+    "fluent_edge_stage_seconds", "Time spent in a processing stage.", labelnames=("stage",)
+)
@@ -1,24 +1,80 @@
-import re
+import json
+import os
+
+# Optional JSON file with the punctuation rules of another language or register (English when empty)
+PUNCTUATION_RULES_PATH = os.environ.get("FLUENT_EDGE_PUNCTUATION_RULES", "")
+
+# Rule tables for English; a rules file overrides any of these keys
+DEFAULT_PUNCTUATION_RULES = {
+    # Common sentence starters
+    "sentence_starters": [
+        "i", "we", "you", "they", "he", "she", "it", "this", "that", "these", "those",
+        "the", "a", "an", "my", "your", "his", "her", "their", "our", "when", "where",
+        "why", "how", "what", "who", "which", "if", "because", "since", "while", "although",
+        "however", "therefore", "thus", "hence", "so", "but", "and", "or", "nor", "yet"
+    ],
+    "question_words": ["what", "when", "where", "which", "who", "whom", "whose", "why", "how"],
+    # Words that usually don't end sentences
+    "non_ending_words": ["the", "a", "an", "of", "in", "on", "at", "to", "for", "with", "by", "as", "and", "or", "but"],
+    # Words a comma may be placed before
+    "conjunctions": ["and", "but", "or", "nor", "yet", "so"],
+    "short_word_length": 2,  # Words this short never start a sentence or follow a comma
+    "min_question_words": 4,  # Words a question needs before it can end
+    "min_sentence_words": 4,  # Words a statement needs before it can end
+    "min_comma_words": 4  # Words the sentence needs before a comma is added
+}
+
+
+class PunctuationRules:
+    def __init__(self, rules=None):
+        """
+        The word lists and thresholds of the punctuation rules, compiled once into lowercased
+        frozensets so each word costs a few hash lookups.
+
+        :param rules: A dictionary with any of the keys of DEFAULT_PUNCTUATION_RULES (missing keys
+                      keep their English defaults).
+        """
+        table = dict(DEFAULT_PUNCTUATION_RULES, **(rules or {}))
+        unknown = set(table) - set(DEFAULT_PUNCTUATION_RULES)
+        if unknown:
+            raise ValueError(f"Unknown punctuation rule keys: {sorted(unknown)}.")
+        self.sentence_starters = frozenset(word.lower() for word in table["sentence_starters"])
+        self.question_words = frozenset(word.lower() for word in table["question_words"])
+        self.non_ending_words = frozenset(word.lower() for word in table["non_ending_words"])
+        self.conjunctions = frozenset(word.lower() for word in table["conjunctions"])
+        self.short_word_length = int(table["short_word_length"])
+        self.min_question_words = int(table["min_question_words"])
+        self.min_sentence_words = int(table["min_sentence_words"])
+        self.min_comma_words = int(table["min_comma_words"])
+
+
+def load_punctuation_rules(path=PUNCTUATION_RULES_PATH):
+    """
+    Loads punctuation rules from a JSON file, e.g. for another language or register.
+
+    :param path: The path of a JSON object with any of the keys of DEFAULT_PUNCTUATION_RULES, or
+                 None/"" for the English defaults.
+    :return: The compiled PunctuationRules.
+    """
+    if not path:
+        return PunctuationRules()
+    with open(path, encoding="utf-8") as rules_file:
+        return PunctuationRules(json.load(rules_file))
+
 
 class PunctuationRestorer:
-    def __init__(self):
-        """
-        Initializes the PunctuationRestorer class, defining common sentence starters,
-        question words, and non-ending words that help in restoring punctuation.
-        """
-        # Define common sentence starters
-        self.sentence_starters = [
-            "i", "we", "you", "they", "he", "she", "it", "this", "that", "these", "those", 
-            "the", "a", "an", "my", "your", "his", "her", "their", "our", "when", "where",
-            "why", "how", "what", "who", "which", "if", "because", "since", "while", "although",
-            "however", "therefore", "thus", "hence", "so", "but", "and", "or", "nor", "yet"
-        ]
-        
-        self.question_words = ["what", "when", "where", "which", "who", "whom", "whose", "why", "how"]
-        
-        # Words that usually don't end sentences
-        self.non_ending_words = ["the", "a", "an", "of", "in", "on", "at", "to", "for", "with", "by", "as", "and", "or", "but"]
-        
+    def __init__(self, rules=None):
+        """
+        Initializes the PunctuationRestorer class with the sentence starters, question words,
+        and non-ending words that help in restoring punctuation.
+
+        :param rules: The PunctuationRules to apply (defaults to those loaded from PUNCTUATION_RULES_PATH).
+        """
+        self.rules = rules or load_punctuation_rules()
+        self.sentence_starters = self.rules.sentence_starters
+        self.question_words = self.rules.question_words
+        self.non_ending_words = self.rules.non_ending_words
+
         # Log initialization
         print("✅ Punctuation restorer initialized.", flush=True)
 
@@ -29,72 +85,64 @@ class PunctuationRestorer:
         :param text: The input text that requires punctuation restoration.
         :return: The text with restored punctuation (e.g., periods, commas, question marks).
         """
-        if not text:
+        # Split text into individual words, dropping excess whitespace
+        words = text.split() if text else []
+        if not words:
             return ""  # If the text is empty, return an empty string
-        
-        # Clean up excess spaces and strip leading/trailing whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Split text into individual words for processing
-        words = text.split()
-        sentences = []
-        current_sentence = []
-        
-        # Process each word in the text
-        for i, word in enumerate(words):
-            current_sentence.append(word)
-            
-            # Skip if we're at the last word or the next word is only 1-2 letters
-            if i == len(words) - 1 or len(words[i+1]) <= 2:
+
+        rules = self.rules
+        lowered = text.lower().split()  # Lowercasing never creates or removes whitespace
+        tokens = list(words)  # Output words, with punctuation added
+        sentence_starts = [0]  # Index of the first word of each sentence
+        start = 0
+        last = len(words) - 1
+
+        # Process each word that has a next word (the last one only gets the final period)
+        for i in range(last):
+            # Skip if the next word is only 1-2 letters
+            if len(words[i + 1]) <= rules.short_word_length:
                 continue
-            
-            next_word = words[i+1].lower()
-            
-            # Flag to determine if a sentence should end here
+
+            word = words[i]
+            next_word = lowered[i + 1]
+            length = i - start + 1  # Words in the current sentence, including this one
             end_sentence = False
-            
+
             # Check if the current word ends with a question mark
             if word.endswith("?"):
                 end_sentence = True
             # Check for question sentence patterns
-            elif i >= 2 and words[i-2].lower() in self.question_words and len(current_sentence) > 3:
+            elif i >= 2 and lowered[i - 2] in rules.question_words and length >= rules.min_question_words:
                 end_sentence = True
-                current_sentence[-1] = current_sentence[-1] + "?"  # Add a question mark to the sentence
+                tokens[i] = word + "?"  # Add a question mark to the sentence
             # Check for statement sentence patterns
-            elif (next_word in self.sentence_starters and 
-                  word.lower() not in self.non_ending_words and
-                  len(current_sentence) >= 4):
+            elif (next_word in rules.sentence_starters and
+                  lowered[i] not in rules.non_ending_words and
+                  length >= rules.min_sentence_words):
                 end_sentence = True
                 # Don't add period if the word already has punctuation
-                if not word[-1] in ".!?":
-                    current_sentence[-1] = current_sentence[-1] + "."  # Add a period to end the sentence
-            
+                if word[-1] not in ".!?":
+                    tokens[i] = word + "."  # Add a period to end the sentence
             # Add commas for natural pauses between conjunctions
-            elif (i < len(words) - 2 and 
-                  next_word in ["and", "but", "or", "nor", "yet", "so"] and
-                  len(current_sentence) > 3):
-                if not word[-1] in ",.!?":
-                    current_sentence[-1] = current_sentence[-1] + ","  # Add a comma for a pause
-            
-            # Finalize the sentence
+            elif i < last - 1 and next_word in rules.conjunctions and length >= rules.min_comma_words:
+                if word[-1] not in ",.!?":
+                    tokens[i] = word + ","  # Add a comma for a pause
+
+            # Start a new sentence after this word
             if end_sentence:
-                sentences.append(" ".join(current_sentence))  # Add the current sentence to the list
-                current_sentence = []  # Start a new sentence
-        
-        # If there are any words left in the current sentence, finalize it
-        if current_sentence:
-            last_text = " ".join(current_sentence)
-            if not last_text[-1] in ".!?":
-                last_text += "."  # Add a period to the last sentence if needed
-            sentences.append(last_text)
-        
+                start = i + 1
+                sentence_starts.append(start)
+
+        # Add a period to the last sentence if needed
+        if tokens[last][-1] not in ".!?":
+            tokens[last] += "."
+
         # Capitalize the first letter of each sentence
-        sentences = [s[0].upper() + s[1:] if s else "" for s in sentences]
-        
-        # Join all sentences into a single text with proper punctuation
-        result = " ".join(sentences)
-        
-        return result
+        for i in sentence_starts:
+            tokens[i] = tokens[i][0].upper() + tokens[i][1:]
+
+        # Join all words into a single text with proper punctuation
+        return " ".join(tokens)
 
     def process_streaming_text(self, text):
         """
@@ -111,3 +159,97 @@ class PunctuationRestorer:
         text = text[0].upper() + text[1:]
         
         return text
+
+
+class IncrementalPunctuator:
+    def __init__(self, restorer):
+        """
+        Applies the rules of PunctuationRestorer.restore_punctuation to a transcript that arrives
+        one utterance at a time. A word is punctuated as soon as the words its rules look at are
+        known: the next word, and the one after it when the next word is a conjunction. Only those
+        one or two words are carried over to the next utterance, so every utterance is punctuated
+        while the learner speaks, and the joined output equals restore_punctuation of the whole text.
+
+        :param restorer: The PunctuationRestorer whose rules are used.
+        """
+        self.rules = restorer.rules
+        self.pending = []  # Words received but not punctuated yet (the carry-over window)
+        self.previous = []  # The last two punctuated words, as received
+        self.sentence = []  # Punctuated words of the sentence in progress
+        self.sentences = []  # Sentences completed since the last call to take_sentences
+
+    def add(self, text):
+        """
+        Adds the raw text of an utterance.
+
+        :param text: The recognized text, without punctuation.
+        :return: The newly punctuated words (possibly empty); the last word or two may be held back.
+        """
+        self.pending.extend(text.split())
+        output = []
+        while len(self.pending) >= 3 or (len(self.pending) == 2 and self.pending[1].lower() not in self.rules.conjunctions):
+            output.append(self._punctuate(has_following=len(self.pending) >= 3))
+        return " ".join(output)
+
+    def finish(self):
+        """
+        Ends the transcript: punctuates the held-back words and closes the last sentence.
+
+        :return: The remaining punctuated words (possibly empty).
+        """
+        output = []
+        while len(self.pending) > 1:
+            output.append(self._punctuate(has_following=len(self.pending) >= 3))
+        if self.pending:
+            word = self._capitalize(self.pending.pop(0))
+            if word[-1] not in ".!?":
+                word += "."  # Add a period to the last sentence if needed
+            output.append(word)
+            self.sentence.append(word)
+        if self.sentence:
+            self.sentences.append(" ".join(self.sentence))
+        self.previous, self.sentence = [], []
+        return " ".join(output)
+
+    def take_sentences(self):
+        """
+        :return: The sentences completed since the last call, e.g. to check their grammar.
+        """
+        sentences, self.sentences = self.sentences, []
+        return sentences
+
+    def _punctuate(self, has_following):
+        # Punctuates the oldest pending word, which has at least one word after it
+        word, next_word = self.pending[0], self.pending[1]
+        output = word
+        length = len(self.sentence) + 1  # Words in the sentence including this one
+        end_sentence = False
+        rules = self.rules
+        if len(next_word) > rules.short_word_length:  # Short next words never start a sentence or follow a comma
+            lower_next = next_word.lower()
+            if word.endswith("?"):
+                end_sentence = True
+            elif (len(self.previous) == 2 and self.previous[0].lower() in rules.question_words and
+                  length >= rules.min_question_words):
+                end_sentence = True
+                output += "?"
+            elif (lower_next in rules.sentence_starters and
+                  word.lower() not in rules.non_ending_words and length >= rules.min_sentence_words):
+                end_sentence = True
+                if word[-1] not in ".!?":
+                    output += "."
+            elif has_following and lower_next in rules.conjunctions and length >= rules.min_comma_words:
+                if word[-1] not in ",.!?":
+                    output += ","
+
+        output = self._capitalize(output)
+        self.sentence.append(output)
+        if end_sentence:
+            self.sentences.append(" ".join(self.sentence))
+            self.sentence = []
+        self.previous = (self.previous + [self.pending.pop(0)])[-2:]
+        return output
+
+    def _capitalize(self, word):
+        # The first word of a sentence starts with a capital letter
+        return word[0].upper() + word[1:] if not self.sentence else word
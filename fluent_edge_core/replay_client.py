@@ -0,0 +1,183 @@
+import argparse
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import numpy as np
+from .audio_ingest import read_wav_file, TARGET_SAMPLE_RATE
+
+# Milliseconds of audio uploaded per request (the browser sends the same amount)
+REPLAY_CHUNK_MS = 100
+
+# Seconds to wait before retrying an upload the server refused because it was busy (if it gives no hint)
+DEFAULT_RETRY_AFTER = 0.2
+
+# Event that ends the results of a session
+LAST_EVENT = "DONE"
+
+
+class ReplayClient:
+    def __init__(self, base_url, chunk_ms=REPLAY_CHUNK_MS, realtime=True, timeout=30):
+        """
+        Plays a WAV file to the server the way the browser streams the microphone: it starts a
+        "browser" session, uploads 16 kHz int16 chunks with sequence numbers to /audio, waits when
+        the server answers 429 and resends from the expected chunk on 409. It can stand in for
+        browsers in tests and load tests.
+
+        :param base_url: The address of the server (e.g., "http://127.0.0.1:5000").
+        :param chunk_ms: Milliseconds of audio per upload.
+        :param realtime: If True, chunks are sent at the pace of the recording, like a live microphone.
+        :param timeout: Seconds to wait for each HTTP response.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.chunk_frames = TARGET_SAMPLE_RATE * chunk_ms // 1000
+        self.realtime = realtime
+        self.timeout = timeout
+        self.session_id = None
+        self.retries = 0  # Uploads repeated after a 429 or 409
+
+    def start(self, reference=None, partials=False, constrained=False):
+        """
+        Starts a session that receives its audio from this client.
+
+        :return: The session id.
+        """
+        options = {"source": "browser", "sample_rate": TARGET_SAMPLE_RATE, "partials": partials,
+                   "reference": reference, "constrained": constrained}
+        status, body = self._request("/start", json.dumps(options).encode("utf-8"), "application/json")
+        if status != 200:
+            raise RuntimeError(f"Could not start a session: {status} {body}")
+        self.session_id = body["session_id"]
+        return self.session_id
+
+    def send_chunks(self, chunks):
+        """
+        Uploads audio chunks in order, retrying refused uploads.
+
+        :param chunks: A list of int16 byte strings; the index of a chunk is its sequence number.
+        """
+        seq = 0
+        started = time.monotonic()
+        while seq < len(chunks):
+            if self.realtime:  # A microphone cannot deliver audio before it is spoken
+                due = started + seq * self.chunk_frames / TARGET_SAMPLE_RATE
+                time.sleep(max(0.0, due - time.monotonic()))
+            status, body = self._request(f"/audio?session_id={self.session_id}&seq={seq}", chunks[seq])
+            if status == 200:
+                seq = body["next_seq"]
+            elif status == 429:  # Backpressure: the recognizer is behind
+                self.retries += 1
+                time.sleep(body.get("retry_after", DEFAULT_RETRY_AFTER))
+            elif status == 409:  # A chunk is missing on the server, continue from there
+                self.retries += 1
+                seq = body["next_seq"]
+            else:
+                raise RuntimeError(f"Upload of chunk {seq} failed: {status} {body}")
+
+    def stop(self):
+        """
+        Stops the session, so it finishes its transcription and publishes the results.
+        """
+        self._request(f"/stop?session_id={self.session_id}")
+
+    def results(self):
+        """
+        Reads the session's event stream until its last result.
+
+        :return: A dictionary mapping each event type to its last payload.
+        """
+        events = {}
+        url = f"{self.base_url}/transcription?session_id={self.session_id}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            for line in response:
+                line = line.decode("utf-8").rstrip("\n")
+                if not line.startswith("data: "):
+                    continue  # Keep-alive comment or event separator
+                event_type, _, payload = line[len("data: "):].partition("::")
+                events[event_type] = payload
+                if event_type == LAST_EVENT:
+                    break
+        return events
+
+    def replay(self, path, reference=None):
+        """
+        Plays a WAV file through a new session and collects its results.
+
+        :param path: The WAV file (any PCM format; it is converted to 16 kHz mono first).
+        :param reference: An optional passage the recording is scored against.
+        :return: A dictionary with the file, the session id, the audio duration, the seconds from the
+                 end of the upload to the last result, the number of retried uploads and the events.
+        """
+        samples = np.concatenate(list(read_wav_file(path)) or [np.zeros(0, dtype=np.int16)])
+        chunks = [samples[i:i + self.chunk_frames].tobytes() for i in range(0, len(samples), self.chunk_frames)]
+        self.start(reference)
+        self.send_chunks(chunks)
+        uploaded = time.monotonic()
+        self.stop()
+        events = self.results()
+        return {
+            "file": path,
+            "session_id": self.session_id,
+            "duration": round(len(samples) / TARGET_SAMPLE_RATE, 3),
+            "result_latency": round(time.monotonic() - uploaded, 3),
+            "retries": self.retries,
+            "events": events
+        }
+
+    def _request(self, path, data=None, content_type="application/octet-stream"):
+        # Returns (status, JSON body); HTTP errors are answers too
+        request = urllib.request.Request(self.base_url + path, data=data, method="POST" if data is not None else "GET")
+        if data is not None:
+            request.add_header("Content-Type", content_type)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as e:
+            try:
+                return e.code, json.loads(e.read() or b"{}")
+            finally:
+                e.close()
+
+
+def main(argv=None):
+    """
+    Command-line entry point: replays WAV files to a running server, one simulated browser per
+    file, and writes one JSON object per file.
+
+    :param argv: The command-line arguments (defaults to sys.argv[1:]).
+    :return: The exit status (1 if any replay failed).
+    """
+    parser = argparse.ArgumentParser(description="Replay WAV files to Fluent Edge as browser sessions.")
+    parser.add_argument("files", nargs="+", help="WAV files, replayed concurrently")
+    parser.add_argument("-u", "--url", default="http://127.0.0.1:5000", help="address of the server")
+    parser.add_argument("--fast", action="store_true", help="upload as fast as the server accepts the audio")
+    parser.add_argument("-r", "--reference", help="text file with the passage read in every recording")
+    args = parser.parse_args(argv)
+
+    reference = None
+    if args.reference:
+        with open(args.reference, encoding="utf-8") as reference_file:
+            reference = reference_file.read()
+
+    results = [None] * len(args.files)
+
+    def replay(index, path):
+        try:
+            results[index] = ReplayClient(args.url, realtime=not args.fast).replay(path, reference)
+        except Exception as e:
+            results[index] = {"file": path, "error": str(e)}
+
+    threads = [threading.Thread(target=replay, args=(i, path)) for i, path in enumerate(args.files)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for result in results:
+        print(json.dumps(result), flush=True)
+    return 1 if any("error" in result for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+import os
+import tempfile
+import threading
+from array import array
+
+# Items per chunk; a full chunk is sealed and compacted into one block of UTF-8 bytes
+SEGMENT_CHUNK_SIZE = int(os.environ.get("FLUENT_EDGE_SEGMENT_CHUNK_SIZE", "256"))
+
+# Bytes of compacted chunks a store keeps in memory; older chunks are spilled to a temporary file
+# (0 keeps everything in memory)
+SEGMENT_SPILL_BYTES = int(os.environ.get("FLUENT_EDGE_SEGMENT_SPILL_BYTES", str(1024 * 1024)))
+
+# Directory of the spill files (defaults to the system's temporary directory)
+SEGMENT_SPILL_DIR = os.environ.get("FLUENT_EDGE_SEGMENT_SPILL_DIR") or None
+
+
+class _Chunk:
+    __slots__ = ("count", "offsets", "data", "file_position", "nbytes")
+
+    def __init__(self, items):
+        # A sealed chunk: its items encoded back to back, and where each one ends
+        encoded = [item.encode("utf-8") for item in items]
+        self.count = len(encoded)
+        self.offsets = array("I", [0])
+        for item in encoded:
+            self.offsets.append(self.offsets[-1] + len(item))
+        self.data = b"".join(encoded)
+        self.file_position = None  # Where the chunk starts in the spill file, once spilled
+        self.nbytes = len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+    def spill(self, spill_file, position):
+        # Writes the offsets and data to the spill file and forgets them
+        spill_file.write(self.offsets.tobytes() + self.data)
+        self.file_position = position
+        self.offsets = self.data = None
+
+    def items(self, start, spill_file):
+        # Decodes the items from index start to the end of the chunk
+        offsets, data = self.offsets, self.data
+        if data is None:
+            block = os.pread(spill_file.fileno(), self.nbytes, self.file_position)
+            offsets = array("I")
+            table_size = offsets.itemsize * (self.count + 1)
+            offsets.frombytes(block[:table_size])
+            data = memoryview(block)[table_size:]
+        return [str(data[offsets[i]:offsets[i + 1]], "utf-8") for i in range(start, self.count)]
+
+
+class SegmentStore:
+    def __init__(self, chunk_size=SEGMENT_CHUNK_SIZE, spill_bytes=SEGMENT_SPILL_BYTES, spill_dir=SEGMENT_SPILL_DIR):
+        """
+        Append-only store of text segments (e.g., the captions and events of a session) whose memory
+        stays bounded however long the session runs. New items go to an open chunk; a full chunk is
+        sealed and compacted into one bytes block with an offset table, which drops the per-string
+        and per-list-slot overhead. Past spill_bytes, the oldest compacted chunks are moved to a
+        temporary file and read back from there when needed.
+
+        Readers keep a cursor (the number of items they have seen) and read() decodes only the items
+        after it, so following a growing store costs time in proportion to the new items. The store
+        can stand in for the list it replaces: it supports append(), len(), iteration and clear().
+
+        :param chunk_size: The number of items per chunk.
+        :param spill_bytes: Bytes of compacted chunks kept in memory before spilling to disk (0 never spills).
+        :param spill_dir: The directory of the spill file (None for the system's temporary directory).
+        """
+        self.chunk_size = chunk_size
+        self.spill_bytes = spill_bytes
+        self.spill_dir = spill_dir
+        self.chunks = []  # Sealed chunks, oldest first
+        self.tail = []  # Items of the open chunk
+        self.count = 0  # Items appended
+        self.memory_bytes = 0  # Size of the sealed chunks still in memory
+        self.spilled_chunks = 0  # Chunks moved to the spill file (always the oldest ones)
+        self.spill_file = None  # Created on the first spill
+        self.spill_position = 0  # Size of the spill file
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # Decodes one chunk at a time, so iterating does not copy the whole store into a list
+        cursor = 0
+        while True:
+            items = self.read(cursor, limit=self.chunk_size)
+            if not items:
+                return
+            yield from items
+            cursor += len(items)
+
+    def append(self, item):
+        """
+        Adds an item at the end of the store.
+
+        :param item: A string.
+        """
+        with self.lock:
+            self.tail.append(item)
+            self.count += 1
+            if len(self.tail) >= self.chunk_size:
+                self._seal()
+
+    def read(self, cursor, limit=None):
+        """
+        :param cursor: The number of items the reader has already seen.
+        :param limit: The maximum number of items to return (None for all of them).
+        :return: A list of the items after the cursor, in order.
+        """
+        items = []
+        with self.lock:
+            sealed = len(self.chunks) * self.chunk_size
+            while cursor < sealed and (limit is None or len(items) < limit):
+                index, start = divmod(cursor, self.chunk_size)
+                chunk_items = self.chunks[index].items(start, self.spill_file)
+                items.extend(chunk_items)
+                cursor += len(chunk_items)
+            if cursor >= sealed:
+                items.extend(self.tail[cursor - sealed:])  # At most one chunk of items
+        return items if limit is None else items[:limit]
+
+    def text(self, separator=" "):
+        """
+        :return: Every item joined with the separator.
+        """
+        return separator.join(self)
+
+    def clear(self):
+        """
+        Removes every item and deletes the spill file.
+        """
+        with self.lock:
+            self.chunks = []
+            self.tail = []
+            self.count = self.memory_bytes = self.spilled_chunks = self.spill_position = 0
+            if self.spill_file:
+                self.spill_file.close()
+                self.spill_file = None
+
+    def stats(self):
+        """
+        :return: A dictionary with the number of items and chunks, the bytes of compacted chunks in
+                 memory and the bytes spilled to disk.
+        """
+        with self.lock:
+            return {
+                "items": self.count,
+                "chunks": len(self.chunks) + (1 if self.tail else 0),
+                "memory_bytes": self.memory_bytes,
+                "spilled_bytes": self.spill_position
+            }
+
+    def _seal(self):
+        # Called with the lock held: compacts the open chunk and spills old chunks over the budget
+        chunk = _Chunk(self.tail)
+        self.chunks.append(chunk)
+        self.tail = []
+        self.memory_bytes += chunk.nbytes
+        while self.spill_bytes and self.memory_bytes > self.spill_bytes and self.spilled_chunks < len(self.chunks):
+            if self.spill_file is None:
+                self.spill_file = tempfile.TemporaryFile(prefix="fluent-edge-segments-", dir=self.spill_dir)
+            oldest = self.chunks[self.spilled_chunks]
+            oldest.spill(self.spill_file, self.spill_position)
+            self.spill_file.flush()  # Readers use the file descriptor directly
+            self.spill_position += oldest.nbytes
+            self.memory_bytes -= oldest.nbytes
+            self.spilled_chunks += 1
@@ -0,0 +1,468 @@
+import html
+import json
+import os
+import threading
+import time
+import uuid
+import vosk
+from .audio_buffer import AudioRingBuffer
+from .audio_handler import start_recording, stop_recording
+from .audio_ingest import AudioIngest
+from .speech_recognizer import get_model, RecognitionWorker
+from .segment_store import SegmentStore
+from .transcript_channel import TranscriptChannel
+from .vad import VoiceActivityDetector, VAD_ENABLED
+from .incremental_grammar import IncrementalGrammarChecker, remap_offsets
+from .accuracy_checker import calculate_accuracy, calculate_reference_accuracy
+from .highlighter import highlight_errors
+from .word_alignment import compare_to_reference, reference_error_spans
+from .exercise_grammar import exercise_grammars, supports_grammar
+from .fluency import fluency_metrics
+from .metrics import active_sessions, sessions_started, sse_subscribers, audio_queue_depth, stage_seconds, audio_chunks, \
+    stop_latency
+
+# Maximum number of sessions that may record at the same time
+MAX_SESSIONS = int(os.environ.get("FLUENT_EDGE_MAX_SESSIONS", "8"))
+
+# Seconds a finished session is kept around so late clients can still read its results
+SESSION_RETENTION = float(os.environ.get("FLUENT_EDGE_SESSION_RETENTION", "300"))
+
+# Where a session's audio comes from: "server" records the server's own microphone, "browser" receives
+# the audio a client uploads with POST /audio (so the server can run headless for remote users)
+AUDIO_SOURCES = ("server", "browser")
+AUDIO_SOURCE = os.environ.get("FLUENT_EDGE_AUDIO_SOURCE", "server")
+
+# Seconds the results of a stopped session wait for grammar checks still in flight; checks that take
+# longer are left out, so the results follow the stop within a bounded time
+RESULT_GRAMMAR_TIMEOUT = float(os.environ.get("FLUENT_EDGE_RESULT_GRAMMAR_TIMEOUT", "5"))
+
+# Seconds a browser session may go without uploading audio before it is stopped, so a closed tab or a
+# dropped connection does not hold a session slot forever (0 never stops idle sessions)
+UPLOAD_TIMEOUT = float(os.environ.get("FLUENT_EDGE_UPLOAD_TIMEOUT", "30"))
+
+# Seconds a shutting-down server waits for running sessions to publish their results
+DRAIN_TIMEOUT = float(os.environ.get("FLUENT_EDGE_DRAIN_TIMEOUT", "30"))
+
+
+class SessionLimitError(Exception):
+    """
+    Raised when a new session would exceed the cap on concurrent sessions.
+    """
+
+
+class Session:
+    def __init__(self, session_id, model, sample_rate=16000, partial_results=False, vad=VAD_ENABLED, reference=None,
+                 constrained=False, source=AUDIO_SOURCE, input_rate=16000):
+        """
+        Holds everything a single practice session needs: its own audio buffer, recognizer,
+        transcript buffer, stop event and the channel its viewers subscribe to. Sessions share
+        the loaded Vosk model.
+
+        :param session_id: The unique identifier of the session.
+        :param model: The shared vosk.Model used to build the session's recognizer.
+        :param sample_rate: The sample rate of the audio fed to the recognizer.
+        :param partial_results: If True, viewers also receive unfinished hypotheses as "PARTIAL" events.
+        :param vad: If True, silence is skipped by a VoiceActivityDetector before recognition.
+        :param reference: The passage the learner reads aloud, for reading practice (None for free speech).
+        :param constrained: If True and a reference is given, only the words of the passage are recognized
+                            (when the model supports grammars), which decodes faster and misrecognizes less.
+        :param source: "server" to record the server's microphone, "browser" to receive uploaded audio (see push_audio).
+        :param input_rate: The sample rate of uploaded audio (mono int16); it is resampled to sample_rate.
+        :raises ValueError: If the audio source is unknown.
+        """
+        if source not in AUDIO_SOURCES:
+            raise ValueError(f"Unknown audio source: {source}.")
+        self.session_id = session_id
+        self.source = source
+        self.model = model
+        self.sample_rate = sample_rate
+        self.reference = reference.strip() if reference and reference.strip() else None
+        self.constrained = bool(constrained and self.reference)
+        if self.constrained and not supports_grammar():
+            print("⚠️ The speech model does not support grammars, recognizing the full vocabulary.", flush=True)
+            self.constrained = False
+        self.audio_buffer = AudioRingBuffer()  # Fixed-size ring of the audio captured for this session only
+        self.ingest = AudioIngest(input_rate, output_rate=sample_rate) if source == "browser" else None  # Uploaded audio
+        self.next_seq = 0  # Sequence number of the next uploaded chunk
+        self.upload_lock = threading.Lock()  # Keeps concurrent uploads of the session in sequence order
+        time_offset = 0.0  # Seconds already decoded by a reused recognizer
+        if self.constrained:
+            self.recognizer, time_offset = exercise_grammars.acquire(model, self.reference, sample_rate)  # Per exercise
+        else:
+            self.recognizer = vosk.KaldiRecognizer(model, sample_rate)  # Per-session recognizer state
+        self.full_transcription = SegmentStore()  # Transcript buffer for this session
+        self.stop_event = threading.Event()  # Event to signal stopping the recording
+        self.channel = TranscriptChannel()  # Live captions and final results for every viewer
+        self.grammar = IncrementalGrammarChecker(self.channel)  # Checks each utterance while the learner speaks
+        self.vad = VoiceActivityDetector(sample_rate) if vad else None  # Keeps silence away from Kaldi
+        self.stream = None  # Audio stream for recording
+        self.worker = RecognitionWorker(
+            self.full_transcription, self.stop_event, self.audio_buffer, self.recognizer, self.channel,
+            partial_results=partial_results, on_segment=self.grammar.add_segment, vad=self.vad,
+            sample_rate=sample_rate, time_offset=time_offset
+        )  # Recognition loop for the session's audio
+        self.thread = None  # Thread transcribing the session's audio
+        self.created_at = time.time()
+        self.stopped_at = None  # Time the session was stopped (None while recording)
+        self.stop_requested = None  # perf_counter() at the stop, to measure the time to the results
+        self.last_upload = time.monotonic()  # Time of the last upload (or of the creation) of a browser session
+
+    def start(self):
+        """
+        Opens the audio stream for the session and starts transcribing it in a background thread.
+        Once recording stops, the same thread analyses the transcript and publishes the results.
+
+        A browser session only starts transcribing; its audio arrives through push_audio.
+
+        :return: True if recording started, otherwise False.
+        """
+        if self.source == "server":
+            self.stream = start_recording(self.audio_buffer)  # Start recording into the session buffer
+            if not self.stream:
+                return False
+
+        self.thread = threading.Thread(
+            target=self._run,
+            daemon=True  # Set thread as a daemon to terminate when the main program ends
+        )
+        self.thread.start()
+        return True
+
+    def push_audio(self, seq, data):
+        """
+        Adds a chunk of uploaded audio to the session. Chunks are numbered from 0 and must arrive
+        in order; a chunk is only accepted if the audio buffer has room for it, so a client that
+        sends faster than the recognizer keeps up is told to wait instead of losing audio.
+
+        :param seq: The sequence number of the chunk.
+        :param data: Mono int16 PCM bytes at the session's input rate.
+        :return: A tuple of (status, next sequence number expected). The status is "accepted",
+                 "duplicate" (already received, e.g. a retried upload), "out_of_order" (an earlier
+                 chunk is missing, resend from the next sequence number), "busy" (the buffer is
+                 full, retry later) or "closed" (the session does not take uploads).
+        """
+        with self.upload_lock:
+            self.last_upload = time.monotonic()  # Even a refused chunk shows the client is still there
+            if self.ingest is None or self.stop_event.is_set():
+                status = "closed"
+            elif seq < self.next_seq:
+                status = "duplicate"
+            elif seq > self.next_seq:
+                status = "out_of_order"
+            elif self.ingest.output_frames(len(data)) > self.audio_buffer.free:
+                status = "busy"
+            else:
+                self.audio_buffer.write(self.ingest.process(data))  # Fits, so nothing is dropped
+                self.next_seq += 1
+                status = "accepted"
+            audio_chunks.labels(status).inc()
+            return status, self.next_seq
+
+    def _run(self):
+        final_text = self.worker.run()  # Transcribe until the session is stopped
+        if self.constrained:
+            exercise_grammars.release(
+                self.model, self.reference, self.recognizer, self.sample_rate, self.worker.decoded_seconds
+            )  # For the next reader
+        try:
+            self._publish_results(final_text.strip())
+            self._publish_done()
+        finally:
+            self.channel.close()  # Let every subscriber finish
+
+    def _publish_results(self, final_text):
+        # Send the final transcription when the recording stops
+        self.channel.publish("FULL_TRANSCRIPTION", final_text)
+        print(f"\n📜 Final Transcription: {final_text}", flush=True)
+
+        # Compare the transcription with the passage the learner was asked to read
+        comparison = None
+        if self.reference:
+            try:
+                with stage_seconds.labels("alignment").time():
+                    comparison = compare_to_reference(self.reference, final_text)
+                comparison["highlighted_reference"] = highlight_errors(self.reference, reference_error_spans(comparison))
+                print(f"📖 Word Error Rate: {comparison['wer']}", flush=True)
+                self.channel.publish("READING_SCORE", json.dumps(comparison))  # Stream the reading errors to frontend
+            except Exception as e:
+                print(f"❌ Error comparing with the reference text: {e}", flush=True)
+                comparison = None
+
+        # Summarise the pace, pauses and hesitations from the word timings
+        try:
+            with stage_seconds.labels("fluency").time():
+                fluency = fluency_metrics(self.worker.timings, self.worker.duration)
+            print(f"⏱️ Speech Rate: {fluency['speech_rate']} words per minute", flush=True)
+            self.channel.publish("FLUENCY", json.dumps(fluency))  # Stream the fluency metrics to frontend
+        except Exception as e:
+            print(f"❌ Error calculating fluency metrics: {e}", flush=True)
+
+        # Collect the grammar errors of every utterance; only checks still in flight are waited for
+        corrections = []
+        try:
+            with stage_seconds.labels("grammar").time():  # Only the checks still in flight at the end
+                corrections = self.grammar.results(timeout=RESULT_GRAMMAR_TIMEOUT)
+            remap_offsets(corrections, self.grammar.transcript(), final_text)  # Point offsets into the final text
+            print(f"📝 Grammar Errors: {json.dumps(corrections, indent=2)}", flush=True)
+            self.channel.publish("GRAMMAR_ERRORS", json.dumps(corrections))  # Stream grammar errors to frontend
+
+            # Highlight grammar errors (and misread or extra words) in the transcription by their offsets
+            highlighted_text = highlight_errors(final_text, corrections + (comparison["errors"] if comparison else []))
+            self.channel.publish("HIGHLIGHTED_TRANSCRIPTION", highlighted_text)  # Stream the highlighted transcription
+
+        except Exception as e:
+            print(f"❌ Error during grammar check: {e}", flush=True)
+            self.channel.publish("GRAMMAR_ERRORS", "[]")  # Send empty grammar errors if there's an exception
+            self.channel.publish("HIGHLIGHTED_TRANSCRIPTION", html.escape(final_text))  # Send final text without highlighting
+
+        # Calculate accuracy of the transcription based on the reference text, or else on grammar corrections
+        try:
+            with stage_seconds.labels("accuracy").time():
+                if comparison:
+                    accuracy = calculate_reference_accuracy(comparison)
+                else:
+                    accuracy = calculate_accuracy(final_text, corrections) or 100  # Default to 100% if no errors
+            print(f"🎯 Accuracy: {accuracy}%", flush=True)
+            self.channel.publish("ACCURACY", f"{accuracy}%")  # Stream accuracy data to frontend
+        except Exception as e:
+            print(f"❌ Error calculating accuracy: {e}", flush=True)
+            self.channel.publish("ACCURACY", "100%")  # Send 100% accuracy if there's an exception
+
+    def _publish_done(self):
+        # Tell the viewers that every result has been published, with the time the stop took
+        latency = time.perf_counter() - self.stop_requested if self.stop_requested else 0.0
+        stop_latency.observe(latency)
+        self.channel.publish("DONE", json.dumps({
+            "stop_latency": round(latency, 3),
+            "drain_seconds": round(self.worker.drain_seconds, 3),  # Recognizing the audio buffered at the stop
+            "drained_audio": round(self.worker.drained_samples / self.sample_rate, 3),
+            "discarded_audio": round(self.worker.discarded_samples / self.sample_rate, 3)
+        }))
+
+    def stop(self):
+        """
+        Signals the transcription thread to stop and closes the audio stream. The thread still
+        recognizes the audio buffered so far (see STOP_DRAIN_TIMEOUT) before publishing the results,
+        and the last event is "DONE". Stopping a session more than once has no further effect.
+        """
+        if self.stop_requested is None:
+            self.stop_requested = time.perf_counter()
+        with self.upload_lock:
+            if self.ingest is not None and not self.stop_event.is_set():
+                self.audio_buffer.write(self.ingest.flush())  # The last samples held by the resampler
+            self.worker.stop()  # Set the flag to stop recording and wake the worker
+        if self.stream:
+            stop_recording(self.stream)  # Release the audio device
+            self.stream = None
+        if self.stopped_at is None:
+            self.stopped_at = time.time()
+
+    def is_active(self):
+        """
+        :return: True while the session is recording or still finishing its transcription.
+        """
+        if self.thread is None:
+            return not self.stop_event.is_set()
+        return self.thread.is_alive()
+
+    def stats(self):
+        """
+        Reports the session's resource usage.
+
+        :return: A dictionary with the session id, activity, wall-clock seconds, CPU seconds used by
+                 recognition, the overrun/underrun counters of the audio buffer and the share of
+                 audio skipped as silence.
+        """
+        end = self.stopped_at or time.time()
+        return {
+            "session_id": self.session_id,
+            "active": self.is_active(),
+            "wall_time": round(end - self.created_at, 3),
+            "cpu_time": round(self.worker.cpu_time, 3),  # CPU seconds spent by the recognition thread
+            "subscribers": self.channel.subscriber_count,
+            "constrained": self.constrained,
+            "source": self.source,
+            "chunks_received": self.next_seq,
+            "audio_buffer": self.audio_buffer.stats(),
+            "vad": self.vad.stats() if self.vad else None
+        }
+
+
+class SessionManager:
+    def __init__(self, model=None, max_sessions=MAX_SESSIONS, retention=SESSION_RETENTION, id_prefix="",
+                 upload_timeout=UPLOAD_TIMEOUT):
+        """
+        Creates and tracks practice sessions, keyed by session id.
+
+        :param model: The vosk.Model shared by every session (defaults to the shared model, loaded on first use).
+        :param max_sessions: The maximum number of sessions that may be active at the same time.
+        :param retention: Seconds a finished session is kept before it is discarded.
+        :param id_prefix: A prefix for the session ids (e.g., the worker process that owns the sessions).
+        :param upload_timeout: Seconds a browser session may go without uploads before it is stopped (0 never).
+        """
+        self.model = model
+        self.max_sessions = max_sessions
+        self.retention = retention
+        self.id_prefix = id_prefix
+        self.upload_timeout = upload_timeout
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.draining = False  # Set by drain(); no new sessions are created afterwards
+        self.reaper = None  # Thread stopping idle browser sessions, started with the first one
+
+    def create_session(self, partial_results=False, reference=None, constrained=False, source=AUDIO_SOURCE,
+                       input_rate=16000):
+        """
+        Creates a new session, provided the concurrent session cap has not been reached.
+
+        :param partial_results: If True, the session also publishes partial hypotheses.
+        :param reference: An optional passage the learner reads aloud; the session is then scored against it.
+        :param constrained: If True, the session only recognizes the words of the reference passage.
+        :param source: "server" to record the server's microphone, "browser" to receive uploaded audio.
+        :param input_rate: The sample rate of uploaded audio.
+        :return: The new Session.
+        :raises SessionLimitError: If max_sessions sessions are already active, or the server is shutting down.
+        :raises ValueError: If the audio source is unknown.
+        """
+        if self.model is None:
+            self.model = get_model()  # Waits for the warm-up if it is still loading the model
+
+        self.stop_idle_sessions()  # Free the slots of clients that went away
+        with self.lock:
+            self._prune()
+            if self.draining:
+                raise SessionLimitError("The server is shutting down.")
+            if self._active_count() >= self.max_sessions:
+                raise SessionLimitError(f"Session limit of {self.max_sessions} reached.")
+
+            session = Session(
+                self.id_prefix + uuid.uuid4().hex, self.model, partial_results=partial_results, reference=reference, constrained=constrained,
+                source=source, input_rate=input_rate
+            )
+            self.sessions[session.session_id] = session
+            sessions_started.inc()
+            if source == "browser" and self.upload_timeout and self.reaper is None:
+                # Started here rather than at import, so no thread exists when serve.py forks its workers
+                self.reaper = threading.Thread(target=self._reap_idle_sessions, name="session-reaper", daemon=True)
+                self.reaper.start()
+            return session
+
+    def get_session(self, session_id):
+        """
+        :param session_id: The id of the session to look up.
+        :return: The matching Session, or None if it does not exist.
+        """
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def remove_session(self, session_id):
+        """
+        Stops and forgets a session.
+
+        :param session_id: The id of the session to remove.
+        """
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session:
+            session.stop()
+
+    def list_sessions(self):
+        """
+        :return: A list of stats dictionaries, one per known session.
+        """
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return [session.stats() for session in sessions]
+
+    def active_count(self):
+        """
+        :return: The number of sessions that are currently active.
+        """
+        with self.lock:
+            return self._active_count()
+
+    def subscriber_count(self):
+        """
+        :return: The number of clients subscribed to the event streams of all sessions.
+        """
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return sum(session.channel.subscriber_count for session in sessions)
+
+    def buffered_frames(self):
+        """
+        :return: The number of captured audio frames waiting for recognition, over all sessions.
+        """
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return sum(session.audio_buffer.available for session in sessions)
+
+    def drain(self, timeout=DRAIN_TIMEOUT):
+        """
+        Prepares for shutdown: refuses new sessions, stops the running ones, and waits until they
+        have published their results and their viewers have received them.
+
+        :param timeout: The maximum number of seconds to wait.
+        :return: True if every session finished and every viewer disconnected in time.
+        """
+        deadline = time.monotonic() + timeout
+        with self.lock:
+            self.draining = True
+            sessions = list(self.sessions.values())
+        for session in sessions:
+            session.stop()  # The session still transcribes what it has and publishes its results
+        for session in sessions:
+            if session.thread:
+                session.thread.join(max(0.0, deadline - time.monotonic()))
+        while self.subscriber_count() and time.monotonic() < deadline:
+            time.sleep(0.05)  # Event streams end once they have sent the last results
+        return not any(session.is_active() for session in sessions) and not self.subscriber_count()
+
+    def stop_idle_sessions(self):
+        """
+        Stops the browser sessions that have not uploaded audio for upload_timeout seconds. They
+        still transcribe what they received and publish their results, like after /stop.
+
+        :return: The number of sessions stopped.
+        """
+        if not self.upload_timeout:
+            return 0
+        now = time.monotonic()
+        with self.lock:
+            idle = [
+                session for session in self.sessions.values()
+                if session.source == "browser" and session.stopped_at is None
+                and now - session.last_upload > self.upload_timeout
+            ]
+        for session in idle:
+            print(f"⏱️ Session {session.session_id} received no audio for {self.upload_timeout:g}s, stopping it.", flush=True)
+            session.stop()
+        return len(idle)
+
+    def _reap_idle_sessions(self):
+        while True:
+            time.sleep(min(5.0, self.upload_timeout / 2))
+            self.stop_idle_sessions()
+
+    def _active_count(self):
+        return sum(1 for session in self.sessions.values() if session.is_active())
+
+    def _prune(self):
+        # Drop finished sessions once their retention period has passed
+        now = time.time()
+        expired = [
+            session_id for session_id, session in self.sessions.items()
+            if not session.is_active() and session.stopped_at is not None
+            and now - session.stopped_at > self.retention
+        ]
+        for session_id in expired:
+            del self.sessions[session_id]
+
+
+# Session manager shared by the web app, built around the single Vosk model
+session_manager = SessionManager()
+
+# Gauges read from the sessions whenever the metrics are scraped
+active_sessions.set_function(session_manager.active_count)
+sse_subscribers.set_function(session_manager.subscriber_count)
+audio_queue_depth.set_function(session_manager.buffered_frames)
@@ -1,63 +1,380 @@
 import vosk
 import json
 import os
-import sys
-from .audio_handler import audio_queue
-from .punctuation_restorer import PunctuationRestorer
+import queue
+import threading
+import time
+from array import array
+import numpy as np
+from .audio_buffer import AudioRingBuffer, AUDIO_READ_FRAMES
+from .audio_handler import audio_buffer
+from .fluency import WordTimings
+from .metrics import audio_seconds, real_time_factor, caption_latency, stage_seconds
+from .punctuation_restorer import PunctuationRestorer, IncrementalPunctuator
+from .vad import ENDPOINT
 
 # Define the path to the Vosk model for Indian English
 MODEL_PATH = "model/Indian English/vosk-model-en-in-0.5"
-# Check if the model path exists, if not, exit the program with an error message
-if not os.path.exists(MODEL_PATH):
-    print(f"❌ ERROR: Vosk model not found at '{MODEL_PATH}'.", flush=True)
-    sys.exit(1)
 
-# Load the Vosk model once at the start
-model = vosk.Model(MODEL_PATH)
-print("✅ Vosk model loaded.", flush=True)
+# The Vosk model is loaded once, on first use (or by the startup warm-up)
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """
+    Returns the shared Vosk model, loading it on the first call. Concurrent callers wait for the
+    same load instead of loading the model twice.
+
+    :return: The loaded vosk.Model.
+    :raises FileNotFoundError: If the model directory does not exist.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            # Check if the model path exists before handing it to Vosk
+            if not os.path.exists(MODEL_PATH):
+                raise FileNotFoundError(f"Vosk model not found at '{MODEL_PATH}'.")
+            _model = vosk.Model(MODEL_PATH)
+            print("✅ Vosk model loaded.", flush=True)
+        return _model
+
+# Seconds the recognition worker waits for audio before re-checking the stop event
+AUDIO_WAIT_TIMEOUT = 0.5
+
+# Minimum seconds between two partial hypotheses pushed to subscribers
+PARTIAL_RESULT_INTERVAL = 0.2
+
+# Marker put on an audio queue to wake its recognition worker when the session stops
+STOP_SIGNAL = object()
+
+# Seconds a stopped worker may spend recognizing the audio still buffered; whatever is left after
+# that is discarded, so the results follow a stop within a bounded time however far behind it was
+STOP_DRAIN_TIMEOUT = float(os.environ.get("FLUENT_EDGE_STOP_DRAIN_TIMEOUT", "2.0"))
+
+# Maximum number of frames read at once while draining (fewer, larger calls into the recognizer)
+DRAIN_READ_FRAMES = 16000
+
+def as_waveform(data):
+    """
+    Prepares audio for KaldiRecognizer.AcceptWaveform. NumPy views of a ring buffer are wrapped
+    with Vosk's cffi instance, which hands the view's memory to Kaldi without copying it.
+
+    :param data: Raw audio bytes or an int16 NumPy array.
+    :return: An object AcceptWaveform accepts, whose len() is its size in bytes.
+    """
+    if isinstance(data, np.ndarray):
+        ffi = getattr(vosk, "_ffi", None)
+        return ffi.from_buffer(data) if ffi else data.tobytes()  # Copy only if the cffi handle is missing
+    return data
 
 # Initialize the punctuation restorer instance
 punctuation_restorer = PunctuationRestorer()
 
-def transcribe_audio(full_transcription, stop_recording):
+# Time spent punctuating segments (looked up once, the metric is recorded for every segment)
+punctuation_seconds = stage_seconds.labels("punctuation")
+
+class RecognitionWorker:
+    def __init__(self, full_transcription, stop_recording, source_queue=None, rec=None, channel=None,
+                 partial_results=False, on_segment=None, vad=None, sample_rate=16000, time_offset=0.0):
+        """
+        Runs the recognition loop for one audio source. The worker blocks on the audio queue,
+        so it wakes up as soon as new audio or a stop request arrives and costs no CPU while idle.
+
+        :param full_transcription: A list or SegmentStore that will hold the final, punctuated transcription.
+        :param stop_recording: A threading event used to stop recording when needed.
+        :param source_queue: The AudioRingBuffer to read audio from (defaults to the shared audio_buffer).
+                             A queue.Queue of raw audio blocks is accepted as well.
+        :param rec: An existing KaldiRecognizer to use (a new one is created if not given).
+        :param channel: An optional TranscriptChannel that receives every live segment as a "LIVE" event.
+        :param partial_results: If True, unfinished hypotheses are also published as "PARTIAL" events.
+        :param on_segment: An optional function called with every finished, punctuated sentence.
+        :param vad: An optional VoiceActivityDetector; only the speech it finds is passed to the recognizer.
+        :param sample_rate: The sample rate of the audio.
+        :param time_offset: Seconds of audio rec decoded before this worker (Vosk word times count from
+                            the creation of the recognizer, even across Reset).
+        """
+        if source_queue is None:
+            source_queue = audio_buffer  # Fall back to the shared module-level buffer
+
+        if rec is None:
+            # Initialize the recognizer with the Vosk model and a sample rate of 16000 Hz
+            rec = vosk.KaldiRecognizer(get_model(), sample_rate)
+        rec.SetWords(True)  # Report the times and confidence of every word
+
+        self.full_transcription = full_transcription
+        self.stop_recording = stop_recording
+        self.source_queue = source_queue
+        self.rec = rec
+        self.channel = channel
+        self.partial_results = partial_results and channel is not None
+        self.on_segment = on_segment
+        self.vad = vad
+        self.punctuator = IncrementalPunctuator(punctuation_restorer)  # Punctuates the segments as they arrive
+        self.last_partial = ""  # Last partial hypothesis sent, used to skip unchanged ones
+        self.last_partial_time = 0.0  # Time the last partial hypothesis was sent
+        self.cpu_time = 0.0  # CPU seconds spent by the worker thread so far
+        self.block_started = 0.0  # perf_counter() when the current audio block reached the worker
+        self.draining = False  # True once stopped, while the buffered audio is recognized
+        self.drain_seconds = 0.0  # Time spent recognizing the audio buffered at the stop
+        self.drained_samples = 0  # Samples recognized after the stop
+        self.discarded_samples = 0  # Samples still buffered when the drain timeout expired
+
+        # Word times and confidences of the transcription, stored as compact columns
+        self.timings = WordTimings()
+        self.sample_rate = sample_rate
+        self.time_offset = time_offset
+        self.stream_samples = 0  # Samples of audio received
+        self.fed_samples = 0  # Samples passed to the recognizer (less than received when silence is skipped)
+        # Where each contiguous run of fed audio starts, in fed samples and in the received stream
+        self.fed_starts = array("q", [0])
+        self.stream_starts = array("q", [0])
+        self.stream_end = 0  # Stream index right after the last fed sample
+
+    def stop(self):
+        """
+        Asks the worker to stop and wakes it up immediately if it is waiting for audio.
+        """
+        self.stop_recording.set()
+        if isinstance(self.source_queue, AudioRingBuffer):
+            self.source_queue.close()  # Unblock the pending buffer read
+        else:
+            self.source_queue.put(STOP_SIGNAL)  # Unblock the pending queue read
+
+    def run(self, drain_timeout=STOP_DRAIN_TIMEOUT):
+        """
+        Transcribes the audio input and restores punctuation in the transcribed text.
+
+        Once stopped, the worker keeps recognizing the audio that is still buffered, in large blocks
+        and without partial results, for up to drain_timeout seconds. It then flushes the utterance
+        in progress with FinalResult, so the last words are not lost, and returns the complete
+        transcription.
+
+        :param drain_timeout: Maximum seconds spent on the audio buffered at the stop.
+        :return: The full transcription with restored punctuation.
+        """
+        cpu_start = time.thread_time()  # CPU time is measured for this thread only
+
+        # Process audio data until the recording is stopped and the buffered audio is recognized
+        drain_started = deadline = None
+        while True:
+            if self.stop_recording.is_set() and drain_started is None:
+                self.draining = True
+                drain_started = time.monotonic()
+                deadline = drain_started + drain_timeout
+            if self.draining and time.monotonic() >= deadline:
+                self._discard_audio()
+                break
+            data = self._read_audio()
+            if data is None:
+                if self.draining:
+                    break  # Nothing is left to recognize
+                continue
+            if data is STOP_SIGNAL:
+                break  # The source is finished and empty
+
+            # Try to process the audio data and get the recognition result
+            try:
+                self.feed(data)
+                if self.draining:
+                    self.drained_samples += _sample_count(data)
+            finally:
+                self._release_audio(data)
+            self.cpu_time = time.thread_time() - cpu_start
+
+        # The utterance in progress has no endpoint yet; take what the recognizer has heard of it
+        self.flush()
+        if drain_started is not None:
+            self.drain_seconds = time.monotonic() - drain_started
+
+        # Once recording stops, process the complete transcription with full punctuation restoration
+        punctuated_text = self.finish()
+        self.cpu_time = time.thread_time() - cpu_start
+
+        # Return the punctuated transcription
+        return punctuated_text
+
+    def feed(self, data):
+        """
+        Passes a block of audio to the recognizer (only its speech, if the worker has a voice
+        activity detector) and publishes any segment or partial hypothesis it completes.
+
+        :param data: Raw int16 audio bytes or an int16 NumPy array.
+        """
+        self.block_started = time.perf_counter()
+        if self.vad is None:
+            pieces, positions = [data], [self.stream_samples]
+        else:
+            samples = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.int16)
+            positions = []  # Where each piece starts in the stream, to map word times back
+            pieces = self.vad.process(samples, positions)
+        count = _sample_count(data)
+        self.stream_samples += count
+
+        for piece, position in zip(pieces, positions):
+            if piece is ENDPOINT:
+                # Kaldi never hears the skipped silence, so the utterance is ended here
+                self._finish_segment(self.rec.FinalResult())
+                continue
+            self._track_piece(position, _sample_count(piece))
+            if self.rec.AcceptWaveform(as_waveform(piece)):
+                self._finish_segment(self.rec.Result())
+            elif self.partial_results and not self.draining:
+                self._publish_partial()  # Nobody waits for partials of audio recognized after the stop
+
+        if count:
+            seconds = count / self.sample_rate
+            audio_seconds.inc(seconds)
+            real_time_factor.observe((time.perf_counter() - self.block_started) / seconds)
+
+    @property
+    def decoded_seconds(self):
+        """
+        :return: The seconds of audio the recognizer has decoded since it was created, including earlier workers.
+        """
+        return self.time_offset + self.fed_samples / self.sample_rate
+
+    @property
+    def duration(self):
+        """
+        :return: The seconds of audio received by the worker, including skipped silence.
+        """
+        return self.stream_samples / self.sample_rate
+
+    def flush(self):
+        """
+        Ends the current utterance and handles its text as a finished segment, e.g. at the end of a file.
+        """
+        self.block_started = time.perf_counter()
+        self._finish_segment(self.rec.FinalResult())
+
+    def finish(self):
+        """
+        Punctuates the words held back from the last segment and joins the live segments, which are
+        already punctuated, replacing them in full_transcription. The result is the same as restoring
+        the punctuation of the whole raw transcript at once.
+
+        :return: The full transcription with restored punctuation.
+        """
+        with punctuation_seconds.time():
+            processed_text = self.punctuator.finish()
+        self._publish_segment(processed_text)
+        punctuated_text = " ".join(self.full_transcription)  # The segments are exactly the punctuated words
+
+        # Clear the full_transcription list and append the properly punctuated transcription
+        self.full_transcription.clear()
+        self.full_transcription.append(punctuated_text)
+        return punctuated_text
+
+    def _finish_segment(self, result):
+        result = json.loads(result)  # Convert the result to a JSON object
+        text = result.get("text", "")  # Extract the transcribed text
+        self._add_words(result.get("result"))
+        if text:  # If the transcribed text is not empty
+            # Punctuate the text; the last word or two wait for the next segment to be decided
+            with punctuation_seconds.time():
+                processed_text = self.punctuator.add(text)
+            self._publish_segment(processed_text)
+            caption_latency.observe(time.perf_counter() - self.block_started)
+            # Print the live transcription (for debugging or monitoring purposes)
+            print(f"📝 Live: {text}", flush=True)
+        self.last_partial = ""  # The finished segment replaces any partial hypothesis
+
+    def _publish_segment(self, processed_text):
+        # Append newly punctuated words to the transcription and hand on the sentences they complete
+        if processed_text:
+            self.full_transcription.append(processed_text)
+            if self.channel:
+                self.channel.publish("LIVE", processed_text)  # Push the caption to subscribers at once
+        if self.on_segment:
+            for sentence in self.punctuator.take_sentences():
+                self.on_segment(sentence)  # E.g., start checking the sentence's grammar
+
+    def _track_piece(self, position, count):
+        # Remember where fed audio jumps ahead in the stream, i.e. where silence was skipped
+        if position != self.stream_end:
+            self.fed_starts.append(self.fed_samples)
+            self.stream_starts.append(position)
+        self.fed_samples += count
+        self.stream_end = position + count
+
+    def _add_words(self, words):
+        # Store the word times of a finished segment, moved from recognizer time to stream time
+        if not words:
+            return
+        starts = self._stream_times([word["start"] for word in words], side="right")
+        ends = self._stream_times([word["end"] for word in words], side="left")  # An end on a jump belongs before it
+        for word, start, end in zip(words, starts.tolist(), ends.tolist()):
+            self.timings.add(word["word"], start, max(start, end), word.get("conf", 1.0))
+
+    def _stream_times(self, times, side):
+        # Seconds since the recognizer was created -> seconds since the start of this worker's stream
+        fed = (np.asarray(times, dtype=np.float64) - self.time_offset) * self.sample_rate
+        fed_starts = np.frombuffer(self.fed_starts, dtype=np.int64)
+        run = np.maximum(np.searchsorted(fed_starts, fed, side=side) - 1, 0)
+        stream = np.frombuffer(self.stream_starts, dtype=np.int64)[run] + (fed - fed_starts[run])
+        return np.maximum(stream, 0) / self.sample_rate
+
+    def _read_audio(self):
+        # Block until audio arrives; the timeout only guards against a missed stop signal.
+        # While draining, only what is already buffered is read, in larger blocks.
+        # Returns the audio, None on timeout, or STOP_SIGNAL once the source is finished.
+        timeout = 0 if self.draining else AUDIO_WAIT_TIMEOUT
+        if isinstance(self.source_queue, AudioRingBuffer):
+            view = self.source_queue.read_view(DRAIN_READ_FRAMES if self.draining else AUDIO_READ_FRAMES, timeout=timeout)
+            if view is None and self.source_queue.closed:
+                return STOP_SIGNAL
+            return view
+        try:
+            return self.source_queue.get(timeout=timeout) if timeout else self.source_queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def _discard_audio(self):
+        # Drop the audio left when the drain timeout expires, counting it
+        if isinstance(self.source_queue, AudioRingBuffer):
+            frames = self.source_queue.discard()
+        else:
+            frames = 0
+            while True:
+                try:
+                    data = self.source_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if data is not STOP_SIGNAL:
+                    frames += _sample_count(data)
+        self.discarded_samples += frames
+        if frames:
+            print(f"⚠️ Stop drain timed out, {frames / self.sample_rate:.1f}s of audio were not transcribed.", flush=True)
+
+    def _release_audio(self, data):
+        # Hand the space of a processed ring buffer view back to the audio callback
+        if isinstance(self.source_queue, AudioRingBuffer):
+            self.source_queue.advance(len(data))
+
+    def _publish_partial(self):
+        # Send the current hypothesis, at most every PARTIAL_RESULT_INTERVAL seconds and only if it changed
+        now = time.monotonic()
+        if now - self.last_partial_time < PARTIAL_RESULT_INTERVAL:
+            return
+        partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        if partial and partial != self.last_partial:
+            self.channel.publish("PARTIAL", punctuation_restorer.process_streaming_text(partial))
+            self.last_partial = partial
+            self.last_partial_time = now
+
+def _sample_count(data):
+    # Number of int16 samples in raw bytes or a NumPy array
+    return len(data) if isinstance(data, np.ndarray) else len(data) // 2
+
+def transcribe_audio(full_transcription, stop_recording, source_queue=None, rec=None, channel=None):
     """
     Transcribes the audio input and restores punctuation in the transcribed text.
 
     :param full_transcription: A list that will hold the final, punctuated transcription.
     :param stop_recording: A threading event used to stop recording when needed.
+    :param source_queue: The AudioRingBuffer or queue to read audio from (defaults to the shared audio_buffer).
+    :param rec: An existing KaldiRecognizer to use (a new one is created if not given).
+    :param channel: An optional TranscriptChannel that receives every live segment.
     :return: The full transcription with restored punctuation.
     """
-    
-    # Initialize the recognizer with the Vosk model and a sample rate of 16000 Hz
-    rec = vosk.KaldiRecognizer(model, 16000)
-    
-    # List to hold the raw transcription (without punctuation)
-    raw_transcription = []
-    
-    # Process audio data in a loop until the recording is stopped
-    while not stop_recording.is_set():
-        if not audio_queue.empty():  # Check if there's data in the audio queue
-            data = audio_queue.get()  # Retrieve the audio data from the queue
-            # Try to process the audio data and get the recognition result
-            if rec.AcceptWaveform(data):
-                result = json.loads(rec.Result())  # Convert the result to a JSON object
-                text = result.get("text", "")  # Extract the transcribed text
-                if text:  # If the transcribed text is not empty
-                    # Process the text with the punctuation restorer (for streaming text)
-                    processed_text = punctuation_restorer.process_streaming_text(text)
-                    # Append the processed text to the full transcription and raw transcription lists
-                    full_transcription.append(processed_text)
-                    raw_transcription.append(text)
-                    # Print the live transcription (for debugging or monitoring purposes)
-                    print(f"📝 Live: {text}", flush=True)
-    
-    # Once recording stops, process the complete transcription with full punctuation restoration
-    complete_raw_text = " ".join(raw_transcription)  # Join raw transcription into a single string
-    punctuated_text = punctuation_restorer.restore_punctuation(complete_raw_text)  # Restore punctuation
-    
-    # Clear the full_transcription list and append the properly punctuated transcription
-    full_transcription.clear()
-    full_transcription.append(punctuated_text)
-    
-    # Return the punctuated transcription
-    return punctuated_text
+    return RecognitionWorker(full_transcription, stop_recording, source_queue, rec, channel).run()
@@ -1,22 +1,30 @@
 import importlib
+import importlib.util
 import sys
 
-def check_library(lib_name, alias=None):
+def check_library(lib_name, alias=None, required=True):
     """
-    Tries to import a library and handles errors if the library is not found.
+    Checks that a library is installed and handles errors if the library is not found.
+    The library is only located, not imported, unless an alias is requested.
 
-    :param lib_name: The name of the library to be imported.
-    :param alias: Optional alias to assign the library to a different name in the global namespace.
+    :param lib_name: The name of the library to be checked.
+    :param alias: Optional alias to import the library under in the global namespace.
+    :param required: If False, a missing library only prints a warning instead of exiting.
+    :return: True if the library was found.
     """
     try:
-        # Import the library with an alias if provided, else just import it
+        # Import the library with an alias if provided, else just locate it without importing
         if alias:
             globals()[alias] = importlib.import_module(lib_name)
-        else:
-            importlib.import_module(lib_name)
-        # Print success message if the library is loaded successfully
-        print(f"✅ {lib_name} loaded successfully.", flush=True)
+        elif importlib.util.find_spec(lib_name) is None:
+            raise ImportError(f"No module named '{lib_name}'")
+        # Print success message if the library is available
+        print(f"✅ {lib_name} found.", flush=True)
+        return True
     except ImportError as e:
+        if not required:
+            print(f"⚠️ Optional library {lib_name} not found. Error: {e}", flush=True)
+            return False
         # Print error message and exit if the library cannot be imported
         print(f"❌ Failed to import {lib_name}. Error: {e}", flush=True)
         sys.exit(1)
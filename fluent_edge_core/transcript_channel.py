@@ -0,0 +1,124 @@
+import threading
+from .segment_store import SegmentStore
+
+# Seconds an idle transcription stream waits before sending a keep-alive comment
+SSE_KEEPALIVE_INTERVAL = 15
+
+
+def sse_message(event):
+    """
+    :param event: An (event_type, payload) pair, or None for an idle timeout.
+    :return: The event as a Server-Sent Events message ("data: TYPE::payload"), or a keep-alive comment for None.
+    """
+    if event is None:
+        return ": keep-alive\n\n"  # Comment line that lets the connection detect closed clients
+    event_type, payload = event
+    return f"data: {event_type}::{payload}\n\n"
+
+
+class TranscriptChannel:
+    def __init__(self):
+        """
+        Publish/subscribe channel for the events of one session (live segments, final results).
+
+        Events are kept in order, so every subscriber, including one that joins late, sees the
+        whole session. Subscribers sleep on a condition variable until something is published,
+        which delivers new captions immediately and costs nothing while the session is quiet.
+        Events are stored as "TYPE::payload" strings in a SegmentStore, so an hour-long session keeps
+        its history in bounded memory and every subscriber reads only what is new since its cursor.
+        """
+        self.events = SegmentStore()  # Published events in order, as "TYPE::payload" strings
+        self.closed = False  # Set once the session has published its last event
+        self.condition = threading.Condition()
+        self.subscriber_count = 0  # Number of subscribers currently attached
+        self.watchers = []  # Callbacks of subscribers that do not block on the condition (e.g., asyncio streams)
+
+    def publish(self, event_type, payload):
+        """
+        Appends an event and wakes every waiting subscriber.
+
+        :param event_type: The event name sent to the frontend (e.g., "LIVE" or "ACCURACY").
+        :param payload: The event data as a string.
+        """
+        with self.condition:
+            if self.closed:
+                return  # Nothing may follow the final event
+            self.events.append(f"{event_type}::{payload}")
+            self.condition.notify_all()
+            self._notify_watchers()
+
+    def close(self):
+        """
+        Marks the channel as finished; subscribers end after receiving the remaining events.
+        """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+            self._notify_watchers()
+
+    def watch(self, callback):
+        """
+        Attaches a subscriber that is told about new events instead of waiting for them, for event
+        loops that cannot block. It reads the events with read() when the callback is called.
+
+        :param callback: A function without arguments, called (on the publishing thread, so it must not
+                         block) after every publish() and close().
+        """
+        with self.condition:
+            self.watchers.append(callback)
+            self.subscriber_count += 1
+
+    def unwatch(self, callback):
+        """
+        Detaches a subscriber attached with watch().
+        """
+        with self.condition:
+            self.watchers.remove(callback)
+            self.subscriber_count -= 1
+
+    def read(self, cursor):
+        """
+        :param cursor: The number of events the caller has already received.
+        :return: A tuple of (events after the cursor, whether the channel is closed).
+        """
+        with self.condition:
+            return self._events_after(cursor), self.closed
+
+    def _events_after(self, cursor):
+        # Called with the condition held: decodes only the events the caller has not received
+        return [tuple(event.split("::", 1)) for event in self.events.read(cursor)]
+
+    def _notify_watchers(self):
+        # Called with the condition held
+        for callback in self.watchers:
+            callback()
+
+    def subscribe(self, timeout=None):
+        """
+        Yields the channel's events in order, waiting for new ones until the channel is closed.
+
+        :param timeout: Seconds to wait for an event before yielding None, letting the caller send a
+                        keep-alive (None waits indefinitely).
+        :return: A generator of (event_type, payload) pairs, with None for every idle timeout.
+        """
+        cursor = 0  # Index of the next event to deliver to this subscriber
+        with self.condition:
+            self.subscriber_count += 1
+        try:
+            while True:
+                with self.condition:
+                    if cursor >= len(self.events) and not self.closed:
+                        self.condition.wait(timeout)  # Sleep until an event is published
+                    new_events = self._events_after(cursor)
+                    cursor += len(new_events)
+                    finished = self.closed and cursor >= len(self.events)
+
+                if not new_events and not finished:
+                    yield None  # Idle timeout, the caller may send a keep-alive
+                for event in new_events:
+                    yield event
+                if finished:
+                    return
+        finally:
+            with self.condition:
+                self.subscriber_count -= 1
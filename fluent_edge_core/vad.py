@@ -0,0 +1,172 @@
+import os
+import numpy as np
+
+# Whether sessions filter silence out before recognition
+VAD_ENABLED = os.environ.get("FLUENT_EDGE_VAD", "1").lower() in ("1", "true", "yes")
+
+# Frames louder than this (RMS in dB relative to full scale) are speech
+VAD_ENERGY_THRESHOLD = float(os.environ.get("FLUENT_EDGE_VAD_THRESHOLD_DB", "-45"))
+
+# Quieter frames still count as speech if this many dB below the threshold and noisy like fricatives
+VAD_UNVOICED_MARGIN = 10.0
+
+# Share of sign changes above which a quiet frame is treated as an unvoiced sound (s, f, th)
+VAD_ZCR_THRESHOLD = 0.25
+
+# Length of the frames speech is detected on, in milliseconds
+VAD_FRAME_MS = 10
+
+# Milliseconds of audio kept after the last speech frame, so word endings are not cut off
+VAD_HANGOVER_MS = 300
+
+# Milliseconds of audio kept before speech starts, so word onsets are not cut off
+VAD_PADDING_MS = 200
+
+# Seconds of silence after which the current utterance is ended
+VAD_ENDPOINT_SILENCE = float(os.environ.get("FLUENT_EDGE_VAD_ENDPOINT_SILENCE", "1.0"))
+
+# Marker returned by VoiceActivityDetector.process where an utterance should be ended
+ENDPOINT = object()
+
+
+class VoiceActivityDetector:
+    def __init__(self, sample_rate=16000, threshold_db=VAD_ENERGY_THRESHOLD, zcr_threshold=VAD_ZCR_THRESHOLD,
+                 frame_ms=VAD_FRAME_MS, hangover_ms=VAD_HANGOVER_MS, padding_ms=VAD_PADDING_MS,
+                 endpoint_silence=VAD_ENDPOINT_SILENCE):
+        """
+        Finds the speech in a stream of int16 audio blocks from frame energy and zero-crossing
+        rate, so silence can be skipped instead of being decoded by Kaldi. Each block is analysed
+        with whole-array NumPy operations rather than a Python loop over frames.
+
+        Since the recognizer never sees the skipped silence, it cannot detect the end of an
+        utterance by itself; the detector reports an endpoint once the silence lasts long enough.
+
+        :param sample_rate: The sample rate of the audio.
+        :param threshold_db: RMS level (dBFS) above which a frame is speech.
+        :param zcr_threshold: Zero-crossing rate above which a quieter frame is an unvoiced sound.
+        :param frame_ms: Length of the analysed frames in milliseconds.
+        :param hangover_ms: Audio kept after the last speech frame, in milliseconds.
+        :param padding_ms: Audio kept before the first speech frame, in milliseconds.
+        :param endpoint_silence: Seconds of silence after speech that end the utterance.
+        """
+        self.frame_length = max(1, sample_rate * frame_ms // 1000)
+        self.threshold = 10 ** (threshold_db / 20) * 32768  # RMS threshold in sample units
+        self.unvoiced_threshold = 10 ** ((threshold_db - VAD_UNVOICED_MARGIN) / 20) * 32768
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = hangover_ms // frame_ms
+        self.endpoint_frames = max(1, int(endpoint_silence * 1000 / frame_ms))
+        self.padding = np.zeros(sample_rate * padding_ms // 1000, dtype=np.int16)  # Most recent skipped audio
+        self.padding_length = 0  # Valid samples at the end of self.padding
+
+        self.silent_frames = self.endpoint_frames  # Frames since the last speech frame (starts in silence)
+        self.in_utterance = False  # Speech was passed on since the last endpoint
+
+        # Counters showing how much audio never reaches the recognizer
+        self.total_samples = 0
+        self.speech_samples = 0
+        self.endpoints = 0
+
+    def process(self, samples, positions=None):
+        """
+        Splits a block of audio into the parts to pass on to the recognizer.
+
+        :param samples: A block of int16 samples (a NumPy array).
+        :param positions: An optional list that receives, for each returned item, the index of its first
+                          sample in the whole stream (None for ENDPOINT), e.g. to map recognizer times back.
+        :return: A list of int16 arrays to recognize, in order, with ENDPOINT wherever the current
+                 utterance should be finished. The arrays are views of samples where possible.
+        """
+        count = len(samples)
+        if not count:
+            return []
+        block_start = self.total_samples  # Stream index of samples[0]
+        self.total_samples += count
+
+        starts = np.arange(0, count, self.frame_length)
+        lengths = np.diff(np.append(starts, count))  # The last frame may be shorter
+        signal = samples.astype(np.float32)
+        rms = np.sqrt(np.add.reduceat(signal * signal, starts) / lengths)
+        crossings = np.append(np.signbit(samples[1:]) != np.signbit(samples[:-1]), False)
+        zcr = np.add.reduceat(crossings, starts) / lengths
+        speech = (rms > self.threshold) | ((rms > self.unvoiced_threshold) & (zcr > self.zcr_threshold))
+
+        # Frames since the last speech frame, carrying over the silence at the end of the previous block
+        indices = np.arange(len(starts))
+        last_speech = np.maximum.accumulate(np.where(speech, indices, -1 - self.silent_frames))
+        silence = indices - last_speech
+        keep = silence <= self.hangover_frames
+
+        # Runs of frames that are kept or skipped, as (first frame, end frame) pairs
+        changes = np.flatnonzero(keep[1:] != keep[:-1]) + 1
+        bounds = np.concatenate(([0], changes, [len(starts)]))
+        sample_bounds = np.append(starts, count)
+
+        pieces = []
+        starts_in_stream = []  # Stream index of each piece
+        padding = len(self.padding)
+        for first, end in zip(bounds[:-1], bounds[1:]):
+            run_start, run_end = int(sample_bounds[first]), int(sample_bounds[end])
+            if keep[first]:
+                if first > 0:  # Pad with the end of the silence skipped just before, in this block
+                    skip_start = int(sample_bounds[bounds[bounds < first][-1]])
+                    pad_start = max(skip_start, run_start - padding)
+                    if pad_start == 0 and run_start < padding:
+                        pieces.append(self._take_padding(padding - run_start))
+                        starts_in_stream.append(block_start - len(pieces[-1]))
+                    run_start = pad_start
+                elif self.padding_length:  # Speech starts the block, pad with the previous block's silence
+                    pieces.append(self._take_padding(padding))
+                    starts_in_stream.append(block_start - len(pieces[-1]))
+                pieces.append(samples[run_start:run_end])
+                starts_in_stream.append(block_start + run_start)
+                self.in_utterance = True
+            else:
+                if self.in_utterance and silence[end - 1] >= self.endpoint_frames:
+                    pieces.append(ENDPOINT)  # The silence after the utterance is long enough
+                    starts_in_stream.append(None)
+                    self.in_utterance = False
+                    self.endpoints += 1
+                if end == len(starts):  # Silence at the end of the block may pad speech in the next one
+                    self._remember_padding(samples[run_start:run_end], continues=first == 0)
+
+        if keep[-1]:
+            self.padding_length = 0  # Nothing skipped at the end of the block
+        self.silent_frames = int(silence[-1])
+        kept = [i for i, piece in enumerate(pieces) if piece is ENDPOINT or len(piece)]
+        pieces = [pieces[i] for i in kept]
+        if positions is not None:
+            positions.extend(starts_in_stream[i] for i in kept)
+        self.speech_samples += sum(len(piece) for piece in pieces if piece is not ENDPOINT)
+        return pieces
+
+    def stats(self):
+        """
+        :return: A dictionary with the amount of audio seen, the share skipped and the number of forced endpoints.
+        """
+        skipped = self.total_samples - self.speech_samples
+        return {
+            "total_samples": self.total_samples,
+            "speech_samples": self.speech_samples,
+            "skipped_fraction": round(skipped / self.total_samples, 4) if self.total_samples else 0.0,
+            "endpoints": self.endpoints
+        }
+
+    def _take_padding(self, size):
+        # The last size samples of skipped audio before the speech (a copy, since the array is reused)
+        size = min(size, self.padding_length)
+        self.padding_length = 0
+        return self.padding[len(self.padding) - size:].copy()
+
+    def _remember_padding(self, skipped, continues):
+        # Keep the most recent skipped samples, right-aligned in the preallocated padding array
+        size = len(self.padding)
+        if len(skipped) >= size:
+            self.padding[:] = skipped[len(skipped) - size:]
+            self.padding_length = size
+            return
+        kept = min(self.padding_length, size - len(skipped)) if continues else 0  # Earlier silence right before it
+        if kept:
+            self.padding[size - len(skipped) - kept:size - len(skipped)] = self.padding[size - kept:].copy()
+        if len(skipped):
+            self.padding[size - len(skipped):] = skipped
+        self.padding_length = kept + len(skipped)
@@ -0,0 +1,86 @@
+import threading
+import time
+from .grammar_checker import get_grammar_checker
+from .speech_recognizer import get_model
+
+
+class WarmupTracker:
+    def __init__(self):
+        """
+        Loads slow components (the Vosk model, LanguageTool) in background threads and records
+        the status and timing of each one, so the web server can answer requests while they load.
+        """
+        self.components = {}  # name -> status dictionary
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def start(self, name, loader):
+        """
+        Starts loading a component in its own thread.
+
+        :param name: The name the component is reported under.
+        :param loader: A function that loads the component and raises an exception on failure.
+        """
+        with self.lock:
+            self.components[name] = {"status": "loading", "started_at": time.time(), "duration": None, "error": None}
+        threading.Thread(target=self._load, args=(name, loader), daemon=True, name=f"warmup-{name}").start()
+
+    def _load(self, name, loader):
+        started = time.perf_counter()
+        try:
+            loader()
+            status, error = "ready", None
+            print(f"✅ {name} warmed up in {time.perf_counter() - started:.2f}s.", flush=True)
+        except Exception as e:
+            status, error = "failed", str(e)
+            print(f"❌ {name} failed to load: {e}", flush=True)
+        with self.lock:
+            self.components[name].update(status=status, error=error, duration=round(time.perf_counter() - started, 3))
+
+    def status_of(self, name):
+        """
+        :param name: The name of a component.
+        :return: "loading", "ready" or "failed", or None if the component is not being warmed up.
+        """
+        with self.lock:
+            component = self.components.get(name)
+            return component["status"] if component else None
+
+    def is_ready(self):
+        """
+        :return: True once every component has loaded successfully.
+        """
+        with self.lock:
+            return bool(self.components) and all(c["status"] == "ready" for c in self.components.values())
+
+    def report(self):
+        """
+        :return: A dictionary with the uptime, overall readiness and the status and load time of each component.
+        """
+        with self.lock:
+            components = {name: dict(component) for name, component in self.components.items()}
+        return {
+            "ready": self.is_ready(),
+            "uptime": round(time.time() - self.started_at, 3),
+            "components": components
+        }
+
+
+def _load_language_tool():
+    # The grammar checker logs instead of raising when LanguageTool fails, so check the result here
+    if not get_grammar_checker().tool:
+        raise RuntimeError("LanguageTool could not be started.")
+
+
+# Warm-up tracker shared by the web app
+warmup = WarmupTracker()
+
+def start_warmup():
+    """
+    Starts loading the Vosk model and LanguageTool in parallel, in the background.
+
+    :return: The WarmupTracker reporting their progress.
+    """
+    warmup.start("vosk_model", get_model)
+    warmup.start("language_tool", _load_language_tool)
+    return warmup
@@ -0,0 +1,187 @@
+import os
+import re
+import numpy as np
+
+# Diagonals searched on either side of the direct path between the two texts, at least ALIGNMENT_BAND
+# and ALIGNMENT_BAND_SHARE of the longer text. The band is widened when the alignment could be improved
+# outside it, so these only affect speed, never the result. Every row costs a few NumPy calls whatever
+# its width, so a band that holds a reading with one word in five wrong costs little more than a narrow
+# one, and a reading rarely needs the second pass.
+ALIGNMENT_BAND = int(os.environ.get("FLUENT_EDGE_ALIGNMENT_BAND", "64"))
+ALIGNMENT_BAND_SHARE = float(os.environ.get("FLUENT_EDGE_ALIGNMENT_BAND_SHARE", "0.2"))
+
+# Words are compared lowercased and without punctuation (apostrophes inside words are kept)
+WORD_PATTERN = re.compile(r"[\w']+")
+
+# Step codes stored in the traceback table
+_DIAGONAL, _DELETION, _INSERTION = 0, 1, 2
+
+# Cost of a cell outside the band (large, but far from overflowing int32 when 1 is added)
+_INFINITY = 1 << 29
+
+
+def tokenize_words(text):
+    """
+    Splits a text into the words that are aligned.
+
+    :param text: The text to split.
+    :return: A tuple of (words, spans): the lowercased words and the (start, end) character range
+             of each one in text.
+    """
+    words, spans = [], []
+    for match in WORD_PATTERN.finditer(text or ""):
+        word = match.group().strip("'").lower()
+        if word:
+            words.append(word)
+            spans.append(match.span())
+    return words, spans
+
+
+def align_words(reference, hypothesis, band=ALIGNMENT_BAND):
+    """
+    Aligns two word sequences with the smallest number of substitutions, deletions and insertions
+    (word-level Levenshtein distance). Only a band of diagonals around the direct path is computed,
+    one NumPy row at a time, so time and memory grow with the length times the band instead of the
+    product of the lengths. If the distance found could be beaten by a path outside the band, the
+    alignment is repeated once with a band wide enough to contain every path that costs less.
+
+    :param reference: The expected words.
+    :param hypothesis: The recognized words.
+    :param band: The smallest initial number of extra diagonals on either side (the band also covers
+                 ALIGNMENT_BAND_SHARE of the longer sequence).
+    :return: A list of (operation, reference index, hypothesis index) tuples in text order, where the
+             operation is "match", "substitution", "deletion" (index into hypothesis is None) or
+             "insertion" (index into reference is None).
+    """
+    n, m = len(reference), len(hypothesis)
+    vocabulary = {}  # Words are compared as integer ids
+    reference_ids = np.array([vocabulary.setdefault(word, len(vocabulary)) for word in reference], dtype=np.int32)
+    hypothesis_ids = np.array([vocabulary.setdefault(word, len(vocabulary)) for word in hypothesis], dtype=np.int32)
+
+    band = max(1, band, int(max(n, m) * ALIGNMENT_BAND_SHARE))
+    distance, steps = _banded_alignment(reference_ids, hypothesis_ids, band)
+    # A path leaving the band makes at least abs(n - m) + 2 * (band + 1) non-diagonal steps
+    if distance >= abs(n - m) + 2 * (band + 1) and band < max(n, m):
+        band = (distance - abs(n - m)) // 2  # No path outside this band costs less than distance
+        distance, steps = _banded_alignment(reference_ids, hypothesis_ids, band)
+
+    operations = []
+    i, j, first = n, m, min(0, m - n) - band  # first: the diagonal (j - i) stored in column 0 of steps
+    while i or j:
+        step = steps[i][j - i - first]
+        if step == _DIAGONAL:
+            i, j = i - 1, j - 1
+            match = reference_ids[i] == hypothesis_ids[j]
+            operations.append(("match" if match else "substitution", i, j))
+        elif step == _DELETION:
+            i -= 1
+            operations.append(("deletion", i, None))
+        else:
+            j -= 1
+            operations.append(("insertion", None, j))
+    operations.reverse()
+    return operations
+
+
+def _banded_alignment(reference_ids, hypothesis_ids, band):
+    # Edit distance over the diagonals j - i in [first, last]. Rows are indexed by diagonal, so the
+    # cell above (i - 1, j) is one column to the right in the previous row and the diagonal
+    # predecessor (i - 1, j - 1) is the same column. Only the columns with 0 <= j <= m are computed.
+    n, m = len(reference_ids), len(hypothesis_ids)
+    first = min(0, m - n) - band
+    last = max(0, m - n) + band
+    width = last - first + 1
+    offsets = np.arange(width, dtype=np.int32)
+    steps = np.full((n + 1, width), _INSERTION, dtype=np.uint8)  # Traceback table
+
+    # Hypothesis ids shifted so that column k of row i holds the word at j - 1 = i + first + k - 1
+    padded = np.full(n + m + 2 * width + 2, -1, dtype=np.int32)
+    shift = n + width + 1
+    padded[shift:shift + m] = hypothesis_ids
+
+    row = np.full(width + 1, _INFINITY, dtype=np.int32)  # One extra cell: nothing above the last column
+    start, end = max(0, -first), min(width, m - first + 1)  # Columns with 0 <= j <= m
+    row[start:end] = offsets[start:end] + first  # Row 0: insertions only
+    current = np.full(width + 1, _INFINITY, dtype=np.int32)
+    for i in range(1, n + 1):
+        start, end = max(0, -i - first), min(width, m - i - first + 1)
+        columns = offsets[start:end]
+        above = row[start + 1:end + 1] + 1
+        words = padded[shift + i + first - 1 + start:shift + i + first - 1 + end]
+        diagonal = row[start:end] + (words != reference_ids[i - 1])
+        if i + first + start == 0:
+            diagonal[0] = _INFINITY  # Column j = 0 has no diagonal predecessor
+        best = np.minimum(above, diagonal)
+        # Insertions come from the left in the same row: D[k] = min over l <= k of best[l] + (k - l)
+        cells = np.minimum.accumulate(best - columns) + columns
+
+        steps[i, start:end] = np.where(cells < best, _INSERTION, np.where(diagonal <= above, _DIAGONAL, _DELETION))
+        current.fill(_INFINITY)
+        current[start:end] = cells
+        row, current = current, row
+    return int(row[m - n - first]), steps
+
+
+def compare_to_reference(reference, text, band=ALIGNMENT_BAND):
+    """
+    Compares what the learner said with the passage they were asked to read.
+
+    :param reference: The passage the learner was asked to read.
+    :param text: The transcription of what the learner said.
+    :param band: The initial alignment band (see align_words).
+    :return: A dictionary with the word error rate ("wer"), the number of reference words, matches,
+             substitutions, deletions and insertions, and an "errors" list. Each error has a "type",
+             the "expected" and "spoken" words, a "message", and the character ranges of the words
+             in text ("text_offset", "length") and in the reference ("reference_offset",
+             "reference_length"); the offset is None where the word is missing from that text.
+    """
+    reference_words, reference_spans = tokenize_words(reference)
+    words, spans = tokenize_words(text)
+    counts = {"match": 0, "substitution": 0, "deletion": 0, "insertion": 0}
+    errors = []
+    for operation, r, h in align_words(reference_words, words, band):
+        counts[operation] += 1
+        if operation == "match":
+            continue
+        expected = reference_words[r] if r is not None else None
+        spoken = words[h] if h is not None else None
+        if operation == "substitution":
+            message = f"Expected '{expected}' but heard '{spoken}'"
+        elif operation == "deletion":
+            message = f"Missed '{expected}'"
+        else:
+            message = f"Extra word '{spoken}'"
+        errors.append({
+            "type": operation,
+            "expected": expected,
+            "spoken": spoken,
+            "message": message,
+            "text_offset": spans[h][0] if h is not None else None,
+            "length": spans[h][1] - spans[h][0] if h is not None else 0,
+            "reference_offset": reference_spans[r][0] if r is not None else None,
+            "reference_length": reference_spans[r][1] - reference_spans[r][0] if r is not None else 0
+        })
+
+    mistakes = counts["substitution"] + counts["deletion"] + counts["insertion"]
+    total = len(reference_words)
+    return {
+        "wer": round(mistakes / total, 4) if total else float(mistakes > 0),
+        "reference_words": total,
+        "matches": counts["match"],
+        "substitutions": counts["substitution"],
+        "deletions": counts["deletion"],
+        "insertions": counts["insertion"],
+        "errors": errors
+    }
+
+
+def reference_error_spans(comparison):
+    """
+    :param comparison: A dictionary returned by compare_to_reference.
+    :return: The missed and misread words as errors whose "text_offset" and "length" point into the
+             reference, ready for highlight_errors.
+    """
+    return [
+        {"text_offset": error["reference_offset"], "length": error["reference_length"], "message": error["message"]}
+        for error in comparison["errors"] if error["reference_offset"] is not None
+    ]
@@ -0,0 +1,328 @@
+# serve.py
+
+# Production server: loads the Vosk model once, then forks worker processes that share its memory.
+# Run with: python serve.py --workers 4 --port 5000
+
+import argparse
+import gc
+import http.client
+import math
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from urllib.parse import quote
+
+# Importing the app runs its start-up checks and loads the punctuation rules, before any worker is forked
+import app as fluent_edge_app
+from flask import Response, jsonify, request
+from werkzeug.serving import make_server
+from fluent_edge_core.session_manager import session_manager, DRAIN_TIMEOUT
+from fluent_edge_core.speech_recognizer import get_model
+from fluent_edge_core.grammar_checker import get_grammar_checker
+from fluent_edge_core.batch_transcriber import close_transcribe_executor
+from fluent_edge_core.warmup import start_warmup
+from fluent_edge_core.async_transport import AsyncTransport
+from fluent_edge_core.metrics import registry, merge_metrics, CONTENT_TYPE
+
+# How workers serve HTTP: "asyncio" keeps every connection on one event loop (open event streams
+# cost no thread), "threads" uses Werkzeug's server with a thread per connection
+TRANSPORTS = ("asyncio", "threads")
+SERVE_TRANSPORT = os.environ.get("FLUENT_EDGE_TRANSPORT", "asyncio")
+
+# Number of worker processes (0 means one per CPU)
+SERVE_WORKERS = int(os.environ.get("FLUENT_EDGE_WORKERS", "0"))
+
+# Separates the owning worker's number from the rest of a session id (e.g., "2-9f86d081...")
+SESSION_ID_SEPARATOR = "-"
+
+# Address of the workers' private ports: they only take requests forwarded by the other workers,
+# so they are never exposed beyond this machine
+PRIVATE_HOST = "127.0.0.1"
+
+# Seconds a forwarded request may wait for the owning worker (longer than the event streams' keep-alive interval)
+FORWARD_TIMEOUT = 60
+
+# Seconds the worker answering /metrics waits for each of the others' metrics
+METRICS_TIMEOUT = 2
+
+# Headers that describe one connection and are not passed on between workers
+HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade",
+               "host", "content-length"}
+
+# Seconds the parent waits before replacing a worker that exited unexpectedly
+RESTART_DELAY = 1.0
+
+# Seconds after the drain timeout before workers that are still running are killed
+KILL_GRACE = 5
+
+
+def owner_of(session_id):
+    """
+    :param session_id: A session id created by a worker.
+    :return: The number of the worker that owns the session, or None if the id names no worker.
+    """
+    worker, separator, _ = (session_id or "").partition(SESSION_ID_SEPARATOR)
+    return int(worker) if separator and worker.isdigit() else None
+
+
+def forward_request(port):
+    """
+    Passes the current request to the worker listening on a private port and returns its answer.
+    Event streams are relayed as their events arrive.
+
+    :param port: The private port of the worker that owns the request's session.
+    :return: A Flask response, or 502 if the worker cannot be reached (e.g., while it restarts).
+    """
+    connection = http.client.HTTPConnection(PRIVATE_HOST, port, timeout=FORWARD_TIMEOUT)
+    target = quote(request.path) + ("?" + request.query_string.decode("latin-1") if request.query_string else "")
+    headers = {name: value for name, value in request.headers.items() if name.lower() not in HOP_HEADERS}
+    try:
+        connection.request(request.method, target, body=request.get_data(), headers=headers)
+        upstream = connection.getresponse()
+    except OSError:
+        connection.close()
+        return jsonify({"status": "The worker of this session is unavailable."}), 502
+    response_headers = [(name, value) for name, value in upstream.getheaders() if name.lower() not in HOP_HEADERS]
+    if not upstream.getheader("Content-Type", "").startswith("text/event-stream"):
+        try:
+            return Response(upstream.read(), status=upstream.status, headers=response_headers)
+        finally:
+            connection.close()
+
+    def relay():
+        try:
+            while True:
+                chunk = upstream.read1(65536)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            connection.close()
+
+    return Response(relay(), status=upstream.status, headers=response_headers)
+
+
+def route_sessions(flask_app, index, ports):
+    """
+    Makes a worker pass requests about sessions it does not own to their owner. A session's audio
+    uploads, event stream and stop must reach the process that records it, but connections to the
+    shared port land on any worker, so these requests are forwarded to the owner's private port on
+    the loopback interface. Clients only ever talk to the shared port, so the server works behind a
+    reverse proxy or load balancer that exposes that port alone, and the page keeps one origin.
+
+    :param flask_app: The Flask app served by the worker.
+    :param index: The number of this worker.
+    :param ports: The private port of each worker, by worker number.
+    """
+    @flask_app.before_request
+    def forward_to_owner():
+        owner = owner_of(request.args.get("session_id"))
+        if owner is None or owner == index or owner >= len(ports):
+            return None  # Handled here (an unknown session gets the usual 404)
+        return forward_request(ports[owner])
+
+
+def worker_metrics(port):
+    """
+    :param port: The private port of a worker.
+    :return: The text of the worker's own metrics, or None if it cannot be reached (e.g., while it restarts).
+    """
+    connection = http.client.HTTPConnection(PRIVATE_HOST, port, timeout=METRICS_TIMEOUT)
+    try:
+        connection.request("GET", "/metrics?local=1")
+        response = connection.getresponse()
+        return response.read().decode("utf-8") if response.status == 200 else None
+    except OSError:
+        return None
+    finally:
+        connection.close()
+
+
+def combine_metrics(flask_app, index, ports, metrics_registry=registry):
+    """
+    Makes /metrics on the shared port report every worker. Each worker has its own registry, and a
+    scrape lands on any worker, so the worker that answers adds the metrics of the others, read from
+    their private ports, and labels every sample with its worker number. /metrics?local=1 answers
+    with this worker's metrics alone.
+
+    :param flask_app: The Flask app served by the worker.
+    :param index: The number of this worker.
+    :param ports: The private port of each worker, by worker number.
+    :param metrics_registry: The registry of this worker.
+    """
+    @flask_app.before_request
+    def combine():
+        if request.path != "/metrics" or request.args.get("local"):
+            return None  # Served by the app's own /metrics route
+        texts = {str(worker): metrics_registry.render() if worker == index else worker_metrics(port)
+                 for worker, port in enumerate(ports)}
+        return Response(merge_metrics(texts), content_type=CONTENT_TYPE)
+
+
+def stream_owner(index, ports):
+    """
+    :param index: The number of this worker.
+    :param ports: The private port of each worker, by worker number.
+    :return: A function mapping a session id to the (host, port) its event stream is relayed from,
+             or None for the sessions of this worker, for the AsyncTransport.
+    """
+    def owner_address(session_id):
+        owner = owner_of(session_id)
+        if owner is None or owner == index or owner >= len(ports):
+            return None
+        return PRIVATE_HOST, ports[owner]
+    return owner_address
+
+
+def run_worker(index, listener, host, ports, transport=SERVE_TRANSPORT):
+    """
+    Serves the app in a forked worker process until the parent asks it to stop, then drains its
+    sessions and exits. The worker accepts connections on the listening socket it shares with the
+    other workers and on its own private port, which the other workers forward its sessions' requests to.
+
+    :param index: The number of this worker.
+    :param listener: The shared listening socket, created by the parent.
+    :param host: The address of the shared listening socket.
+    :param ports: The private port of each worker, by worker number.
+    :param transport: "asyncio" or "threads" (see TRANSPORTS).
+    """
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches every process; the parent coordinates the shutdown
+
+    session_manager.id_prefix = f"{index}{SESSION_ID_SEPARATOR}"
+    route_sessions(fluent_edge_app.app, index, ports)
+    combine_metrics(fluent_edge_app.app, index, ports)
+    fluent_edge_app.stop_server = lambda: os.kill(os.getppid(), signal.SIGTERM)  # /exit stops every worker
+    start_warmup()  # The model is already loaded; LanguageTool starts here, as its threads do not survive a fork
+
+    if transport == "asyncio":
+        streams = AsyncTransport(fluent_edge_app.app, session_manager, stream_owner=stream_owner(index, ports))
+        streams.start()
+        public = streams.listen(sock=listener)
+        private = streams.listen(PRIVATE_HOST, ports[index])
+    else:
+        public = make_server(host, listener.getsockname()[1], fluent_edge_app.app, threaded=True, fd=listener.fileno())
+        private = make_server(PRIVATE_HOST, ports[index], fluent_edge_app.app, threaded=True)
+        for server in (public, private):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"✅ Worker {index} (pid {os.getpid()}, {transport}) serving, private port {ports[index]}.", flush=True)
+
+    stopping.wait()
+    public.shutdown()  # Take no new connections; forwarded requests still reach the private port
+    drained = session_manager.drain(DRAIN_TIMEOUT)
+    private.shutdown()
+    checker = get_grammar_checker(wait=False)
+    if checker and checker.tool:
+        checker.tool.close()  # Stop this worker's local LanguageTool servers
+    close_transcribe_executor()  # And its transcription processes, if /transcribe was used
+    print(f"🛑 Worker {index} stopped" + ("." if drained else " before every session finished."), flush=True)
+    os._exit(0 if drained else 1)  # A forked child must not run the parent's exit handlers
+
+
+def serve(host="127.0.0.1", port=5000, workers=SERVE_WORKERS, port_base=None, transport=SERVE_TRANSPORT):
+    """
+    Runs the pre-fork server: loads the Vosk model and the punctuation rules once, forks the
+    workers so they share those pages copy-on-write instead of each loading its own copy, replaces
+    workers that crash, and on SIGTERM or Ctrl+C lets every worker drain before exiting.
+
+    :param host: The address to listen on.
+    :param port: The public port, shared by every worker.
+    :param workers: The number of worker processes (0 means one per CPU).
+    :param port_base: The private port of worker 0; worker n listens on port_base + n on the loopback
+                      interface (defaults to port + 1).
+    :param transport: How the workers serve HTTP, "asyncio" or "threads".
+    :return: The exit status (1 if a worker had to be killed or did not drain).
+    :raises ValueError: If the transport is unknown.
+    """
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport}. Expected one of {TRANSPORTS}.")
+    workers = workers or os.cpu_count() or 1
+    port_base = port_base or port + 1
+    ports = [port_base + i for i in range(workers)]
+
+    listener = socket.create_server((host, port), backlog=128)
+    listener.set_inheritable(True)
+
+    print("⏳ Loading the Vosk model before starting the workers...", flush=True)
+    get_model()  # Loaded once here; forked workers share its pages until they write to them
+    gc.collect()
+    gc.freeze()  # Keep the garbage collector from touching (and so copying) the objects inherited by the workers
+
+    children = {}  # pid -> worker number
+    stopping = False
+    status = 0
+
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(index, listener, host, ports, transport)
+            except BaseException:
+                traceback.print_exc()
+            os._exit(1)  # Only reached if the worker failed to start
+        children[pid] = index
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        print(f"🛑 Draining {len(children)} workers...", flush=True)
+        for pid in list(children):
+            os.kill(pid, signal.SIGTERM)
+        signal.alarm(math.ceil(DRAIN_TIMEOUT) + KILL_GRACE)  # Workers still running by then are killed
+
+    def kill(signum, frame):
+        nonlocal status
+        status = 1
+        for pid in list(children):
+            os.kill(pid, signal.SIGKILL)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGALRM, kill)
+
+    for index in range(workers):
+        spawn(index)
+    print(f"🚀 Fluent Edge serving on http://{host}:{port}/ with {workers} workers.", flush=True)
+
+    while children:
+        try:
+            pid, exit_status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if os.waitstatus_to_exitcode(exit_status):
+            status = 1
+        if not stopping:
+            print(f"⚠️ Worker {index} exited unexpectedly, restarting it.", flush=True)
+            time.sleep(RESTART_DELAY)
+            if not stopping:
+                spawn(index)
+
+    signal.alarm(0)
+    listener.close()
+    print("🛑 Fluent Edge stopped.", flush=True)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Fluent Edge with several worker processes.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("-p", "--port", type=int, default=5000, help="public port, shared by the workers")
+    parser.add_argument("-w", "--workers", type=int, default=SERVE_WORKERS, help="worker processes (0: one per CPU)")
+    parser.add_argument("--port-base", type=int, help="private port of worker 0 (default: port + 1)")
+    parser.add_argument("-t", "--transport", choices=TRANSPORTS, default=SERVE_TRANSPORT, help="how workers serve HTTP")
+    args = parser.parse_args(argv)
+    return serve(args.host, args.port, args.workers, args.port_base, args.transport)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
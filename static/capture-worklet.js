@@ -0,0 +1,28 @@
+// Audio worklet that turns the microphone's float samples into 16-bit PCM chunks for the server.
+// It runs on the audio rendering thread; every full chunk is transferred to the page without copying.
+class CaptureProcessor extends AudioWorkletProcessor {
+    constructor(options) {
+        super();
+        this.chunkFrames = options.processorOptions.chunkFrames; // Samples per uploaded chunk
+        this.chunk = new Int16Array(this.chunkFrames);
+        this.filled = 0;
+    }
+
+    process(inputs) {
+        const channel = inputs[0][0]; // Mono: the first channel of the first input
+        if (!channel) return true;
+
+        for (let i = 0; i < channel.length; i++) {
+            const sample = Math.max(-1, Math.min(1, channel[i]));
+            this.chunk[this.filled++] = sample < 0 ? sample * 0x8000 : sample * 0x7fff;
+            if (this.filled === this.chunkFrames) {
+                this.port.postMessage(this.chunk.buffer, [this.chunk.buffer]);
+                this.chunk = new Int16Array(this.chunkFrames);
+                this.filled = 0;
+            }
+        }
+        return true; // Keep processing until the node is disconnected
+    }
+}
+
+registerProcessor("capture-processor", CaptureProcessor);
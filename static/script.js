@@ -7,15 +7,27 @@ document.addEventListener("DOMContentLoaded", function () {
     const grammarErrors = document.getElementById("grammar-errors");
     const accuracyScore = document.getElementById("accuracy-score");
     const recDot = document.getElementById("rec-dot");
+    const referenceText = document.getElementById("reference-text");
+    const constrainedCheck = document.getElementById("constrained-check");
+    const readingSection = document.getElementById("reading-section");
+    const fluencySection = document.getElementById("fluency-section");
 
     let eventSource; // Variable for EventSource instance
+    let sessionId = null; // Id of the recording session created by the server
     let isListening = false; // To track whether the system is listening
     let hasReceivedSpeech = false; // To track if any speech was received
+    let finalResults = false; // Set by FULL_TRANSCRIPTION; the GRAMMAR_ERRORS that follow are the complete list
     let typingTimeout; // For controlling the typing animation delay
+    let capture = null; // Microphone capture in the browser (audio context, stream and worklet node)
+    let uploader = null; // Sends the captured audio of the current session to the server
+    let startAttempt = 0; // Number of the latest press of Start, so a start that was stopped meanwhile is abandoned
+
+    const CHUNK_MS = 100; // Milliseconds of audio per upload
+    const UPLOAD_RETRY_MS = 500; // Wait before retrying an upload that failed on the network
 
     // Helper function to send requests to the server
-    function sendRequest(endpoint) {
-        return fetch(endpoint).then(res => {
+    function sendRequest(endpoint, options) {
+        return fetch(endpoint, options).then(res => {
             if (!res.ok) throw new Error("Request failed");
             return res.json();
         });
@@ -27,6 +39,7 @@ document.addEventListener("DOMContentLoaded", function () {
             // Start listening
             isListening = true;
             hasReceivedSpeech = false; // Reset speech received flag
+            finalResults = false;
             toggleButton.textContent = "Stop";
             toggleButton.classList.remove("bg-green-500", "hover:bg-green-600");
             toggleButton.classList.add("bg-red-500", "hover:bg-red-600");
@@ -39,43 +52,206 @@ document.addEventListener("DOMContentLoaded", function () {
 
             liveTranscription.innerHTML = `<span class="fade-text">Listening...</span>`;
             finalTranscription.innerHTML = `<span class="fade-text">Waiting for the speech to end...</span>`;
+            readingSection.classList.add("hidden");
+            fluencySection.classList.add("hidden");
 
-            sendRequest("/start"); // Notify the server to start the recording
-            initializeEventSource(); // Start listening for transcription data
+            sessionId = null;
+            const attempt = ++startAttempt;
+            const stillStarting = () => isListening && attempt === startAttempt; // Not stopped (or restarted) meanwhile
+            // Open the microphone, then notify the server to start a session fed with its audio
+            // (with the passage to read, if any), then listen for the session's transcription data
+            openMicrophone()
+                .catch(error => {
+                    liveTranscription.textContent = "Could not access the microphone. Please allow it and try again.";
+                    resetToggleButton();
+                    throw error;
+                })
+                .then(() => {
+                    if (stillStarting()) return;
+                    closeMicrophone(); // Stop was pressed while the microphone was opening
+                    throw new Error("Stopped before the session started");
+                })
+                .then(() => sendRequest("/start", {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({
+                        partials: true,
+                        reference: referenceText.value.trim() || null,
+                        constrained: constrainedCheck.checked,
+                        source: "browser",
+                        sample_rate: capture.context.sampleRate
+                    })
+                }).catch(error => {
+                    liveTranscription.textContent = "Could not start recording. The server may be busy, please try again.";
+                    closeMicrophone();
+                    resetToggleButton();
+                    throw error;
+                }))
+                .then(data => {
+                    if (!stillStarting()) {
+                        // Stop was pressed while the server created the session, which nobody would stop otherwise
+                        sendRequest(`/stop?session_id=${encodeURIComponent(data.session_id)}`);
+                        return;
+                    }
+                    sessionId = data.session_id;
+                    uploader = new ChunkUploader(sessionId);
+                    capture.node.port.onmessage = event => uploader.push(event.data); // One chunk of int16 samples
+                    capture.source.connect(capture.node); // Start capturing only now that the session exists
+                    initializeEventSource();
+                })
+                .catch(error => console.error("Start failed:", error));
         } else {
             // Stop listening
-            isListening = false;
-            toggleButton.textContent = "Start";
-            toggleButton.classList.remove("bg-red-500", "hover:bg-red-600");
-            toggleButton.classList.add("bg-green-500", "hover:bg-green-600");
-            recDot.classList.add("hidden");
+            resetToggleButton();
 
             liveTranscription.textContent = "Current transcription has ended. Press start to start a new Transcription.";
-            grammarErrors.innerHTML = `<tr><td colspan='3' class="fade-text">Analyzing...</td></tr>`;
+            if (!grammarErrors.querySelector("tr.grammar-error-row")) {
+                grammarErrors.innerHTML = `<tr><td colspan='3' class="fade-text">Analyzing...</td></tr>`; // Keep errors already found
+            }
             accuracyScore.innerHTML = `<span class="fade-text">Analyzing...</span>`;
-            sendRequest("/stop"); // Notify the server to stop the recording
+            closeMicrophone();
+            const stoppedSession = sessionId;
+            if (stoppedSession) {
+                // Let the audio still queued reach the server, then notify it to stop the recording
+                (uploader ? uploader.finish() : Promise.resolve())
+                    .then(() => sendRequest(`/stop?session_id=${encodeURIComponent(stoppedSession)}`));
+            } // Otherwise the session is still being started, and the start stops it once it exists
+        }
+    }
+
+    // Function to open the microphone and prepare the worklet that cuts its audio into 16-bit chunks
+    async function openMicrophone() {
+        const stream = await navigator.mediaDevices.getUserMedia({
+            audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true }
+        });
+        let context;
+        let source;
+        try {
+            context = new AudioContext({ sampleRate: 16000 }); // The recognizer's rate, so the server needs no resampling
+            source = context.createMediaStreamSource(stream);
+        } catch (error) {
+            if (context) context.close(); // Some browsers cannot capture at another rate than the device's
+            context = new AudioContext();
+            source = context.createMediaStreamSource(stream);
         }
+        await context.audioWorklet.addModule("/static/capture-worklet.js");
+        const node = new AudioWorkletNode(context, "capture-processor", {
+            processorOptions: { chunkFrames: Math.round(context.sampleRate * CHUNK_MS / 1000) }
+        });
+        node.connect(context.destination); // Keeps the node running; it outputs silence
+        capture = { context, stream, source, node };
+    }
+
+    // Function to release the microphone
+    function closeMicrophone() {
+        if (!capture) return;
+        capture.source.disconnect();
+        capture.node.port.onmessage = null;
+        capture.stream.getTracks().forEach(track => track.stop());
+        capture.context.close();
+        capture = null;
+    }
+
+    // Uploads the chunks of one session in order, numbered from 0. The server answers 429 while its
+    // buffer is full (the chunk is retried after the delay it gives) and 409 if it expects another chunk.
+    class ChunkUploader {
+        constructor(id) {
+            this.sessionId = id;
+            this.queue = []; // Chunks not yet accepted by the server, oldest first
+            this.nextSeq = 0; // Sequence number of the next captured chunk
+            this.running = null; // Promise of the upload loop while it runs
+        }
+
+        push(buffer) {
+            this.queue.push({ seq: this.nextSeq++, data: buffer });
+            if (!this.running) this.running = this.drain().finally(() => { this.running = null; });
+        }
+
+        finish() {
+            return this.running || Promise.resolve();
+        }
+
+        async drain() {
+            while (this.queue.length) {
+                const chunk = this.queue[0];
+                let response;
+                try {
+                    response = await fetch(`/audio?session_id=${encodeURIComponent(this.sessionId)}&seq=${chunk.seq}`, {
+                        method: "POST",
+                        headers: { "Content-Type": "application/octet-stream" },
+                        body: chunk.data
+                    });
+                } catch (error) {
+                    await sleep(UPLOAD_RETRY_MS); // Network error, try the same chunk again
+                    continue;
+                }
+                const body = await response.json().catch(() => ({}));
+                if (response.status === 429) {
+                    await sleep((body.retry_after || UPLOAD_RETRY_MS / 1000) * 1000); // The recognizer is catching up
+                } else if (response.ok || response.status === 409) {
+                    // Drop what the server already has; on 409 the upload continues at the chunk it expects
+                    while (this.queue.length && this.queue[0].seq < body.next_seq) this.queue.shift();
+                    if (this.queue.length && this.queue[0].seq > body.next_seq) {
+                        console.error("Audio chunks were lost before reaching the server.");
+                        this.queue = [];
+                    }
+                } else {
+                    console.error("Audio upload stopped:", response.status, body.status);
+                    this.queue = []; // The session is over or unknown
+                }
+            }
+        }
+    }
+
+    function sleep(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    // Function to put the toggle button back into its "Start" state
+    function resetToggleButton() {
+        isListening = false;
+        toggleButton.textContent = "Start";
+        toggleButton.classList.remove("bg-red-500", "hover:bg-red-600");
+        toggleButton.classList.add("bg-green-500", "hover:bg-green-600");
+        recDot.classList.add("hidden");
     }
 
     // Function to initialize the EventSource for live transcription data
     function initializeEventSource() {
         if (eventSource) eventSource.close(); // Close previous EventSource if any
-        eventSource = new EventSource("/transcription"); // Create new EventSource
+        eventSource = new EventSource(`/transcription?session_id=${encodeURIComponent(sessionId)}`); // Create new EventSource
 
         // Handle incoming messages from the server
         eventSource.onmessage = function (event) {
             const message = event.data;
 
-            if (message.startsWith("LIVE::")) {
+            if (message.startsWith("PARTIAL::")) {
+                const text = message.replace("PARTIAL::", "").trim();
+                showPartialText(liveTranscription, text);
+            } else if (message.startsWith("LIVE::")) {
                 const text = message.replace("LIVE::", "").trim();
                 hasReceivedSpeech = true;
-                typeText(liveTranscription, text || "Listening...");
+                typeText(liveTranscription, text || "Listening..."); // The finished segment replaces the partial one
             } else if (message.startsWith("FULL_TRANSCRIPTION::")) {
                 const text = message.replace("FULL_TRANSCRIPTION::", "").trim();
+                finalResults = true;
                 finalTranscription.textContent = text || "No speech detected";
+            } else if (message.startsWith("HIGHLIGHTED_TRANSCRIPTION::")) {
+                const html = message.replace("HIGHLIGHTED_TRANSCRIPTION::", "").trim();
+                if (html) finalTranscription.innerHTML = html; // Escaped on the server, errors wrapped in spans
+            } else if (message.startsWith("READING_SCORE::")) {
+                const score = JSON.parse(message.replace("READING_SCORE::", ""));
+                showReadingScore(score); // Compare the speech with the passage that was read
+            } else if (message.startsWith("FLUENCY::")) {
+                const fluency = JSON.parse(message.replace("FLUENCY::", ""));
+                showFluency(fluency); // Pace, pauses and hesitations of the whole recording
             } else if (message.startsWith("GRAMMAR_ERRORS::")) {
                 const errors = JSON.parse(message.replace("GRAMMAR_ERRORS::", ""));
-                updateGrammarErrorsTable(errors); // Update the grammar errors table
+                if (finalResults) {
+                    updateGrammarErrorsTable(errors); // The complete list replaces the table
+                } else {
+                    appendGrammarErrors(errors); // Show errors of finished utterances while the learner speaks
+                }
             } else if (message.startsWith("ACCURACY::")) {
                 const scoreStr = message.replace("ACCURACY::", "").trim();
                 const feedback = document.getElementById("accuracy-feedback");
@@ -107,8 +283,8 @@ document.addEventListener("DOMContentLoaded", function () {
                         feedback.textContent = "❌ Needs improvement. Keep practicing!";
                     }
                 }
-
-                if (eventSource) eventSource.close(); // Close the EventSource connection after receiving all necessary data
+            } else if (message.startsWith("DONE::")) {
+                if (eventSource) eventSource.close(); // Every result has arrived; stop the browser from reconnecting
             }
         };
 
@@ -137,6 +313,38 @@ document.addEventListener("DOMContentLoaded", function () {
         typeNextChar();
     }
 
+    // Function to show an unfinished hypothesis in a provisional style (no typing animation, it changes too often)
+    function showPartialText(element, text) {
+        if (!text) return;
+        if (typingTimeout) clearTimeout(typingTimeout);
+
+        const partial = document.createElement("span");
+        partial.className = "partial-text";
+        partial.textContent = text;
+        element.replaceChildren(partial);
+    }
+
+    // Function to show the word error rate and the passage with its missed and misread words highlighted
+    function showReadingScore(score) {
+        document.getElementById("reading-summary").textContent =
+            `Word error rate: ${(score.wer * 100).toFixed(1)}% (${score.substitutions} misread, ` +
+            `${score.deletions} missed, ${score.insertions} extra of ${score.reference_words} words)`;
+        document.getElementById("reading-reference").innerHTML = score.highlighted_reference; // Escaped on the server
+        readingSection.classList.remove("hidden");
+    }
+
+    // Function to show the speech rate, pauses, fillers and the words that were hard to understand
+    function showFluency(fluency) {
+        if (!fluency.words) return;
+        document.getElementById("fluency-summary").textContent =
+            `${fluency.speech_rate} words per minute (${fluency.articulation_rate} while speaking), ` +
+            `${fluency.pauses.count} pauses (longest ${fluency.pauses.longest}s), ${fluency.fillers.count} fillers`;
+        const unclear = fluency.low_confidence.words.map(word => word.word);
+        document.getElementById("fluency-unclear").textContent =
+            unclear.length ? `Unclear words: ${unclear.join(", ")}` : "Every word was pronounced clearly.";
+        fluencySection.classList.remove("hidden");
+    }
+
     // Function to update the grammar errors table with the received errors
     function updateGrammarErrorsTable(errors) {
         grammarErrors.innerHTML = "";
@@ -149,9 +357,19 @@ document.addEventListener("DOMContentLoaded", function () {
             return;
         }
 
+        appendGrammarErrors(errors);
+    }
+
+    // Function to add rows for the given errors to the grammar errors table
+    function appendGrammarErrors(errors) {
+        if (!Array.isArray(errors) || errors.length === 0) return;
+        if (!grammarErrors.querySelector("tr.grammar-error-row")) {
+            grammarErrors.innerHTML = ""; // Drop the placeholder row before the first error
+        }
+
         errors.forEach(error => {
             const row = document.createElement("tr");
-            row.className = "border-b border-gray-700";
+            row.className = "grammar-error-row border-b border-gray-700";
             row.innerHTML = ` 
                 <td class="p-3 text-left border border-gray-600">${error.sentence || "N/A"}</td>
                 <td class="p-3 border border-gray-600">${error.message || error.error || "N/A"}</td>
@@ -164,6 +382,11 @@ document.addEventListener("DOMContentLoaded", function () {
     // Event listener for the toggle button to start/stop transcription
     toggleButton.addEventListener("click", toggleListening);
 
+    // Stop the session when the tab is closed or navigated away from (the server also stops it once its uploads stop)
+    window.addEventListener("pagehide", () => {
+        if (isListening && sessionId) navigator.sendBeacon(`/stop?session_id=${encodeURIComponent(sessionId)}`);
+    });
+
     // Event listener for the exit button to close the application
     exitButton.addEventListener("click", () => {
         if (confirm("Are you sure you want to exit?")) {